@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Compare the throughput of the resize engines
+
+Usage: benchmarks/engines.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+import helpers
+
+helpers.configure()
+
+# pylint: disable=C0413
+from django.core.files.images import ImageFile  # noqa
+from django.test.utils import override_settings  # noqa
+
+import simple_resizer  # noqa
+
+ASSETS = os.path.join(os.path.dirname(__file__), os.pardir, "simple_resizer",
+                      "tests", "assets")
+
+SPECS = (
+    (300, 300, False),
+    (300, 300, True),
+    (1200, 800, False),
+)
+
+
+def run(path, engine, spec, iterations):
+    """
+    Return the resizes per second of one image, engine and spec
+    """
+    def _resize():
+        """
+        Resize once
+        """
+        with open(path, "rb") as source:
+            with simple_resizer.resized(ImageFile(source), *spec):
+                pass
+
+    with override_settings(SIMPLE_RESIZER_ENGINE=engine):
+        # Warm up
+        _resize()
+        elapsed = timeit.timeit(_resize, number=iterations)
+
+    return iterations / elapsed
+
+
+def main():
+    """
+    Print a throughput table
+    """
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    for name in sorted(os.listdir(ASSETS)):
+        path = os.path.join(ASSETS, name)
+        for spec in SPECS:
+            for engine in helpers.ENGINES:
+                print("%-12s %-18s %-14s %8.2f/s" % (
+                    name, "%ix%i%s" % (spec[0], spec[1],
+                                       "_cropped" if spec[2] else ""),
+                    engine.rsplit(".", 1)[1],
+                    run(path, engine, spec, iterations)))
+
+
+if __name__ == "__main__":
+    main()
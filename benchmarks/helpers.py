@@ -0,0 +1,90 @@
+"""
+Helpers shared by the benchmarks: settings, synthetic sources and measuring
+in a fresh process
+"""
+
+import multiprocessing
+import os
+import resource
+import struct
+import sys
+
+from django.conf import settings
+
+
+ENGINES = (
+    "simple_resizer.engines.wand_engine.WandEngine",
+    "simple_resizer.engines.pillow_engine.PillowEngine",
+)
+
+
+def configure(**options):
+    """
+    Make the package importable and configure django, with the wand engine
+    unless an other one is given
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+    options.setdefault("SIMPLE_RESIZER_ENGINE", ENGINES[0])
+    settings.configure(**options)
+
+
+def get_peak():
+    """
+    Return the peak resident set size of this process in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def get_exif(orientation):
+    """
+    Return an exif block holding only the orientation
+    """
+    # Big endian tiff header, one entry in the first directory
+    return b"Exif\x00\x00" + struct.pack(
+        ">2sHIHHHIHHI", b"MM", 42, 8, 1, 0x0112, 3, 1, orientation, 0, 0)
+
+
+def create_source(directory, megapixels, source_format="jpeg",
+                  orientation=1):
+    """
+    Write a synthetic 4:3 source of about megapixels, returns its name in
+    directory
+    """
+    # Imported here, only once django is configured
+    from PIL import Image
+
+    width = int((megapixels * 1000000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+
+    # Upscaled noise, smooth enough to compress like a photo
+    noise = Image.effect_noise((width // 8, height // 8), 64)
+    source = Image.merge("RGB", (noise, noise.rotate(180), noise))
+    source = source.resize((width, height), Image.BILINEAR)
+
+    name = "%s-%gmp-o%i.%s" % (source_format, megapixels, orientation,
+                               source_format)
+    path = os.path.join(directory, name)
+
+    if source_format == "jpeg":
+        source.save(path, "JPEG", quality=90, exif=get_exif(orientation))
+    elif source_format == "gif":
+        source.convert("P", palette=Image.ADAPTIVE).save(path, "GIF")
+    else:
+        source.save(path, "PNG")
+
+    return name
+
+
+def run_isolated(function, *args):
+    """
+    Return function(*args) run in a fresh process, so its peak memory is
+    its own
+    """
+    pool = multiprocessing.Pool(1)
+
+    try:
+        return pool.apply(function, args)
+    finally:
+        pool.terminate()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Compare the peak memory of resizing a large source read from a local path
+and from a remote like stream
+
+Every resize runs in a fresh process, the growth of its peak resident set
+size is reported.
+
+Usage: benchmarks/memory.py [megapixels]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import helpers
+
+helpers.configure()
+
+# pylint: disable=C0413
+from django.core.files import File  # noqa
+from django.core.files.images import ImageFile  # noqa
+from django.test.utils import override_settings  # noqa
+
+import simple_resizer  # noqa
+
+SPEC = (300, 300, False)
+
+
+class RemoteFile(object):
+    """
+    A file that can only be read as a stream, like one of a remote storage
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+
+    def read(self, *args):
+        """
+        Read from the file
+        """
+        return self._file.read(*args)
+
+    def seek(self, *args):
+        """
+        Seek in the file
+        """
+        return self._file.seek(*args)
+
+    def tell(self):
+        """
+        Return the position in the file
+        """
+        return self._file.tell()
+
+    def close(self):
+        """
+        Close the file
+        """
+        self._file.close()
+
+    @property
+    def closed(self):
+        """
+        Whether the file is closed
+        """
+        return self._file.closed
+
+
+def measure(path, engine, remote):
+    """
+    Resize once and return the peak growth, runs in a fresh process
+    """
+    start = helpers.get_peak()
+
+    with override_settings(SIMPLE_RESIZER_ENGINE=engine):
+        if remote:
+            image = File(RemoteFile(path), name=os.path.basename(path))
+        else:
+            image = ImageFile(open(path, "rb"))
+
+        with simple_resizer.resized(image, *SPEC):
+            pass
+
+        image.close()
+
+    return helpers.get_peak() - start
+
+
+def main():
+    """
+    Print a peak memory table
+    """
+    megapixels = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    directory = tempfile.mkdtemp()
+
+    try:
+        path = os.path.join(directory,
+                            helpers.create_source(directory, megapixels))
+        print("%.0f MP source, %.1f MB" % (
+            megapixels, os.path.getsize(path) / 1024.0 / 1024.0))
+
+        for engine in helpers.ENGINES:
+            for remote in (False, True):
+                print("%-14s %-8s %8.1f MB" % (
+                    engine.rsplit(".", 1)[1],
+                    "stream" if remote else "path",
+                    helpers.run_isolated(measure, path, engine,
+                                         remote) / 1024.0 / 1024.0))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
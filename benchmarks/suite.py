@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""
+Benchmark resizing a synthetic corpus and check for regressions
+
+A corpus of jpeg, png and gif sources of the given sizes is generated, with
+the jpeg of the smallest size in every exif orientation. Each source is
+resized with resize, and with resize_lazy when the variant is missing and
+when it is cached, with and without cropping. Every case runs in a fresh
+process, its latency percentiles, throughput and growth of the peak
+resident set size are written as json.
+
+When a baseline is given, or benchmarks/baseline.json exists, the run fails
+if the median latency or the peak memory of a case regresses past the
+tolerance.
+
+Baselines only hold on the machine they were saved on, so none is shipped
+and both files are ignored by git. To check a change, save a baseline on
+the commit before it and run the suite again on the change:
+
+    git checkout master && benchmarks/suite.py --save-baseline
+    git checkout my-change && benchmarks/suite.py
+
+Usage: benchmarks/suite.py [--engine PATH] [--sizes 1,12,50] [--quick]
+                           [--output PATH] [--baseline PATH]
+                           [--save-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import helpers
+
+helpers.configure(SIMPLE_RESIZER_CACHE="default",
+                  MEDIA_ROOT=tempfile.mkdtemp())
+
+# pylint: disable=C0413
+from django.conf import settings  # noqa
+from django.core.cache import cache  # noqa
+from django.core.files.images import ImageFile  # noqa
+from django.core.files.storage import default_storage  # noqa
+from django.test.utils import override_settings  # noqa
+
+import simple_resizer  # noqa
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results.json")
+
+FORMATS = ("jpeg", "png", "gif")
+
+SIZES = (1, 12, 50)
+
+# (scenario, crop)
+SCENARIOS = (
+    ("resize", False),
+    ("resize", True),
+    ("lazy_miss", False),
+    ("lazy_miss", True),
+    ("lazy_hit", False),
+)
+
+SPEC = (300, 300)
+
+# Measures compared with the baseline, with the absolute slack that keeps
+# the fastest and smallest cases from failing on noise
+CHECKED = {
+    "p50": 0.001,
+    "peak_memory": 1024 * 1024,
+}
+
+
+def create_corpus(directory, sizes):
+    """
+    Write the corpus, returns the names of the sources
+    """
+    names = []
+
+    for megapixels in sizes:
+        for source_format in FORMATS:
+            names.append(helpers.create_source(directory, megapixels,
+                                               source_format))
+
+    for orientation in range(2, 9):
+        names.append(helpers.create_source(directory, min(sizes), "jpeg",
+                                           orientation))
+
+    return names
+
+
+def percentile(timings, fraction):
+    """
+    Return the nearest rank percentile of sorted timings
+    """
+    index = int(round(fraction * (len(timings) - 1)))
+    return timings[index]
+
+
+def measure(name, scenario, crop, options):
+    """
+    Time a case and return its measures, runs in a fresh process
+    """
+    start = helpers.get_peak()
+    image = ImageFile(default_storage.open(name), name=name)
+
+    def _setup():
+        """
+        Prepare an iteration, not timed
+        """
+        if scenario == "lazy_miss":
+            cache.clear()
+            variant = simple_resizer.resize_lazy(image, *SPEC, crop=crop)
+            default_storage.delete(variant)
+            cache.clear()
+
+    def _run():
+        """
+        Run an iteration
+        """
+        if scenario == "resize":
+            with simple_resizer.resized(image, *SPEC, crop=crop):
+                pass
+        else:
+            simple_resizer.resize_lazy(image, *SPEC, crop=crop)
+
+    with override_settings(SIMPLE_RESIZER_ENGINE=options.engine):
+        # Warm up, leaves a cached variant for lazy_hit
+        _run()
+
+        timings = []
+        started = time.time()
+        while len(timings) < options.iterations and (
+                len(timings) < options.min_iterations or
+                time.time() - started < options.min_time):
+            _setup()
+            before = time.time()
+            _run()
+            timings.append(time.time() - before)
+
+    image.close()
+    timings.sort()
+
+    return {
+        "iterations": len(timings),
+        "throughput": len(timings) / sum(timings),
+        "mean": sum(timings) / len(timings),
+        "p50": percentile(timings, 0.5),
+        "p90": percentile(timings, 0.9),
+        "p99": percentile(timings, 0.99),
+        "peak_memory": helpers.get_peak() - start,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return the regressions of results past the baseline
+    """
+    regressions = []
+
+    for case in sorted(results):
+        if case not in baseline:
+            continue
+
+        for measure_name in sorted(CHECKED):
+            limit = (baseline[case][measure_name] * (1 + tolerance) +
+                     CHECKED[measure_name])
+            if results[case][measure_name] > limit:
+                regressions.append("%s %s: %g > %g" % (
+                    case, measure_name, results[case][measure_name], limit))
+
+    return regressions
+
+
+def get_options():
+    """
+    Parse the command line
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark resizing a synthetic corpus")
+    parser.add_argument("--engine", default=settings.SIMPLE_RESIZER_ENGINE,
+                        help="dotted path of the engine")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)),
+                        help="comma separated megapixels of the sources")
+    parser.add_argument("--quick", action="store_true",
+                        help="only 1 megapixel sources")
+    parser.add_argument("--iterations", type=int, default=50,
+                        help="most iterations of a case")
+    parser.add_argument("--min-iterations", type=int, default=5,
+                        help="least iterations of a case")
+    parser.add_argument("--min-time", type=float, default=2,
+                        help="seconds to keep iterating a case")
+    parser.add_argument("--output", default=RESULTS,
+                        help="file to write the results to")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="results to check for regressions against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="fraction a measure may exceed the baseline")
+
+    options = parser.parse_args()
+    options.sizes = (1,) if options.quick else tuple(
+        float(size) for size in options.sizes.split(","))
+    return options
+
+
+def main():
+    """
+    Run the cases, write the results and check for regressions
+    """
+    options = get_options()
+    results = {}
+
+    try:
+        for name in create_corpus(settings.MEDIA_ROOT, options.sizes):
+            for scenario, crop in SCENARIOS:
+                case = "%s/%s%s" % (os.path.splitext(name)[0], scenario,
+                                    "_cropped" if crop else "")
+                results[case] = helpers.run_isolated(
+                    measure, name, scenario, crop, options)
+                print("%-32s %8.2f/s p50 %8.1fms p99 %8.1fms %8.1f MB" % (
+                    case, results[case]["throughput"],
+                    results[case]["p50"] * 1000, results[case]["p99"] * 1000,
+                    results[case]["peak_memory"] / 1024.0 / 1024.0))
+    finally:
+        shutil.rmtree(settings.MEDIA_ROOT)
+
+    report = {
+        "engine": options.engine,
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+
+    for path in [options.output] + (
+            [options.baseline] if options.save_baseline else []):
+        with open(path, "w") as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    if options.save_baseline or not os.path.exists(options.baseline):
+        return 0
+
+    with open(options.baseline) as baseline:
+        baseline = json.load(baseline)
+
+    if baseline["engine"] != options.engine:
+        print("Baseline is of %s, not checked." % baseline["engine"])
+        return 0
+
+    regressions = compare(results, baseline["results"], options.tolerance)
+    for regression in regressions:
+        print("Regression: %s" % regression)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
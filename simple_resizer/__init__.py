@@ -10,16 +10,45 @@ Future modifications to make:
 """
 
 import os
-import math
-import tempfile
+import time
 
 from contextlib import contextmanager
 
-from wand.image import ORIENTATION_TYPES
-from wand.image import Image
-
 from django.core.files.storage import default_storage
-from django.core.files.images import ImageFile
+from django.utils import six
+
+from . import cache
+from . import executor
+from . import index
+from . import locks
+from . import metrics
+from . import workers
+from .conf import get_setting
+from .engines import get_engine
+from .exceptions import ImageTooLarge  # noqa
+from .exceptions import LimitExceeded  # noqa
+from .exceptions import ResizeTimeout  # noqa
+from .files import ResizedImageFile
+from .files import get_output_file
+from .formats import EXTENSIONS
+from .formats import get_extension
+from .formats import get_format
+from .formats import get_output_format
+from .geometry import get_spec_size
+from .geometry import get_target_geometry
+from .limits import check_deadline
+from .limits import check_resources
+from .limits import check_size
+from .limits import get_deadline
+from .limits import get_limits
+from .limits import limited  # noqa
+from .profiles import get_options
+from .profiles import get_profile
+from .profiles import get_token
+from .probe import get_size
+from .probe import probe
+from .sources import get_source_path
+from .sources import get_source_token
 
 
 def _normalize_params(image, width, height, crop):
@@ -31,21 +60,18 @@ def _normalize_params(image, width, height, crop):
                          "resizing is useless.")
 
     if width is None or height is None:
-        aspect = float(image.width) / float(image.height)
-
         if crop:
             raise ValueError("Cropping the image would be useless since only "
                              "one dimention is give to resize along.")
 
-        if width is None:
-            width = int(round(height * aspect))
-        else:
-            height = int(round(width / aspect))
+        width, height = get_spec_size(get_size(image), width, height)
 
     return (width, height, crop)
 
 
-def _get_resized_name(image, width, height, crop, namespace):
+# pylint: disable=R0913
+def _get_resized_name(image, width, height, crop, namespace,
+                      output_format=None, profile=None):
     """
     Get the name of the resized file when assumed it exists.
     """
@@ -54,132 +80,393 @@ def _get_resized_name(image, width, height, crop, namespace):
     if crop:
         name_part += "_cropped"
 
+    if profile is not None:
+        name_part += "_%s" % get_token(profile)
+
+    if get_setting("NAMING") == "versioned":
+        # A replaced source gets new variant names
+        root, ext = os.path.splitext(name)
+        name = "%s.%s%s" % (root, get_source_token(image), ext)
+
+    if output_format is not None:
+        # Keep the source extension, so sources that only differ in it do
+        # not share variants
+        name = "%s.%s" % (name, get_extension(output_format))
+
     return os.path.join(path, name_part, name)
+# pylint: enable=R0913
 
 
-def _resize(image, width, height, crop):
+def _encode(engine, b_image, ext, options):
     """
-    Resize the image with respect to the aspect ratio
+    Encode the image to a file, in memory unless it is large
+    """
+    output = get_output_file()
+    width, height = engine.get_size(b_image)
+
+    with metrics.timed("encode", format=EXTENSIONS.get(ext, ext),
+                       target=metrics.get_dimensions((width, height))) as tags:
+        engine.encode(b_image, output, ext, options)
+        output.seek(0, os.SEEK_END)
+        size = tags["bytes"] = output.tell()
+
+    # Rewind the file
+    output.seek(0)
+    return ResizedImageFile(output, width, height, size)
+
+
+def _get_aspect(size):
+    """
+    Return the aspect ratio of a (width, height) size.
+    """
+    return float(size[0]) / float(size[1])
+
+
+def _resize_many(image, specs, engine=None, info=None, limits=None):
+    """
+    Resize the image with respect to the aspect ratio to every (width,
+    height, crop, output_format, profile) spec, with a single decode.
+    Returns a ResizedImageFile for each spec, encoded in the output format
+    or in the format of the source if it is None, with the options of the
+    profile.
+
+    If info, the probe.ImageInfo of the image, is given the geometry is
+    planned before decoding and the engine decodes at the scale that covers
+    exactly the largest resize. limits default to those of the calling
+    thread.
     """
     ext = os.path.splitext(image.name)[1].strip(".")
+    engine = engine or get_engine()
+    limits = get_limits() if limits is None else limits
+    deadline = get_deadline(limits)
+
+    if info is not None:
+        geometries = [get_target_geometry(info.size, *spec[:3])
+                      for spec in specs]
+        hint = (max(geometry[0] for geometry in geometries),
+                max(geometry[1] for geometry in geometries))
+    else:
+        # Every resized image covers its width x height in both the fit and
+        # the crop case, so the engine may decode at any scale that covers
+        # them all.
+        geometries = None
+        hint = (max(spec[0] for spec in specs),
+                max(spec[1] for spec in specs))
+
+    # Local sources are read by the decoder itself, without a copy in memory
+    with metrics.timed("decode", format=EXTENSIONS.get(ext, ext)) as tags:
+        b_image = engine.decode(
+            get_source_path(image) or image, ext, size=hint,
+            orientation=getattr(info, "orientation", None))
+        tags["source"] = metrics.get_dimensions(engine.get_size(b_image))
+
+    # The uncropped images to resize from, and every image to close
+    sources = [b_image]
+    images = [b_image]
+    temp_files = [None] * len(specs)
+    try:
+        if info is None:
+            # Not probed, engines that decode lazily still fail fast
+            check_size(engine.get_size(b_image), limits)
+
+        # Fix rotation and strip color profiles
+        with metrics.timed("orient") as tags:
+            b_image = engine.strip(engine.orient(b_image))
+            sources[0] = images[0] = b_image
+            size = engine.get_size(b_image)
+            tags["source"] = metrics.get_dimensions(size)
+
+        if geometries is None or abs(
+                _get_aspect(size) / _get_aspect(info.size) - 1) > 0.01:
+            # Not probed, or the header did not match the pixels
+            geometries = [get_target_geometry(size, *spec[:3])
+                          for spec in specs]
+
+        # Largest first, so the smaller ones can be resized from the larger
+        # ones instead of from the full image
+        order = sorted(range(len(specs)), reverse=True,
+                       key=lambda idx: geometries[idx][0] * geometries[idx][1])
+
+        for position, idx in enumerate(order):
+            check_deadline(deadline)
+            target_width, target_height, crop_box = geometries[idx]
+            # The last one may consume its source
+            consume = position == len(order) - 1
+
+            # Start from the smallest image that still covers the target
+            candidates = [
+                source for source in sources
+                if engine.get_size(source)[0] >= target_width and
+                engine.get_size(source)[1] >= target_height] or sources[:1]
+            source = min(candidates, key=lambda source: (
+                engine.get_size(source)[0] * engine.get_size(source)[1]))
+
+            # Resize
+            with metrics.timed(
+                    "resize",
+                    source=metrics.get_dimensions(engine.get_size(source)),
+                    target=metrics.get_dimensions((target_width,
+                                                   target_height))):
+                resized = engine.resize(
+                    source if consume else engine.clone(source),
+                    target_width, target_height)
+                sources.append(resized)
+                images.append(resized)
+
+            if crop_box is not None:
+                # Crop to target
+                with metrics.timed(
+                        "crop", source=metrics.get_dimensions(
+                            (target_width, target_height)),
+                        target=metrics.get_dimensions(crop_box[2:])):
+                    # Not a source, the crop lost part of the image
+                    resized = engine.crop(
+                        resized if consume else engine.clone(resized),
+                        *crop_box)
+                    images.append(resized)
+
+            # Encoding is slow too, refuse it once the time is up
+            check_deadline(deadline)
+            output_format = specs[idx][3] or get_format(image.name)
+            options = get_options(specs[idx][4], output_format)
+
+            if options.get("blur"):
+                with metrics.timed("blur"):
+                    # Later variants may still be resized from it
+                    resized = engine.blur(
+                        resized if consume else engine.clone(resized),
+                        options["blur"])
+                    images.append(resized)
+
+            temp_files[idx] = _encode(
+                engine, resized,
+                get_extension(specs[idx][3]) if specs[idx][3] else ext,
+                options)
+    except Exception:
+        for temp_file in temp_files:
+            if temp_file is not None:
+                temp_file.close()
+        raise
+    finally:
+        closed = set()
+        for b_image in images:
+            if id(b_image) not in closed:
+                closed.add(id(b_image))
+                engine.close(b_image)
+
+    return temp_files
 
-    with Image(file=image, format=ext) as b_image:
-        # Account for orientation
-        if ORIENTATION_TYPES.index(b_image.orientation) > 4:
-            # Flip
-            target_aspect = float(width) / float(height)
-            aspect = float(b_image.height) / float(b_image.width)
-        else:
-            target_aspect = float(width) / float(height)
-            aspect = float(b_image.width) / float(b_image.height)
-
-        # Fix rotation
-        b_image.auto_orient()
-
-        # Calculate target size
-        target_aspect = float(width) / float(height)
-        aspect = float(b_image.width) / float(b_image.height)
-
-        if ((target_aspect > aspect and not crop) or
-                (target_aspect <= aspect and crop)):
-            # target is wider than image, set height as maximum
-            target_height = height
-
-            # calculate width
-            # -  iw / ih = tw / th (keep aspect)
-            # => th ( iw / ih ) = tw
-            target_width = float(target_height) * aspect
-
-            if crop:
-                # calculate crop coords
-                # -  ( tw - w ) / 2
-                target_left = (float(target_width) - float(width)) / 2
-                target_left = int(round(target_left))
-                target_top = 0
-
-            # correct floating point error, and convert to int, round in the
-            # direction of the requested width
-            if width >= target_width:
-                target_width = int(math.ceil(target_width))
-            else:
-                target_width = int(math.floor(target_width))
-        else:
-            # image is wider than target, set width as maximum
-            target_width = width
-
-            # calculate height
-            # -  iw / ih = tw / th (keep aspect)
-            # => tw / ( iw / ih ) = th
-            target_height = float(target_width) / aspect
-
-            if crop:
-                # calculate crop coords
-                # -  ( th - h ) / 2
-                target_top = (float(target_height) - float(height)) / 2
-                target_top = int(round(target_top))
-                target_left = 0
-
-            # correct floating point error and convert to int
-            if height >= target_height:
-                target_height = int(math.ceil(target_height))
-            else:
-                target_height = int(math.floor(target_height))
 
-        # strip color profiles
-        b_image.strip()
+def _execute(image, specs):
+    """
+    Run _resize_many in this process or in the process pool, depending on
+    the SIMPLE_RESIZER_EXECUTOR setting.
+    """
+    # Plan the geometry before the decode
+    with metrics.timed("probe"):
+        info = probe(image)
 
-        # Resize
-        b_image.resize(target_width, target_height)
+    limits = get_limits()
 
-        if crop:
-            # Crop to target
-            b_image.crop(left=target_left, top=target_top, width=width,
-                         height=height)
+    if info is not None:
+        # Refuse decompression bombs before decoding
+        check_size((info.width, info.height), limits)
 
-        # Save to temporary file
-        temp_file = tempfile.TemporaryFile()
-        b_image.save(file=temp_file)
-        # Rewind the file
-        temp_file.seek(0)
-        return temp_file
+    in_pool = get_setting("EXECUTOR") == "process"
+    # Resource limits hold for the whole process, those of limited() only
+    # apply to the workers of the pool
+    check_resources(limits, in_pool and get_engine().applies_limits)
 
+    if in_pool:
+        return executor.resize_many(image, specs, info=info, limits=limits)
 
-def resize(image, width=None, height=None, crop=False):
+    return _resize_many(image, specs, info=info, limits=limits)
+
+
+def _resize(image, width, height, crop, output_format=None, profile=None):
     """
-    Resize an image and return the resized file.
+    Resize the image with respect to the aspect ratio
     """
-    # First normalize params to determine which file to get
-    width, height, crop = _normalize_params(image, width, height, crop)
+    return _execute(image, [(width, height, crop, output_format,
+                             profile)])[0]
 
-    try:
-        # Check the image file state for clean close
-        is_closed = image.closed
 
+@contextmanager
+def _opened(image):
+    """
+    Open the image if it is closed, and close it again afterwards.
+    """
+    # Check the image file state for clean close
+    is_closed = image.closed
+
+    try:
         if is_closed:
-            image.open()
+            with metrics.timed("open"):
+                image.open()
 
-        # Create the resized file
-        # Do resize and crop
-        resized_image = _resize(image, width, height, crop)
+        yield image
     finally:
         # Re-close if received a closed file
         if is_closed:
             image.close()
 
-    return ImageFile(resized_image)
+
+# pylint: disable=R0913
+def resize(image, width=None, height=None, crop=False, output_format=None,
+           profile=None):
+    """
+    Resize an image and return the resized file, encoded in output_format
+    or in the format of the source, with the encoder profile.
+    """
+    # First normalize params to determine which file to get
+    width, height, crop = _normalize_params(image, width, height, crop)
+    output_format = get_output_format(image, output_format)
+
+    with _opened(image):
+        # Create the resized file
+        # Do resize and crop
+        return _resize(image, width, height, crop, output_format,
+                       get_profile(profile))
+# pylint: enable=R0913
+
+
+def resize_many(image, specs):
+    """
+    Resize an image to many (width, height, crop, output_format, profile)
+    specs at once, of which the trailing values may be omitted. The image is
+    decoded only once.
+
+    Returns a dict of the resized files by spec.
+    """
+    specs = [tuple(spec) for spec in specs]
+    normalized = [
+        _normalize_params(image, *(spec + (False,))[:3]) +
+        (get_output_format(image, (spec + (None, None))[3]),
+         get_profile((spec + (None, None, None))[4]))
+        for spec in specs]
+
+    with _opened(image):
+        resized_images = _execute(image, normalized)
+
+    return dict(zip(specs, resized_images))
+
+
+def _save(storage, name, resized_image, replace=False):
+    """
+    Save a variant and return the name it was saved as. If replace, the file
+    of a previous version is deleted first, or the storage would save under
+    an alternative name and leave it behind.
+    """
+    with metrics.timed("save", bytes=resized_image.size):
+        if replace:
+            storage.delete(name)
+
+        return storage.save(name, resized_image)
 
 
 # pylint: disable=R0913
+def _generate(image, width, height, crop, namespace, storage, name,
+              output_format=None, profile=None, replace=False):
+    """
+    Resize, save and index a variant. Returns the name it was saved as.
+    """
+    resized_image = None
+    try:
+        resized_image = resize(image, width, height, crop, output_format,
+                               profile)
+        name = _save(storage, name, resized_image, replace)
+
+        index.record(image, width, height, crop, namespace, storage, name,
+                     resized_image, output_format, profile)
+    finally:
+        if resized_image is not None:
+            resized_image.close()
+
+    return name
+
+
+def _generate_once(image, width, height, crop, namespace, storage, name,
+                   force, stale, output_format=None, profile=None):
+    """
+    Generate a variant while holding its lock, unless an other caller did so
+    while waiting for the lock. Returns the name of the variant, or None if
+    the lock was not acquired in time.
+    """
+    with locks.locked(locks.get_key(storage, name)) as acquired:
+        if not acquired:
+            return None
+
+        if stale:
+            indexed_name = index.lookup(image, width, height, crop, namespace,
+                                        storage, output_format,
+                                        profile)[0]
+
+            if indexed_name is not None:
+                return indexed_name
+        elif not force and _exists(storage, name):
+            return name
+
+        return _generate(image, width, height, crop, namespace, storage,
+                         name, output_format, profile, force or stale)
+
+
+def _exists(storage, name):
+    """
+    Return whether a variant exists in the storage.
+    """
+    with metrics.timed("exists"):
+        return storage.exists(name)
+
+
+def _get_url(storage, name):
+    """
+    Return the url of a variant.
+    """
+    with metrics.timed("url"):
+        return storage.url(name)
+
+
+def _get_placeholder(image, storage, as_url):
+    """
+    Return what to serve while a variant is generated in the background.
+    """
+    if not as_url:
+        return image.name
+
+    placeholder = get_setting("ASYNC_PLACEHOLDER")
+
+    if placeholder is None:
+        return storage.url(image.name)
+
+    return placeholder
+
+
 def resize_lazy(image, width=None, height=None, crop=False, force=False,
                 namespace="resized", storage=default_storage,
-                as_url=False):
+                as_url=False, mode=None, output_format=None, accept=None,
+                profile=None):
     """
     Returns the name of the resized file. Returns the url if as_url is True
+
+    In "async" mode a missing variant is generated in the background, and the
+    source name or the placeholder url is returned meanwhile. Sources that
+    are neither in a storage nor in a local file, such as streams, are
+    resized right away. The mode defaults to the SIMPLE_RESIZER_MODE
+    setting.
+
+    The variant is encoded in output_format, "auto" picks the format with
+    the Accept header accept, None keeps the format of the source. profile
+    is the encoder profile, see simple_resizer.profiles.
     """
+    mode = mode or get_setting("MODE")
+
     # First normalize params to determine which file to get
     width, height, crop = _normalize_params(image, width, height, crop)
+    output_format = get_output_format(image, output_format, accept)
+    profile = get_profile(profile)
     # Fetch the name of the resized image so i can test it if exists
-    name = _get_resized_name(image, width, height, crop, namespace)
+    name = _get_resized_name(image, width, height, crop, namespace,
+                             output_format, profile)
 
     # Fetch storage if an image has a specific storage
     try:
@@ -187,20 +474,383 @@ def resize_lazy(image, width=None, height=None, crop=False, force=False,
     except AttributeError:
         pass
 
-    # Test if exists or force
-    if force or not storage.exists(name):
-        resized_image = None
-        try:
-            resized_image = resize(image, width, height, crop)
-            name = storage.save(name, resized_image)
-        finally:
-            if resized_image is not None:
-                resized_image.close()
+    cache_key = cache.get_cache_key(image, width, height, crop, namespace,
+                                    storage, output_format, profile)
+    entry = None if force else cache.get_variant(cache_key)
+
+    if cache_key is not None and not force:
+        metrics.count("cache_miss" if entry is None else "cache_hit")
+
+    if entry is not None:
+        # Resolved before, no need to ask the storage if it exists
+        name = entry["name"]
+
+        if not as_url:
+            return name
+
+        if entry["url"] is not None:
+            return entry["url"]
+    else:
+        indexed_name, stale = (None, False) if force else index.lookup(
+            image, width, height, crop, namespace, storage, output_format,
+            profile)
+
+        if indexed_name is not None:
+            name = indexed_name
+
+        # Test if exists or force, a stale variant is regenerated
+        elif force or stale or not _exists(storage, name):
+            if mode == "async" and workers.can_reopen(image):
+                workers.enqueue(image, width, height, crop, namespace,
+                                storage, force=force or stale,
+                                output_format=output_format, profile=profile)
+                return _get_placeholder(image, storage, as_url)
+
+            generated_name = _generate_once(image, width, height, crop,
+                                            namespace, storage, name, force,
+                                            stale, output_format, profile)
+
+            if generated_name is None:
+                # An other caller is still generating it
+                return _get_placeholder(image, storage, as_url)
+
+            name = generated_name
+        else:
+            # Generated before the index knew about it
+            index.record(image, width, height, crop, namespace, storage, name,
+                         output_format=output_format, profile=profile)
+
+    url = _get_url(storage, name) if as_url else None
+    cache.set_variant(cache_key, name, url)
 
     if as_url:
-        return storage.url(name)
+        return url
 
     return name
+
+
+def _find_existing(variants):
+    """
+    Return the variants that exist in their storage.
+
+    Lists every target directory once instead of testing each variant.
+    """
+    directories = {}
+    for variant in variants:
+        directory = os.path.dirname(variant["name"])
+        key = (id(variant["storage"]), directory)
+        directories.setdefault(key, []).append(variant)
+
+    existing = []
+    for (_, directory), group in directories.items():
+        storage = group[0]["storage"]
+
+        try:
+            with metrics.timed("exists", variants=len(group)):
+                filenames = set(storage.listdir(directory)[1])
+        except NotImplementedError:
+            existing.extend(variant for variant in group
+                            if _exists(storage, variant["name"]))
+            continue
+        except (OSError, IOError):
+            # The directory does not exist yet
+            continue
+
+        existing.extend(variant for variant in group
+                        if os.path.basename(variant["name"]) in filenames)
+
+    return existing
+
+
+def _get_variant_spec(variant):
+    """
+    Return the (image, width, height, crop, namespace, storage, format,
+    profile) of a variant.
+    """
+    return tuple(variant[key] for key in ("image", "width", "height", "crop",
+                                          "namespace", "storage", "format",
+                                          "profile"))
+
+
+def _generate_many(image, variants, force=False):
+    """
+    Resize, save and index many variants of an image with a single decode.
+    Returns the names they were saved as. Forced and stale variants replace
+    the existing ones.
+    """
+    keys = [(variant["width"], variant["height"], variant["crop"],
+             variant["format"], variant["profile"]) for variant in variants]
+    resized_images = resize_many(image, keys)
+    names = []
+    try:
+        for variant, key in zip(variants, keys):
+            resized_image = resized_images[key]
+            name = _save(variant["storage"], variant["name"], resized_image,
+                         force or variant.get("stale", False))
+            index.record(*_get_variant_spec(variant)[:6], name=name,
+                         resized_image=resized_image,
+                         output_format=variant["format"],
+                         profile=variant["profile"])
+            names.append(name)
+    finally:
+        for resized_image in resized_images.values():
+            resized_image.close()
+
+    return names
+
+
+def _generate_once_many(image, variants, force):
+    """
+    Like _generate_once for many variants of an image, generated with a
+    single decode. Returns the names, None for the variants of which the lock
+    was not acquired in time.
+    """
+    deadline = time.time() + get_setting("LOCK_TIMEOUT")
+    keys = [locks.get_key(variant["storage"], variant["name"])
+            for variant in variants]
+    acquired = set()
+    names = [None] * len(variants)
+
+    try:
+        # Always in the same order, so batches do not wait on each other
+        for key in sorted(set(keys)):
+            if locks.acquire(key, timeout=max(0, deadline - time.time())):
+                acquired.add(key)
+
+        held = [variant for variant, key in zip(variants, keys)
+                if key in acquired]
+
+        if not force:
+            # Generated by an other caller while waiting for the locks
+            stale = [variant for variant in held if variant.get("stale")]
+            for variant, (indexed_name, _) in zip(stale, index.lookup_many(
+                    [_get_variant_spec(variant) for variant in stale])):
+                if indexed_name is not None:
+                    variant["name"] = indexed_name
+                    variant["resolved"] = True
+
+            for variant in _find_existing([variant for variant in held
+                                           if not variant.get("stale")]):
+                variant["resolved"] = True
+
+        todo = [variant for variant in held if not variant["resolved"]]
+        if todo:
+            for variant, name in zip(todo, _generate_many(image, todo,
+                                                          force)):
+                variant["name"] = name
+                variant["resolved"] = True
+
+        for idx, variant in enumerate(variants):
+            if variant["resolved"]:
+                names[idx] = variant["name"]
+    finally:
+        for key in acquired:
+            locks.release(key)
+
+    return names
+
+
+def resize_lazy_many(items, force=False, storage=default_storage,
+                     as_url=False, mode=None, output_format=None,
+                     accept=None, profile=None):
+    """
+    Returns the names of many resized files at once, or the urls if as_url
+    is True, in the order of items.
+
+    Items are (image, width, height, crop, namespace, output_format,
+    profile) tuples, of which the trailing values may be omitted. Variants
+    are looked up in bulk and only the missing ones are generated, in the
+    background in "async" mode. They are encoded in output_format with
+    profile as in resize_lazy, unless their item says otherwise.
+    """
+    mode = mode or get_setting("MODE")
+
+    variants = []
+    for item in items:
+        (image, width, height, crop, namespace, item_format,
+         item_profile) = tuple(item) + (None, None, False, "resized",
+                                        output_format,
+                                        profile)[len(item) - 1:]
+        width, height, crop = _normalize_params(image, width, height, crop)
+        variant_format = get_output_format(image, item_format, accept)
+        variant_profile = get_profile(item_profile)
+        variant_storage = getattr(image, "storage", storage)
+        variants.append({
+            "image": image, "width": width, "height": height, "crop": crop,
+            "namespace": namespace, "storage": variant_storage,
+            "format": variant_format, "profile": variant_profile,
+            "name": _get_resized_name(image, width, height, crop, namespace,
+                                      variant_format, variant_profile),
+            "url": None, "resolved": False, "dirty": True,
+            "cache_key": cache.get_cache_key(image, width, height, crop,
+                                             namespace, variant_storage,
+                                             variant_format, variant_profile),
+        })
+
+    if not force:
+        entries = cache.get_variants([variant["cache_key"]
+                                      for variant in variants])
+        for variant, entry in zip(variants, entries):
+            if variant["cache_key"] is not None:
+                metrics.count("cache_miss" if entry is None else "cache_hit")
+
+            if entry is not None:
+                variant.update(name=entry["name"], url=entry["url"],
+                               resolved=True,
+                               dirty=as_url and entry["url"] is None)
+
+        pending = [variant for variant in variants if not variant["resolved"]]
+        lookups = index.lookup_many([_get_variant_spec(variant)
+                                     for variant in pending])
+        unindexed = []
+        for variant, (indexed_name, stale) in zip(pending, lookups):
+            if indexed_name is not None:
+                variant.update(name=indexed_name, resolved=True)
+            elif stale:
+                variant["stale"] = True
+            else:
+                unindexed.append(variant)
+
+        for variant in _find_existing(unindexed):
+            # Generated before the index knew about it
+            index.record(*_get_variant_spec(variant)[:6],
+                         name=variant["name"], output_format=variant["format"],
+                         profile=variant["profile"])
+            variant["resolved"] = True
+
+    # The same variant may be requested more than once
+    missing = {}
+    for variant in variants:
+        if variant["resolved"]:
+            continue
+
+        if mode == "async" and workers.can_reopen(variant["image"]):
+            workers.enqueue(*_get_variant_spec(variant)[:6], force=force,
+                            output_format=variant["format"],
+                            profile=variant["profile"])
+            variant.update(
+                name=variant["image"].name, dirty=False,
+                url=_get_placeholder(variant["image"], variant["storage"],
+                                     as_url) if as_url else None)
+            continue
+
+        key = (id(variant["storage"]), variant["name"])
+        missing.setdefault(key, variant)
+        variant["key"] = key
+
+    # Generate all variants of an image from a single decode
+    by_image = {}
+    for key, variant in missing.items():
+        by_image.setdefault(id(variant["image"]), []).append((key, variant))
+
+    generated = {}
+    for group in by_image.values():
+        generated.update(zip(
+            [key for key, _ in group],
+            _generate_once_many(group[0][1]["image"],
+                                [variant for _, variant in group], force)))
+
+    for variant in variants:
+        if "key" not in variant:
+            continue
+
+        if generated[variant["key"]] is None:
+            # An other caller is still generating it
+            variant.update(
+                name=variant["image"].name, dirty=False,
+                url=_get_placeholder(variant["image"], variant["storage"],
+                                     as_url) if as_url else None)
+        else:
+            variant["name"] = generated[variant["key"]]
+
+    if as_url:
+        for variant in variants:
+            if variant["url"] is None:
+                variant["url"] = _get_url(variant["storage"],
+                                          variant["name"])
+
+    cache.set_variants(dict(
+        (variant["cache_key"], (variant["name"], variant["url"]))
+        for variant in variants
+        if variant["dirty"] and variant["cache_key"] is not None))
+
+    if as_url:
+        return [variant["url"] for variant in variants]
+
+    return [variant["name"] for variant in variants]
+
+
+def _get_ratio(crop):
+    """
+    Return the aspect ratio of a crop given as a number or a "width:height"
+    string, None for no crop.
+    """
+    if not crop:
+        return None
+
+    if isinstance(crop, six.string_types):
+        width, _, height = crop.partition(":")
+        return float(width) / float(height or 1)
+
+    return float(crop)
+
+
+def _get_srcset_specs(size, widths, ratio):
+    """
+    Return the (width, height) of the variants of a srcset, leaving out the
+    ones larger than the source of size.
+    """
+    specs = []
+
+    for width in sorted(set(int(width) for width in widths)):
+        if ratio is None:
+            spec = get_spec_size(size, width, None)
+        else:
+            spec = (width, int(round(width / ratio)))
+
+        if spec[0] <= size[0] and spec[1] <= size[1]:
+            specs.append(spec)
+
+    if not specs:
+        # Smaller than every width, offered at its own size
+        if ratio is None:
+            specs.append(tuple(size))
+        elif float(size[0]) / size[1] > ratio:
+            specs.append((int(round(size[1] * ratio)), size[1]))
+        else:
+            specs.append((size[0], int(round(size[0] / ratio))))
+
+    return specs
+
+
+def resize_srcset(image, widths, crop=None, namespace="resized",
+                  storage=default_storage, mode=None, output_format=None,
+                  accept=None, profile=None):
+    """
+    Returns the srcset of image resized to many widths, as
+    "url 320w, url 640w".
+
+    crop is None to keep the aspect of the image, or the aspect ratio to
+    crop each width to. Widths larger than the image are left out. The
+    variants are resolved in one batch and the missing ones are generated
+    with a single decode, as with resize_lazy_many.
+    """
+    size = get_size(image)
+    ratio = _get_ratio(crop)
+    specs = _get_srcset_specs(size, widths, ratio)
+    urls = resize_lazy_many(
+        [(image, width, height, ratio is not None, namespace)
+         for width, height in specs], storage=storage, as_url=True,
+        mode=mode, output_format=output_format, accept=accept,
+        profile=profile)
+
+    # Without crop the fitted width may be a pixel narrower
+    widths = [width if ratio is not None else
+              get_target_geometry(size, width, height, False)[0]
+              for width, height in specs]
+
+    return ", ".join("%s %iw" % (url, width)
+                     for url, width in zip(urls, widths))
 # pylint: enable=R0913
 
 
@@ -0,0 +1,192 @@
+"""
+Cache of resolved variant names and urls
+
+Lets resize_lazy skip the storage calls for variants it resolved before.
+Enabled by setting SIMPLE_RESIZER_CACHE to the alias of one of the django
+caches, which also determines the eviction policy through its options.
+"""
+
+import hashlib
+
+from django.utils.encoding import force_bytes
+
+try:
+    from django.core.cache import caches
+except ImportError:  # Django < 1.7
+    from django.core.cache import get_cache
+else:
+    def get_cache(alias):
+        """
+        Return the cache for an alias.
+        """
+        return caches[alias]
+
+from .conf import get_setting
+from .profiles import get_token
+from .sources import get_source_version
+from .sources import get_storage_key
+
+
+def _get_cache():
+    """
+    Return the configured cache or None when caching is disabled.
+    """
+    alias = get_setting("CACHE")
+
+    if alias is None:
+        return None
+
+    return get_cache(alias)
+
+
+# pylint: disable=R0913
+def get_cache_key(image, width, height, crop, namespace, storage,
+                  output_format=None, profile=None):
+    """
+    Return the cache key of a variant, or None when caching is disabled.
+    """
+    if get_setting("CACHE") is None:
+        return None
+
+    return _make_key(get_storage_key(storage), image.name, width, height,
+                     crop, namespace, get_source_version(image),
+                     output_format, get_token(profile))
+
+
+def get_indexed_key(variant):
+    """
+    Return the cache key a variant of the index was resolved by, or None
+    when caching is disabled.
+    """
+    if get_setting("CACHE") is None:
+        return None
+
+    return _make_key(variant.storage, variant.source_name, variant.width,
+                     variant.height, variant.crop, variant.namespace,
+                     variant.source_version, variant.format, variant.profile)
+
+
+def _make_key(storage_key, source_name, width, height, crop, namespace,
+              source_version, output_format, token):
+    """
+    Return the cache key of a variant from the fields of its spec.
+    """
+    key = "|".join((
+        storage_key, source_name, "%ix%i" % (width, height),
+        "cropped" if crop else "", namespace, source_version))
+
+    if output_format:
+        key += "|%s" % output_format
+
+    if token:
+        # Empty for the default profile
+        key += "|profile:%s" % token
+
+    return "%s:%s" % (get_setting("CACHE_PREFIX"),
+                      hashlib.md5(force_bytes(key)).hexdigest())
+# pylint: enable=R0913
+
+
+def get_variant(key):
+    """
+    Return the cached {"name": ..., "url": ...} entry of a variant or None.
+    """
+    if key is None:
+        return None
+
+    return _get_cache().get(key)
+
+
+def get_variants(keys):
+    """
+    Return the cached entries for many keys at once, None for misses.
+    """
+    if get_setting("CACHE") is None:
+        return [None] * len(keys)
+
+    entries = _get_cache().get_many([key for key in keys if key is not None])
+    return [entries.get(key) for key in keys]
+
+
+def set_variant(key, name, url=None):
+    """
+    Cache the name and optionally the url of a variant.
+    """
+    if key is None:
+        return
+
+    set_variants({key: (name, url)})
+
+
+def set_variants(variants):
+    """
+    Cache many variants at once from a {key: (name, url)} dict.
+    """
+    if get_setting("CACHE") is None or not variants:
+        return
+
+    entries = dict((key, {"name": name, "url": url})
+                   for key, (name, url) in variants.items())
+    timeout = get_setting("CACHE_TIMEOUT")
+
+    if timeout is None:
+        _get_cache().set_many(entries)
+    else:
+        _get_cache().set_many(entries, timeout)
+
+
+def delete_variant(key):
+    """
+    Forget a variant.
+    """
+    if key is None:
+        return
+
+    _get_cache().delete(key)
+
+
+def delete_variants(keys):
+    """
+    Forget many variants at once.
+    """
+    if get_setting("CACHE") is None or not keys:
+        return
+
+    _get_cache().delete_many(keys)
+
+
+def get_source_key(key):
+    """
+    Return the cache key of a value memoized for a source, or None when
+    caching is disabled.
+    """
+    if get_setting("CACHE") is None:
+        return None
+
+    return "%s_source:%s" % (get_setting("CACHE_PREFIX"),
+                             hashlib.md5(force_bytes(key)).hexdigest())
+
+
+def get_source_value(key):
+    """
+    Return a cached source value or None.
+    """
+    if key is None:
+        return None
+
+    return _get_cache().get(key)
+
+
+def set_source_value(key, value):
+    """
+    Cache a source value.
+    """
+    if key is None:
+        return
+
+    timeout = get_setting("CACHE_TIMEOUT")
+
+    if timeout is None:
+        _get_cache().set(key, value)
+    else:
+        _get_cache().set(key, value, timeout)
@@ -0,0 +1,125 @@
+"""
+App settings and their defaults
+
+Every setting can be overridden in the django settings module by prefixing
+its name with ``SIMPLE_RESIZER_``.
+"""
+
+from django.conf import settings
+
+DEFAULTS = {
+    # Dotted path to the engine class that does the actual image work
+    "ENGINE": "simple_resizer.engines.wand_engine.WandEngine",
+    # Formats "auto" picks from, in order of preference, if the client
+    # accepts them, by source format or for all sources
+    "AUTO_FORMATS": {
+        # Photos, avif is the smallest
+        "jpeg": ("avif", "webp"),
+        # Graphics and alpha, avif smears their edges
+        "png": ("webp",),
+        # Encoders only keep the first frame of an animation
+        "gif": (),
+        "default": ("avif", "webp"),
+    },
+    # Encoder options by output format, see simple_resizer.profiles
+    "ENCODING": {
+        "jpeg": {"quality": 85, "progressive": True, "sampling": "4:2:0",
+                 "optimize": True},
+        "png": {"compress_level": 9, "optimize": True},
+        "webp": {"quality": 80},
+        "avif": {"quality": 60},
+    },
+    # Named encoder profiles, options by output format merged over ENCODING.
+    # The name ends up in the variant name.
+    "PROFILES": {},
+    # Limits of a resize, see simple_resizer.limits, None for no limit
+    "LIMITS": {
+        "pixels": 100 * 1000 * 1000,
+        "width": None,
+        "height": None,
+        "time": None,
+        "memory": None,
+        "map": None,
+        "disk": None,
+        "area": None,
+        "threads": None,
+    },
+    # Dotted paths to the sinks of the stage measurements, see
+    # simple_resizer.metrics
+    "METRICS_SINKS": (),
+    "METRICS_PREFIX": "simple_resizer",
+    # Address of the statsd daemon of the statsd sink
+    "STATSD_HOST": "127.0.0.1",
+    "STATSD_PORT": 8125,
+    # Pixels on the longest side of a data uri placeholder, its jpeg quality
+    # and the radius in pixels of its blur, 0 for none
+    "PLACEHOLDER_SIZE": 16,
+    "PLACEHOLDER_QUALITY": 40,
+    "PLACEHOLDER_BLUR": 1,
+    # Bytes of an encoded image kept in memory before spilling to disk
+    "OUTPUT_SPOOL_SIZE": 1024 * 1024,
+    # None resizes in the calling thread, "process" in a process pool
+    "EXECUTOR": None,
+    # Number of worker processes, None for one per core
+    "POOL_PROCESSES": None,
+    # Resizes in flight in the pool before callers block
+    "POOL_QUEUE_SIZE": 16,
+    # Seconds to wait for the pool to resize when no time limit is set,
+    # after which the pool is restarted
+    "POOL_TIMEOUT": 300,
+    # Directory for the files exchanged with the pool, None for /dev/shm if
+    # available, otherwise the system default
+    "POOL_TEMP_DIR": None,
+    # Alias of the django cache for resolved variants, None disables caching
+    "CACHE": None,
+    # Seconds a resolved variant is cached, None means the cache default
+    "CACHE_TIMEOUT": None,
+    "CACHE_PREFIX": "simple_resizer",
+    # Dotted path to a callable returning a marker of the source version
+    "SOURCE_VERSION": "simple_resizer.sources.get_file_version",
+    # Seconds the version of a source in a storage without local paths is
+    # remembered, 0 asks the storage on every lookup
+    "REMOTE_VERSION_TIMEOUT": 60,
+    # "plain" names variants after their source, "versioned" adds a token
+    # that changes with the source, so replaced sources get new urls
+    "NAMING": "plain",
+    # What the token is derived from: "digest" or "version"
+    "NAMING_TOKEN": "digest",
+    "NAMING_TOKEN_LENGTH": 8,
+    # Bytes read from a source to learn its size and orientation, and the
+    # most to read if its header turns out to be larger
+    "PROBE_BYTES": 64 * 1024,
+    "PROBE_MAX_BYTES": 1024 * 1024,
+    # Keep track of the generated variants in the database
+    "INDEX": False,
+    # "sync" resizes missing variants on the spot, "async" in the background
+    "MODE": "sync",
+    # Url served while generating in the background, None serves the source
+    "ASYNC_PLACEHOLDER": None,
+    "ASYNC_WORKERS": 2,
+    # Variants requested beyond this many pending ones are dropped
+    "ASYNC_QUEUE_SIZE": 100,
+    # How concurrent generations of a variant are prevented across processes:
+    # "cache", "file" or None to only prevent them within a process
+    "LOCK": None,
+    # Alias of the django cache used by the "cache" lock, must be shared by
+    # all processes
+    "LOCK_CACHE": "default",
+    # Directory of the "file" lock files, None for the system default
+    "LOCK_DIR": None,
+    # Seconds to wait for an other caller to generate a variant
+    "LOCK_TIMEOUT": 10,
+    # Seconds after which a lock of a crashed process is considered released
+    "LOCK_EXPIRE": 60,
+    # Storage class the resize view reads sources from and saves variants to
+    "VIEW_STORAGE": None,
+    # Seconds clients and proxies may cache a variant served by the view
+    "VIEW_MAX_AGE": 60 * 60 * 24 * 365,
+}
+
+
+def get_setting(name):
+    """
+    Return the SIMPLE_RESIZER_<name> setting, or its default when not set.
+    """
+    return getattr(settings, "SIMPLE_RESIZER_%s" % name, DEFAULTS[name])
@@ -0,0 +1,134 @@
+"""
+Resize engines
+
+An engine wraps an imaging library and exposes the handful of operations the
+resizer needs: decode, orient, strip, resize, crop, blur and encode, and tells
+which formats it can encode. The engine in
+use is selected by the SIMPLE_RESIZER_ENGINE setting.
+"""
+
+from ..conf import get_setting
+from ..limits import get_resources
+from ..utils import import_attribute
+
+
+_ENGINES = {}
+
+
+class BaseEngine(object):
+    """
+    The interface every engine must implement.
+
+    Engines operate on a native image object of the underlying library.
+    Operations return the image to continue with, which may be the same
+    object modified in place or a new one.
+    """
+    def decode(self, image, ext, size=None, orientation=None):
+        """
+        Decode image, a file like object or the path of a local file, with
+        ext as format hint.
+
+        If size is given, it is the (width, height) the oriented image will be
+        resized to cover. Engines may then decode at a lower scale, as long as
+        the decoded image still covers it. The exif orientation is given if
+        known up front.
+        """
+        raise NotImplementedError
+
+    def get_size(self, b_image):
+        """
+        Return a (width, height) tuple.
+        """
+        raise NotImplementedError
+
+    def clone(self, b_image):
+        """
+        Return an independent copy of the image.
+        """
+        raise NotImplementedError
+
+    def orient(self, b_image):
+        """
+        Apply the exif orientation to the pixels.
+        """
+        raise NotImplementedError
+
+    def strip(self, b_image):
+        """
+        Strip profiles and comments.
+        """
+        raise NotImplementedError
+
+    def resize(self, b_image, width, height):
+        """
+        Resize to exactly width x height.
+        """
+        raise NotImplementedError
+
+    # pylint: disable=R0913
+    def crop(self, b_image, left, top, width, height):
+        """
+        Crop a width x height box with its top left corner at left, top.
+        """
+        raise NotImplementedError
+    # pylint: enable=R0913
+
+    def blur(self, b_image, radius):
+        """
+        Apply a gaussian blur of radius pixels.
+        """
+        raise NotImplementedError
+
+    def encode(self, b_image, output, ext, options=None):
+        """
+        Write the image to the file like object output in the format of ext,
+        with the encoder options of simple_resizer.profiles.
+        """
+        raise NotImplementedError
+
+    def supports(self, output_format):
+        """
+        Return whether images can be encoded in a format of
+        simple_resizer.formats.
+        """
+        raise NotImplementedError
+
+    def close(self, b_image):
+        """
+        Release the resources held by the image.
+        """
+        raise NotImplementedError
+
+    # Whether set_limits applies the resource limits
+    applies_limits = False
+
+    def set_limits(self, resources):
+        """
+        Apply the resource limits of simple_resizer.limits to the process and
+        return the ones they replaced. Engines without resource limits
+        ignore them.
+        """
+        return {}
+
+
+def load_engine(path):
+    """
+    Return an engine instance for a dotted class path. Instances are shared,
+    the resource limits of the settings are applied when one is created.
+    """
+    try:
+        return _ENGINES[path]
+    except KeyError:
+        pass
+
+    engine = import_attribute(path)()
+    engine.set_limits(get_resources(get_setting("LIMITS")))
+    _ENGINES[path] = engine
+    return engine
+
+
+def get_engine():
+    """
+    Return the engine configured in the settings.
+    """
+    return load_engine(get_setting("ENGINE"))
@@ -0,0 +1,201 @@
+"""
+Pillow engine
+
+Considerably faster than ImageMagick for jpeg sources since large downscales
+are first reduced by an integer factor before the final resample.
+"""
+
+from PIL import Image
+from PIL import ImageFilter
+
+from . import BaseEngine
+
+
+EXIF_ORIENTATION = 0x0112
+
+# The transpose operations to apply for each exif orientation
+ORIENTATION_TRANSPOSES = {
+    2: (Image.FLIP_LEFT_RIGHT,),
+    3: (Image.ROTATE_180,),
+    4: (Image.FLIP_TOP_BOTTOM,),
+    5: (Image.ROTATE_90, Image.FLIP_TOP_BOTTOM),
+    6: (Image.ROTATE_270,),
+    7: (Image.ROTATE_270, Image.FLIP_TOP_BOTTOM),
+    8: (Image.ROTATE_90,),
+}
+
+RESAMPLE = getattr(Image, "LANCZOS", getattr(Image, "ANTIALIAS", None))
+
+# Reduce until the image is at most this many times the target size
+REDUCING_GAP = 2
+
+QUANTIZE_FAST_OCTREE = 2
+
+# The (option, save parameter) pairs pillow supports by format
+ENCODER_PARAMS = {
+    "JPEG": (("quality", "quality"), ("progressive", "progressive"),
+             ("sampling", "subsampling"), ("optimize", "optimize")),
+    "PNG": (("compress_level", "compress_level"), ("optimize", "optimize")),
+    "WEBP": (("quality", "quality"),),
+    "AVIF": (("quality", "quality"),),
+}
+
+
+def get_orientation(b_image):
+    """
+    Return the exif orientation of the image, 1 when unknown.
+    """
+    try:
+        if hasattr(b_image, "getexif"):
+            exif = b_image.getexif()
+        else:
+            exif = b_image._getexif()  # pylint: disable=W0212
+    except (AttributeError, KeyError, IndexError, SyntaxError, ValueError,
+            TypeError, IOError):
+        return 1
+
+    if not exif:
+        return 1
+
+    return exif.get(EXIF_ORIENTATION, 1)
+
+
+def get_format(ext):
+    """
+    Return the pillow format name for an extension.
+    """
+    Image.init()
+    try:
+        return Image.EXTENSION["." + ext.lower()]
+    except KeyError:
+        raise ValueError("Unsupported image format %r." % ext)
+
+
+class PillowEngine(BaseEngine):
+    """
+    Does the image work with Pillow.
+    """
+    def decode(self, image, ext, size=None, orientation=None):
+        """
+        Open the image, pixels are loaded on first use.
+
+        Jpeg images are drafted to the smallest dct scale that still covers
+        size.
+        """
+        b_image = Image.open(image)
+
+        if size is not None and b_image.format == "JPEG":
+            if orientation is None:
+                orientation = get_orientation(b_image)
+
+            if orientation > 4:
+                # Rotated by 90 degrees, the hint is for the oriented image
+                size = (size[1], size[0])
+
+            b_image.draft(b_image.mode, size)
+
+        return b_image
+
+    def get_size(self, b_image):
+        """
+        Return the image size.
+        """
+        return b_image.size
+
+    def clone(self, b_image):
+        """
+        Return a copy of the image.
+        """
+        return b_image.copy()
+
+    def orient(self, b_image):
+        """
+        Transpose according to the exif orientation.
+        """
+        for method in ORIENTATION_TRANSPOSES.get(get_orientation(b_image),
+                                                 ()):
+            b_image = b_image.transpose(method)
+
+        return b_image
+
+    def strip(self, b_image):
+        """
+        Drop everything that would be written along with the pixels.
+        """
+        for key in ("icc_profile", "exif", "comment"):
+            b_image.info.pop(key, None)
+
+        return b_image
+
+    def resize(self, b_image, width, height):
+        """
+        Reduce by an integer factor if possible, then resample.
+        """
+        if b_image.mode not in ("L", "LA", "RGB", "RGBA"):
+            if "transparency" in b_image.info:
+                b_image = b_image.convert("RGBA")
+            else:
+                b_image = b_image.convert("RGB")
+
+        factor = min(b_image.size[0] // (width * REDUCING_GAP),
+                     b_image.size[1] // (height * REDUCING_GAP))
+
+        if factor > 1 and hasattr(b_image, "reduce"):
+            b_image = b_image.reduce(factor)
+
+        return b_image.resize((width, height), RESAMPLE)
+
+    # pylint: disable=R0913
+    def crop(self, b_image, left, top, width, height):
+        """
+        Crop to the box.
+        """
+        return b_image.crop((left, top, left + width, top + height))
+    # pylint: enable=R0913
+
+    def blur(self, b_image, radius):
+        """
+        Blur with a gaussian filter.
+        """
+        return b_image.filter(ImageFilter.GaussianBlur(radius))
+
+    def encode(self, b_image, output, ext, options=None):
+        """
+        Save in the format matching the extension.
+        """
+        options = options or {}
+        pil_format = get_format(ext)
+        params = {}
+
+        if pil_format == "JPEG" and b_image.mode not in ("L", "RGB"):
+            b_image = b_image.convert("RGB")
+
+        if pil_format in ("PNG", "GIF") and options.get("colors"):
+            if b_image.mode not in ("RGB", "RGBA"):
+                b_image = b_image.convert("RGBA")
+
+            # Only the fast octree method quantizes transparent images
+            b_image = b_image.quantize(
+                options["colors"],
+                method=QUANTIZE_FAST_OCTREE if b_image.mode == "RGBA"
+                else None)
+
+        for option, param in ENCODER_PARAMS.get(pil_format, ()):
+            if option in options:
+                params[param] = options[option]
+
+        b_image.save(output, format=pil_format, **params)
+
+    def supports(self, output_format):
+        """
+        Return whether pillow has an encoder for the format.
+        """
+        Image.init()
+        return output_format.upper() in Image.SAVE
+
+    def close(self, b_image):
+        """
+        Close the file of an image decoded from a path. The pixels are freed
+        by the garbage collector.
+        """
+        b_image.close()
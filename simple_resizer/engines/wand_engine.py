@@ -0,0 +1,231 @@
+"""
+ImageMagick engine through Wand
+"""
+
+import ctypes
+import shutil
+import tempfile
+
+from django.utils import six
+from wand.api import library
+from wand.compat import binary
+from wand.image import Image
+from wand.version import formats
+
+from . import BaseEngine
+
+
+JPEG_EXTENSIONS = ("jpg", "jpeg", "jpe")
+
+# Bytes copied at a time when spooling a stream to disk
+CHUNK_SIZE = 64 * 1024
+
+# Whether ImageMagick has a coder for a format, by format
+_SUPPORTED = {}
+
+PLANE_INTERLACE = 3
+
+# Called through the library, but not declared by Wand 0.4.1. Without
+# argtypes ctypes would pass the wand pointer as a C int.
+library.MagickSetInterlaceScheme.argtypes = [ctypes.c_void_p, ctypes.c_int]
+library.MagickSetInterlaceScheme.restype = ctypes.c_int
+library.MagickQuantizeImage.argtypes = [
+    ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_size_t,
+    ctypes.c_int, ctypes.c_int]
+library.MagickQuantizeImage.restype = ctypes.c_int
+
+# The ResourceType of the limits in ImageMagick 6, which Wand 0.4.1 is
+# bound to
+RESOURCES = {
+    "area": 1,
+    "disk": 2,
+    "map": 4,
+    "memory": 5,
+    "threads": 6,
+}
+
+# Wand 0.4.1 has no api for resource limits
+if hasattr(library, "MagickSetResourceLimit"):
+    library.MagickSetResourceLimit.argtypes = [ctypes.c_int,
+                                               ctypes.c_ulonglong]
+    library.MagickSetResourceLimit.restype = ctypes.c_int
+    library.MagickGetResourceLimit.argtypes = [ctypes.c_int]
+    library.MagickGetResourceLimit.restype = ctypes.c_ulonglong
+    HAS_RESOURCE_LIMITS = True
+else:
+    HAS_RESOURCE_LIMITS = False
+
+
+def _set_option(b_image, key, value):
+    """
+    Set an ImageMagick option on the wand of b_image. Image.options only
+    accepts a few keys, so it is set through the library.
+    """
+    library.MagickSetOption(b_image.wand, binary(key), binary(value))
+
+
+def _read(b_image, image):
+    """
+    Read image into b_image. Wand reads a file object into memory as a whole
+    before handing it over, so streams are copied to disk in chunks and read
+    from there.
+    """
+    if isinstance(image, six.string_types):
+        if not image.endswith("]"):
+            b_image.read(filename=image)
+            return
+
+        # A trailing [...] would be taken for a frame selection
+        with open(image, "rb") as source:
+            _read(b_image, source)
+            return
+
+    with tempfile.NamedTemporaryFile() as spool:
+        shutil.copyfileobj(image, spool, CHUNK_SIZE)
+        spool.flush()
+        b_image.read(filename=spool.name)
+
+
+class WandEngine(BaseEngine):
+    """
+    Does the image work with ImageMagick.
+    """
+    applies_limits = HAS_RESOURCE_LIMITS
+
+    def decode(self, image, ext, size=None, orientation=None):
+        """
+        Read the image through ImageMagick.
+
+        Jpeg images are decoded at the smallest dct scale that still covers
+        size.
+        """
+        b_image = Image()
+        try:
+            if size is not None and ext.lower() in JPEG_EXTENSIONS:
+                if orientation is None:
+                    # The hint must cover size both ways
+                    size = (max(size), max(size))
+                elif orientation > 4:
+                    # Rotated by 90 degrees, the hint is for the oriented
+                    # image
+                    size = (size[1], size[0])
+
+                _set_option(b_image, "jpeg:size", "%ix%i" % size)
+
+            _read(b_image, image)
+        except Exception:
+            b_image.destroy()
+            raise
+
+        return b_image
+
+    def get_size(self, b_image):
+        """
+        Return the image size.
+        """
+        return (b_image.width, b_image.height)
+
+    def clone(self, b_image):
+        """
+        Return a copy of the image.
+        """
+        return b_image.clone()
+
+    def orient(self, b_image):
+        """
+        Auto orient in place.
+        """
+        b_image.auto_orient()
+        return b_image
+
+    def strip(self, b_image):
+        """
+        Strip color profiles and comments.
+        """
+        b_image.strip()
+        return b_image
+
+    def resize(self, b_image, width, height):
+        """
+        Resize in place.
+        """
+        b_image.resize(width, height)
+        return b_image
+
+    # pylint: disable=R0913
+    def crop(self, b_image, left, top, width, height):
+        """
+        Crop in place.
+        """
+        b_image.crop(left=left, top=top, width=width, height=height)
+        return b_image
+    # pylint: enable=R0913
+
+    def blur(self, b_image, radius):
+        """
+        Blur in place, ImageMagick picks the kernel size for the sigma.
+        """
+        b_image.gaussian_blur(0, radius)
+        return b_image
+
+    def encode(self, b_image, output, ext, options=None):
+        """
+        Save in the format of the extension.
+        """
+        options = options or {}
+        b_image.format = ext
+
+        if "quality" in options:
+            b_image.compression_quality = options["quality"]
+
+        if options.get("progressive"):
+            # Wand has no api for the interlace scheme
+            library.MagickSetInterlaceScheme(b_image.wand, PLANE_INTERLACE)
+
+        if "sampling" in options:
+            b_image.options["jpeg:sampling-factor"] = options["sampling"]
+
+        if "compress_level" in options:
+            _set_option(b_image, "png:compression-level",
+                        str(options["compress_level"]))
+
+        if "filter" in options:
+            _set_option(b_image, "png:compression-filter",
+                        str(options["filter"]))
+
+        if options.get("colors"):
+            # Colors, colorspace, tree depth, dither and measure error
+            library.MagickQuantizeImage(b_image.wand, options["colors"], 0,
+                                        0, 0, 0)
+
+        b_image.save(file=output)
+
+    def supports(self, output_format):
+        """
+        Return whether ImageMagick was built with a coder for the format.
+        """
+        if output_format not in _SUPPORTED:
+            _SUPPORTED[output_format] = bool(formats(output_format.upper()))
+
+        return _SUPPORTED[output_format]
+
+    def close(self, b_image):
+        """
+        Free the magick wand.
+        """
+        b_image.destroy()
+
+    def set_limits(self, resources):
+        """
+        Set the ImageMagick resource limits, if the library exports them.
+        """
+        previous = {}
+
+        if not HAS_RESOURCE_LIMITS:
+            return previous
+
+        for key, value in resources.items():
+            previous[key] = library.MagickGetResourceLimit(RESOURCES[key])
+            library.MagickSetResourceLimit(RESOURCES[key], value)
+
+        return previous
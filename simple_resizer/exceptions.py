@@ -0,0 +1,25 @@
+"""
+Exceptions raised by the resizer
+"""
+
+
+class LimitExceeded(Exception):
+    """
+    Resizing a source would exceed a limit of simple_resizer.limits.
+    """
+    pass
+
+
+class ImageTooLarge(LimitExceeded, ValueError):
+    """
+    The source has more pixels than allowed, it is refused before it is
+    decoded.
+    """
+    pass
+
+
+class ResizeTimeout(LimitExceeded):
+    """
+    Resizing took longer than allowed.
+    """
+    pass
@@ -0,0 +1,181 @@
+"""
+Resizing in a pool of worker processes
+
+Lets a single web process spread resizes over all cores. The source and the
+results are passed through files instead of being pickled: local sources
+are read in place, others and the results go through temporary files, memory
+backed if possible. The number of resizes in flight is bounded, callers block
+until a slot is free.
+
+Callers wait for their resize as long as the time limit allows, or
+SIMPLE_RESIZER_POOL_TIMEOUT seconds without one. A pool that does not
+answer in time, for example because a worker died, is restarted and
+ResizeTimeout is raised.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import multiprocessing
+
+from django.core.files import File
+
+from .conf import get_setting
+from .exceptions import ResizeTimeout
+from .files import ResizedImageFile
+from .limits import get_limits
+from .limits import get_resources
+from .sources import get_source_path
+
+
+_POOL = []
+_SLOTS = []
+_LOCK = threading.Lock()
+
+
+def _get_pool():
+    """
+    Return the (pool, slots) tuple, created on first use.
+    """
+    with _LOCK:
+        if not _POOL:
+            _POOL.append(multiprocessing.Pool(get_setting("POOL_PROCESSES")))
+
+        if not _SLOTS:
+            _SLOTS.append(threading.BoundedSemaphore(
+                get_setting("POOL_QUEUE_SIZE")))
+
+    return _POOL[0], _SLOTS[0]
+
+
+def _restart_pool(pool):
+    """
+    Terminate the pool, unless an other caller replaced it already. The
+    next caller creates a new one.
+    """
+    with _LOCK:
+        if not _POOL or _POOL[0] is not pool:
+            return
+
+        del _POOL[:]
+
+    pool.terminate()
+
+
+def _apply(args, limits):
+    """
+    Run _work in the pool, restarting it if it does not answer in time.
+    """
+    pool = _get_pool()[0]
+
+    try:
+        result = pool.apply_async(_work, args)
+    except ValueError:
+        # Terminated by an other caller in the meantime
+        _restart_pool(pool)
+        pool = _get_pool()[0]
+        result = pool.apply_async(_work, args)
+
+    timeout = limits.get("time")
+    if timeout is None:
+        timeout = get_setting("POOL_TIMEOUT")
+
+    try:
+        return result.get(timeout)
+    except multiprocessing.TimeoutError:
+        # The worker is stuck or died, only a new pool frees its slot
+        _restart_pool(pool)
+        raise ResizeTimeout("The process pool did not resize within %s "
+                            "seconds and was restarted." % timeout)
+
+
+def _get_temp_dir():
+    """
+    Return the directory for the exchanged files, memory backed if possible.
+    """
+    temp_dir = get_setting("POOL_TEMP_DIR")
+
+    if temp_dir is None and os.path.isdir("/dev/shm"):
+        return "/dev/shm"
+
+    return temp_dir
+
+
+# pylint: disable=R0913
+def _work(source_path, name, specs, engine_path, temp_dir, info, limits):
+    """
+    Resize a copied source file, runs in a worker process. Returns the
+    (path, width, height) of the resized files.
+    """
+    # Imported here, the package imports this module
+    from . import _resize_many
+    from .engines import load_engine
+
+    engine = load_engine(engine_path)
+    # A worker does one resize at a time, so the process wide resource
+    # limits can be set for it
+    previous = engine.set_limits(get_resources(limits))
+
+    try:
+        # The engine decodes straight from the path of the source file
+        with open(source_path, "rb") as source_file:
+            temp_files = _resize_many(File(source_file, name=name), specs,
+                                      engine=engine, info=info,
+                                      limits=limits)
+    finally:
+        engine.set_limits(previous)
+
+    results = []
+    for temp_file in temp_files:
+        handle, path = tempfile.mkstemp(dir=temp_dir)
+        with os.fdopen(handle, "wb") as output:
+            shutil.copyfileobj(temp_file, output)
+
+        temp_file.close()
+        results.append((path, temp_file.width, temp_file.height))
+
+    return results
+# pylint: enable=R0913
+
+
+def resize_many(image, specs, info=None, limits=None):
+    """
+    Resize the image to every (width, height, crop) spec in a worker
+    process, info is its probe.ImageInfo if known. limits default to those
+    of the calling thread. Returns a ResizedImageFile for each spec.
+    """
+    limits = get_limits() if limits is None else limits
+    slots = _get_pool()[1]
+    temp_dir = _get_temp_dir()
+
+    # Local sources are read by the worker in place
+    source_path = get_source_path(image)
+    copied = source_path is None
+
+    if copied:
+        handle, source_path = tempfile.mkstemp(dir=temp_dir)
+
+    try:
+        if copied:
+            with os.fdopen(handle, "wb") as source_copy:
+                for chunk in image.chunks():
+                    source_copy.write(chunk)
+
+        with slots:
+            outputs = _apply((source_path, image.name, specs,
+                              get_setting("ENGINE"), temp_dir, info,
+                              limits), limits)
+    finally:
+        if copied:
+            os.remove(source_path)
+
+    results = []
+    for path, width, height in outputs:
+        # Unlinked files stay readable while open
+        output = open(path, "rb")
+        results.append(ResizedImageFile(output, width, height,
+                                        os.fstat(output.fileno()).st_size))
+        os.remove(path)
+
+    return results
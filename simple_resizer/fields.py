@@ -0,0 +1,134 @@
+"""
+Model fields that generate their variants on upload
+
+    class Photo(models.Model):
+        image = ResizedImageField(upload_to="photos", variants=(
+            (300, 200),
+            (600, 600, True),
+            {"width": 1200, "output_format": "auto"},
+        ))
+
+Variants are given as the arguments of resize_lazy after the image, as a
+(width, height, crop, namespace, output_format, profile) tuple of which the
+trailing values may be omitted, or as a dict of them. The "auto" format
+generates the source format and every automatic format the engine supports.
+
+When a file is uploaded, all variants are generated from a single decode
+once the transaction commits, or right away on versions of Django without
+transaction.on_commit. They are recorded in the index and the cache, so
+rendering them later does not touch the storage.
+"""
+
+import logging
+
+from django.db import models
+from django.db import transaction
+
+from . import resize_lazy_many
+from .engines import get_engine
+from .formats import get_auto_formats
+from .formats import get_format
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+VARIANT_DEFAULTS = (
+    ("width", None),
+    ("height", None),
+    ("crop", False),
+    ("namespace", "resized"),
+    ("output_format", None),
+    ("profile", None),
+)
+
+
+def _on_commit(func):
+    """
+    Call func once the current transaction commits, or now if unsupported.
+    """
+    on_commit = getattr(transaction, "on_commit", None)
+
+    if on_commit is None:
+        func()
+    else:
+        on_commit(func)
+
+
+class ResizedImageField(models.ImageField):
+    """
+    An image field that generates the declared variants of uploaded files
+    """
+    def __init__(self, *args, **kwargs):
+        # Not passed to the parent, so variants do not end up in migrations
+        self.variants = tuple(kwargs.pop("variants", ()))
+        super(ResizedImageField, self).__init__(*args, **kwargs)
+
+    def get_items(self, fieldfile):
+        """
+        Return the resize_lazy_many items of the variants of a file.
+        """
+        items = []
+
+        for variant in self.variants:
+            if isinstance(variant, dict):
+                variant = tuple(variant.get(key, default)
+                                for key, default in VARIANT_DEFAULTS)
+            else:
+                variant = tuple(variant) + tuple(
+                    default for _, default in VARIANT_DEFAULTS)[len(variant):]
+
+            width, height, crop, namespace, output_format, profile = variant
+            output_formats = [output_format]
+
+            if output_format == "auto":
+                engine = get_engine()
+                output_formats = [None] + [
+                    candidate for candidate in get_auto_formats(
+                        get_format(fieldfile.name))
+                    if engine.supports(candidate)]
+
+            items.extend((fieldfile, width, height, crop, namespace,
+                          variant_format, profile)
+                         for variant_format in output_formats)
+
+        return items
+
+    def generate(self, fieldfile, force=False):
+        """
+        Generate the missing variants of a file with a single decode.
+        Returns their names.
+        """
+        return resize_lazy_many(self.get_items(fieldfile), force=force,
+                                storage=fieldfile.storage, mode="sync")
+
+    def _generate_after_save(self, instance):
+        """
+        Generate the variants of the file of a saved instance, without
+        failing the save.
+        """
+        fieldfile = getattr(instance, self.attname)
+
+        if not fieldfile:
+            return
+
+        try:
+            self.generate(fieldfile)
+        except Exception:  # pylint: disable=W0703
+            logger.exception("Generating variants of %s failed.",
+                             fieldfile.name)
+
+    def pre_save(self, model_instance, add):
+        """
+        Save the file, and generate its variants if it was uploaded.
+        """
+        fieldfile = getattr(model_instance, self.attname)
+        uploaded = bool(fieldfile) and not getattr(fieldfile, "_committed",
+                                                   True)
+
+        fieldfile = super(ResizedImageField, self).pre_save(model_instance,
+                                                            add)
+
+        if uploaded and self.variants:
+            _on_commit(lambda: self._generate_after_save(model_instance))
+
+        return fieldfile
@@ -0,0 +1,64 @@
+"""
+Files holding resized images
+
+Encoded images are kept in memory up to SIMPLE_RESIZER_OUTPUT_SPOOL_SIZE
+bytes and only spill to a temporary file on disk beyond that.
+"""
+
+import io
+import tempfile
+
+from django.core.files.images import ImageFile
+
+from .conf import get_setting
+
+
+class SpooledFile(tempfile.SpooledTemporaryFile):
+    """
+    A spooled temporary file that stays in memory when asked for a file
+    descriptor, encoders ask for one to write to it directly.
+    """
+    def fileno(self):
+        """
+        Return the file descriptor once spilled to disk.
+        """
+        if not self._rolled:
+            raise io.UnsupportedOperation("fileno")
+
+        return self._file.fileno()
+
+
+def get_output_file():
+    """
+    Return a file to encode a resized image to.
+    """
+    return SpooledFile(max_size=get_setting("OUTPUT_SPOOL_SIZE"))
+
+
+class ResizedImageFile(ImageFile):
+    """
+    An image file of which the dimensions and the size are known, so they
+    are not parsed from the file.
+    """
+    # pylint: disable=R0913
+    def __init__(self, file, width, height, size=None, name=None):
+        super(ResizedImageFile, self).__init__(file, name)
+        self._dimensions = (width, height)
+
+        if size is not None:
+            self.size = size
+    # pylint: enable=R0913
+
+    @property
+    def width(self):
+        """
+        Return the width of the image.
+        """
+        return self._dimensions[0]
+
+    @property
+    def height(self):
+        """
+        Return the height of the image.
+        """
+        return self._dimensions[1]
@@ -0,0 +1,139 @@
+"""
+Output formats
+
+Variants are encoded in the format of their source unless an other one is
+requested. "auto" picks the first of the SIMPLE_RESIZER_AUTO_FORMATS for the
+format of the source that the client accepts and the engine can encode,
+based on the Accept header. The formats are listed by source format, since
+the smallest acceptable one depends on it: photos shrink most as avif, while
+graphics and transparent images keep their edges as webp.
+"""
+
+import os
+
+from .conf import get_setting
+from .engines import get_engine
+
+
+# Format: (extension, mime type)
+FORMATS = {
+    "jpeg": ("jpg", "image/jpeg"),
+    "png": ("png", "image/png"),
+    "gif": ("gif", "image/gif"),
+    "webp": ("webp", "image/webp"),
+    "avif": ("avif", "image/avif"),
+}
+
+EXTENSIONS = {
+    "jpg": "jpeg",
+    "jpeg": "jpeg",
+    "jpe": "jpeg",
+    "png": "png",
+    "gif": "gif",
+    "webp": "webp",
+    "avif": "avif",
+}
+
+
+def get_format(name):
+    """
+    Return the format of a file name, or None if it is not known.
+    """
+    return EXTENSIONS.get(os.path.splitext(name)[1].strip(".").lower())
+
+
+def get_mime_type(name):
+    """
+    Return the mime type of a file name, or None if it is not known.
+    """
+    name_format = get_format(name)
+
+    if name_format is None:
+        return None
+
+    return FORMATS[name_format][1]
+
+
+def parse_accept(accept):
+    """
+    Return the quality of each media type of an Accept header by type.
+    """
+    qualities = {}
+
+    for media_range in (accept or "").split(","):
+        parts = media_range.strip().split(";")
+        quality = 1.0
+
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if parts[0]:
+            qualities[parts[0].strip().lower()] = quality
+
+    return qualities
+
+
+def get_auto_formats(source_format=None):
+    """
+    Return the formats "auto" picks from for sources of a format, in order
+    of preference.
+    """
+    auto_formats = get_setting("AUTO_FORMATS")
+
+    if isinstance(auto_formats, dict):
+        return auto_formats.get(source_format, auto_formats["default"])
+
+    return auto_formats
+
+
+def negotiate(accept, engine=None, source_format=None):
+    """
+    Return the first of the automatic formats for sources of source_format
+    that is accepted by the Accept header accept and supported by the
+    engine, or None.
+    """
+    engine = engine or get_engine()
+    qualities = parse_accept(accept)
+
+    for candidate in get_auto_formats(source_format):
+        # Only an explicit mention counts, */* is sent by every client
+        if (qualities.get(FORMATS[candidate][1], 0) > 0 and
+                engine.supports(candidate)):
+            return candidate
+
+    return None
+
+
+def get_output_format(image, output_format=None, accept=None, engine=None):
+    """
+    Return the format to encode a variant of image in, None for the format
+    of the source.
+
+    output_format is a format, "auto" to negotiate one with the Accept
+    header accept, or None.
+    """
+    if output_format is None:
+        return None
+
+    if output_format == "auto":
+        output_format = negotiate(accept, engine, get_format(image.name))
+    elif output_format not in FORMATS:
+        raise ValueError("Unsupported output format %r." % output_format)
+
+    if output_format == get_format(image.name):
+        return None
+
+    return output_format
+
+
+def get_extension(output_format):
+    """
+    Return the extension of a format.
+    """
+    return FORMATS[output_format][0]
@@ -0,0 +1,234 @@
+"""
+Geometry of resized images
+
+The sizes and crop boxes of variants follow from the source dimensions alone,
+so they can be planned without decoding. plan() computes them for many
+sources at once, with NumPy if it is installed, giving the same results as
+get_target_geometry() for each source.
+"""
+
+import math
+
+from django.utils import six
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # pylint: disable=C0103
+
+
+def get_spec_size(size, width, height):
+    """
+    Return the (width, height) of a spec of which one dimension may be None,
+    keeping the aspect ratio of a (width, height) size.
+    """
+    aspect = float(size[0]) / float(size[1])
+
+    if width is None:
+        width = int(round(height * aspect))
+    elif height is None:
+        height = int(round(width / aspect))
+
+    return (width, height)
+
+
+def get_target_geometry(size, width, height, crop):
+    """
+    Calculate the size to resize an image of size to, and the crop box to
+    apply afterwards if crop is requested.
+
+    Returns a (target_width, target_height, crop_box) tuple, crop_box is a
+    (left, top, width, height) tuple or None.
+    """
+    crop_box = None
+
+    # Calculate target size
+    target_aspect = float(width) / float(height)
+    aspect = float(size[0]) / float(size[1])
+
+    if ((target_aspect > aspect and not crop) or
+            (target_aspect <= aspect and crop)):
+        # target is wider than image, set height as maximum
+        target_height = height
+
+        # calculate width
+        # -  iw / ih = tw / th (keep aspect)
+        # => th ( iw / ih ) = tw
+        target_width = float(target_height) * aspect
+
+        if crop:
+            # calculate crop coords
+            # -  ( tw - w ) / 2
+            target_left = (float(target_width) - float(width)) / 2
+            target_left = int(round(target_left))
+            crop_box = (target_left, 0, width, height)
+
+        # correct floating point error, and convert to int, round in the
+        # direction of the requested width
+        if width >= target_width:
+            target_width = int(math.ceil(target_width))
+        else:
+            target_width = int(math.floor(target_width))
+    else:
+        # image is wider than target, set width as maximum
+        target_width = width
+
+        # calculate height
+        # -  iw / ih = tw / th (keep aspect)
+        # => tw / ( iw / ih ) = th
+        target_height = float(target_width) / aspect
+
+        if crop:
+            # calculate crop coords
+            # -  ( th - h ) / 2
+            target_top = (float(target_height) - float(height)) / 2
+            target_top = int(round(target_top))
+            crop_box = (0, target_top, width, height)
+
+        # correct floating point error and convert to int
+        if height >= target_height:
+            target_height = int(math.ceil(target_height))
+        else:
+            target_height = int(math.floor(target_height))
+
+    return (target_width, target_height, crop_box)
+
+
+def _check_spec(width, height, crop):
+    """
+    Raise ValueError for specs that can not be resized to.
+    """
+    if width is None and height is None:
+        raise ValueError("Either width or height must be set.")
+
+    if crop and (width is None or height is None):
+        raise ValueError("Cropping needs both width and height.")
+
+
+def _round(values):
+    """
+    Round an array to integers the way the builtin round does.
+    """
+    if six.PY2:
+        # Halfway away from zero, the fraction is exact
+        whole = numpy.trunc(values)
+        return whole + numpy.where(numpy.abs(values - whole) >= 0.5,
+                                   numpy.sign(values), 0)
+
+    # Halfway to even
+    return numpy.rint(values)
+
+
+def _plan_scalar(sizes, width, height, crop):
+    """
+    Plan source by source.
+    """
+    target_widths, target_heights, crop_boxes = [], [], []
+
+    for size in sizes:
+        spec_size = get_spec_size(size, width, height)
+        if min(spec_size) <= 0:
+            raise ValueError("Spec resolves to an empty size.")
+
+        target_width, target_height, crop_box = get_target_geometry(
+            size, *spec_size + (crop,))
+        target_widths.append(target_width)
+        target_heights.append(target_height)
+        crop_boxes.append(crop_box)
+
+    return (target_widths, target_heights, crop_boxes if crop else None)
+
+
+def _plan_vectorized(sizes, width, height, crop):
+    """
+    Plan all sources at once, following get_target_geometry step by step.
+    """
+    aspect = sizes[:, 0] / sizes[:, 1]
+
+    if width is None:
+        spec_width, spec_height = _round(height * aspect), float(height)
+    elif height is None:
+        spec_width, spec_height = float(width), _round(width / aspect)
+    else:
+        spec_width, spec_height = float(width), float(height)
+
+    spec_width = numpy.zeros_like(aspect) + spec_width
+    spec_height = numpy.zeros_like(aspect) + spec_height
+
+    if (spec_width <= 0).any() or (spec_height <= 0).any():
+        raise ValueError("Spec resolves to an empty size.")
+
+    # Fit the height where the target is wider than the source, the width
+    # otherwise, the other way around when cropping
+    fit_height = (spec_width / spec_height > aspect) != crop
+
+    # Fitting the height
+    scaled_width = spec_height * aspect
+    fitted_width = numpy.where(spec_width >= scaled_width,
+                               numpy.ceil(scaled_width),
+                               numpy.floor(scaled_width))
+
+    # Fitting the width
+    scaled_height = spec_width / aspect
+    fitted_height = numpy.where(spec_height >= scaled_height,
+                                numpy.ceil(scaled_height),
+                                numpy.floor(scaled_height))
+
+    target_widths = numpy.where(fit_height, fitted_width,
+                                spec_width).astype(numpy.int64)
+    target_heights = numpy.where(fit_height, spec_height,
+                                 fitted_height).astype(numpy.int64)
+
+    if not crop:
+        return (target_widths, target_heights, None)
+
+    crop_boxes = numpy.zeros((len(aspect), 4), dtype=numpy.int64)
+    crop_boxes[:, 0] = numpy.where(
+        fit_height, _round((scaled_width - spec_width) / 2), 0)
+    crop_boxes[:, 1] = numpy.where(
+        fit_height, 0, _round((scaled_height - spec_height) / 2))
+    crop_boxes[:, 2] = spec_width
+    crop_boxes[:, 3] = spec_height
+
+    return (target_widths, target_heights, crop_boxes)
+
+
+def plan(sizes, width=None, height=None, crop=False, orientations=None):
+    """
+    Return the (target widths, target heights, crop boxes) of resizing
+    sources of (width, height) sizes to a spec, as resize would.
+
+    One of width and height may be None as in resize. When orientations of
+    the sources are given, as exif orientation values or None, the sizes
+    are those stored and are rotated where needed. Crop boxes are (left,
+    top, width, height), or None without crop. Raises ValueError if a
+    source or the spec it resolves to is empty.
+
+    With NumPy the results are arrays, an N x 4 one for the crop boxes,
+    otherwise lists.
+    """
+    _check_spec(width, height, crop)
+
+    if numpy is None:
+        sizes = [tuple(size) for size in sizes]
+
+        if orientations is not None:
+            sizes = [(size[1], size[0]) if (orientation or 1) >= 5 else size
+                     for size, orientation in zip(sizes, orientations)]
+
+        if any(min(size) <= 0 for size in sizes):
+            raise ValueError("Sizes must be positive.")
+
+        return _plan_scalar(sizes, width, height, crop)
+
+    sizes = numpy.asarray(sizes, dtype=numpy.float64).reshape(-1, 2)
+
+    if orientations is not None:
+        # Orientations 5 to 8 are transposed, unknown ones become nan
+        swap = numpy.array(orientations, dtype=numpy.float64) >= 5
+        sizes = numpy.where(swap[:, numpy.newaxis], sizes[:, ::-1], sizes)
+
+    if (sizes <= 0).any():
+        raise ValueError("Sizes must be positive.")
+
+    return _plan_vectorized(sizes, width, height, crop)
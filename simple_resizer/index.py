@@ -0,0 +1,99 @@
+"""
+Consult and update the variant index
+
+All functions are no-ops when SIMPLE_RESIZER_INDEX is disabled.
+"""
+
+from .conf import get_setting
+from .profiles import get_token
+from .sources import get_source_version
+from .sources import get_storage_key
+
+
+# pylint: disable=R0913
+def get_spec(image, width, height, crop, namespace, storage,
+             output_format=None, profile=None):
+    """
+    Return the fields identifying a variant in the index.
+    """
+    return {
+        "storage": get_storage_key(storage),
+        "source_name": image.name,
+        "width": width,
+        "height": height,
+        "crop": bool(crop),
+        "namespace": namespace,
+        "format": output_format or "",
+        "profile": get_token(profile),
+    }
+
+
+def lookup(image, width, height, crop, namespace, storage,
+           output_format=None, profile=None):
+    """
+    Return a (name, stale) tuple for a variant.
+
+    The name is None if the variant is not indexed or is stale, stale is True
+    if it was generated from an other version of the source.
+    """
+    if not get_setting("INDEX"):
+        return (None, False)
+
+    # Models can only be imported once the apps are loaded
+    from .models import ResizedVariant
+
+    variant = ResizedVariant.objects.lookup(
+        **get_spec(image, width, height, crop, namespace, storage,
+                   output_format, profile))
+
+    if variant is None:
+        return (None, False)
+
+    if variant.source_version != get_source_version(image):
+        return (None, True)
+
+    return (variant.name, False)
+
+
+def lookup_many(variants):
+    """
+    Return the (name, stale) tuples for many variants with a single query.
+
+    variants is a list of (image, width, height, crop, namespace, storage,
+    output_format, profile) tuples, of which the last two may be omitted.
+    """
+    if not get_setting("INDEX"):
+        return [(None, False)] * len(variants)
+
+    from .models import ResizedVariant
+
+    found = ResizedVariant.objects.lookup_many(
+        [get_spec(*variant) for variant in variants])
+    results = []
+
+    for variant, indexed in zip(variants, found):
+        if indexed is None:
+            results.append((None, False))
+        elif indexed.source_version != get_source_version(variant[0]):
+            results.append((None, True))
+        else:
+            results.append((indexed.name, False))
+
+    return results
+
+
+def record(image, width, height, crop, namespace, storage, name,
+           resized_image=None, output_format=None, profile=None):
+    """
+    Record the stored name of a variant.
+    """
+    if not get_setting("INDEX"):
+        return
+
+    from .models import ResizedVariant
+
+    ResizedVariant.objects.record(
+        get_source_version(image), name, resized_image,
+        **get_spec(image, width, height, crop, namespace, storage,
+                   output_format, profile))
+# pylint: enable=R0913
@@ -0,0 +1,121 @@
+"""
+Resource limits and the decompression bomb guard
+
+Limits are set by SIMPLE_RESIZER_LIMITS and can be tightened for the resizes
+in the calling thread with limited():
+
+    pixels   most pixels of a source, checked on its header before decoding
+    width    widest source, likewise
+    height   highest source, likewise
+    time     seconds a resize may take, checked before each variant is
+             resized and encoded, so a single decode, resize or encode
+             runs to its end
+    memory   bytes of pixel cache in memory, beyond it is mapped or on disk
+    map      bytes of memory mapped pixel cache
+    disk     bytes of pixel cache on disk, beyond it decoding fails
+    area     pixels of a single image in the pixel cache
+    threads  threads an engine may use for one operation
+
+The resource limits, memory to threads, are applied by the engine. Since
+they hold for the whole process, they are applied from the settings once,
+and per resize only in the workers of the process executor. Resizing with
+other resource limits anywhere else raises ValueError rather than ignoring
+them.
+"""
+
+import threading
+import time
+
+from contextlib import contextmanager
+
+from .conf import get_setting
+from .exceptions import ImageTooLarge
+from .exceptions import ResizeTimeout
+
+
+RESOURCES = ("memory", "map", "disk", "area", "threads")
+
+_LOCAL = threading.local()
+
+
+def get_limits():
+    """
+    Return the limits for the calling thread.
+    """
+    limits = dict(get_setting("LIMITS"))
+    limits.update(getattr(_LOCAL, "limits", {}))
+    return limits
+
+
+@contextmanager
+def limited(**limits):
+    """
+    Apply limits to the resizes in the calling thread. Limits set to None
+    are lifted. Resource limits need the process executor and an engine
+    that applies them.
+    """
+    previous = getattr(_LOCAL, "limits", {})
+    _LOCAL.limits = dict(previous, **limits)
+
+    try:
+        yield
+    finally:
+        _LOCAL.limits = previous
+
+
+def get_resources(limits):
+    """
+    Return the resource limits that are set.
+    """
+    return dict((key, limits[key]) for key in RESOURCES
+                if limits.get(key) is not None)
+
+
+def check_resources(limits, applied):
+    """
+    Raise ValueError if the resource limits differ from those of the
+    settings and can not be applied per resize.
+    """
+    resources = get_resources(limits)
+
+    if not applied and resources != get_resources(get_setting("LIMITS")):
+        raise ValueError("Resource limits %r can only be applied per resize "
+                         "by the process executor with an engine that "
+                         "supports them." % resources)
+
+
+def check_size(size, limits):
+    """
+    Raise ImageTooLarge if a (width, height) source exceeds the limits.
+    """
+    width, height = size
+
+    if limits.get("pixels") is not None and width * height > limits["pixels"]:
+        raise ImageTooLarge("Image of %ix%i exceeds the limit of %i pixels."
+                            % (width, height, limits["pixels"]))
+
+    if limits.get("width") is not None and width > limits["width"]:
+        raise ImageTooLarge("Image of %ix%i exceeds the width limit of %i."
+                            % (width, height, limits["width"]))
+
+    if limits.get("height") is not None and height > limits["height"]:
+        raise ImageTooLarge("Image of %ix%i exceeds the height limit of %i."
+                            % (width, height, limits["height"]))
+
+
+def get_deadline(limits):
+    """
+    Return the time a resize started now must be done by, or None.
+    """
+    if limits.get("time") is None:
+        return None
+
+    return time.time() + limits["time"]
+
+
+def check_deadline(deadline):
+    """
+    Raise ResizeTimeout if the deadline passed.
+    """
+    if deadline is not None and time.time() > deadline:
+        raise ResizeTimeout("Resizing took longer than allowed.")
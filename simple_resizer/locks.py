@@ -0,0 +1,183 @@
+"""
+Single flight generation of variants
+
+Makes sure only one caller generates a variant while the others wait for it.
+Callers in the same process wait on a thread lock, callers in other
+processes or on other nodes on a lock shared through the cache or through
+lock files, as set by SIMPLE_RESIZER_LOCK.
+"""
+
+import os
+import errno
+import hashlib
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+
+from django.utils.encoding import force_bytes
+
+from .cache import get_cache
+from .conf import get_setting
+from .sources import get_storage_key
+
+
+# key: [thread lock, number of callers using it]
+_LOCKS = {}
+_GUARD = threading.Lock()
+
+
+def _wait(try_acquire, deadline):
+    """
+    Call try_acquire until it succeeds or the deadline passes.
+    """
+    delay = 0.01
+
+    while not try_acquire():
+        if time.time() >= deadline:
+            return False
+
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+
+    return True
+
+
+def _get_lock_path(key):
+    """
+    Return the lock file path for a key.
+    """
+    lock_dir = get_setting("LOCK_DIR") or tempfile.gettempdir()
+    return os.path.join(lock_dir, "simple_resizer_%s.lock" %
+                        hashlib.md5(force_bytes(key)).hexdigest())
+
+
+def _acquire_file(key):
+    """
+    Try to create the lock file, replaces it if it expired.
+    """
+    path = _get_lock_path(key)
+
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+
+    try:
+        if time.time() - os.path.getmtime(path) > get_setting("LOCK_EXPIRE"):
+            # Left by a crashed process
+            os.remove(path)
+    except OSError:
+        pass
+
+    return False
+
+
+def _get_cache_key(key):
+    """
+    Return the cache key of the lock for key.
+    """
+    return "%s_lock:%s" % (get_setting("CACHE_PREFIX"),
+                           hashlib.md5(force_bytes(key)).hexdigest())
+
+
+def _acquire_shared(key):
+    """
+    Try to acquire the lock shared with other processes.
+    """
+    backend = get_setting("LOCK")
+
+    if backend == "cache":
+        return get_cache(get_setting("LOCK_CACHE")).add(
+            _get_cache_key(key), 1, get_setting("LOCK_EXPIRE"))
+
+    if backend == "file":
+        return _acquire_file(key)
+
+    return True
+
+
+def _release_shared(key):
+    """
+    Release the lock shared with other processes.
+    """
+    backend = get_setting("LOCK")
+
+    if backend == "cache":
+        get_cache(get_setting("LOCK_CACHE")).delete(_get_cache_key(key))
+    elif backend == "file":
+        try:
+            os.remove(_get_lock_path(key))
+        except OSError:
+            pass
+
+
+def get_key(storage, name):
+    """
+    Return the lock key of a variant.
+    """
+    return "%s:%s" % (get_storage_key(storage), name)
+
+
+def acquire(key, timeout=None):
+    """
+    Acquire the lock for key, waiting at most timeout seconds, which defaults
+    to SIMPLE_RESIZER_LOCK_TIMEOUT. Returns False if it timed out.
+    """
+    if timeout is None:
+        timeout = get_setting("LOCK_TIMEOUT")
+
+    deadline = time.time() + timeout
+
+    with _GUARD:
+        entry = _LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+
+    if _wait(lambda: entry[0].acquire(False), deadline):
+        if _wait(lambda: _acquire_shared(key), deadline):
+            return True
+
+        entry[0].release()
+
+    _forget(key)
+    return False
+
+
+def release(key):
+    """
+    Release the lock for key. The thread lock is released even if the shared
+    one fails to, or every later caller would wait on it forever.
+    """
+    try:
+        _release_shared(key)
+    finally:
+        _LOCKS[key][0].release()
+        _forget(key)
+
+
+def _forget(key):
+    """
+    Drop the thread lock of a key when nobody uses it anymore.
+    """
+    with _GUARD:
+        _LOCKS[key][1] -= 1
+
+        if not _LOCKS[key][1]:
+            del _LOCKS[key]
+
+
+@contextmanager
+def locked(key, timeout=None):
+    """
+    Hold the lock for key, yields False if it could not be acquired in time.
+    """
+    acquired = acquire(key, timeout)
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            release(key)
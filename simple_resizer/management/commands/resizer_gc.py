@@ -0,0 +1,355 @@
+"""
+Delete the variants of sources that were deleted or replaced
+
+    manage.py resizer_gc [directory ...] --namespace resized --dry-run
+
+The storage is walked one directory at a time. Indexed variants are matched
+back to their source through the index, the others by their name: orphans
+have no source left, stale variants were generated from an other version of
+their source, are older than it, or carry a token that is not the current
+one of the source. They are deleted in batches, together with their index
+and cache entries.
+"""
+
+import os
+import re
+
+from optparse import make_option
+
+from django.core.files.base import File
+from django.core.files.images import ImageFile
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from ... import cache
+from ...conf import get_setting
+from ...formats import EXTENSIONS
+from ...sources import get_source_token
+from ...sources import get_source_version
+from ...sources import get_storage_key
+
+
+SIZE_RE = re.compile(r"^\d+x\d+(_cropped)?(_[\w-]+)?$")
+
+TOKEN_RE = re.compile(r"^\.[0-9a-f]+$")
+
+# Variant names looked up in the index at once
+INDEX_CHUNK_SIZE = 500
+
+
+def _join(directory, name):
+    """
+    Join storage path parts.
+    """
+    return "%s/%s" % (directory, name) if directory else name
+
+
+def _walk(storage, directory, namespaces):
+    """
+    Yield the (source directory, variant directory) of the variant
+    directories below directory.
+    """
+    for name in sorted(storage.listdir(directory)[0]):
+        path = _join(directory, name)
+
+        if name in namespaces:
+            for size in sorted(storage.listdir(path)[0]):
+                if SIZE_RE.match(size):
+                    yield directory, _join(path, size)
+        else:
+            for item in _walk(storage, path, namespaces):
+                yield item
+
+
+def _get_source_names(name):
+    """
+    Return the (source name, token) pairs a variant file name may derive
+    from, the most literal first. token is None for plain names.
+    """
+    candidates = [name]
+
+    root, ext = os.path.splitext(name)
+    if ext.strip(".").lower() in EXTENSIONS and os.path.splitext(root)[1]:
+        # Encoded in an other format than the source
+        candidates.append(root)
+
+    pairs = []
+    for candidate in candidates:
+        pairs.append((candidate, None))
+
+        root, ext = os.path.splitext(candidate)
+        root, token = os.path.splitext(root)
+        if token and TOKEN_RE.match(token):
+            pairs.append((root + ext, token[1:]))
+
+    return pairs
+
+
+class Collector(object):
+    """
+    Finds the dead variants of a storage and deletes them in batches
+    """
+    def __init__(self, storage, dry_run, batch_size):
+        self.storage = storage
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.batch = []
+        self.counts = {"variants": 0, "orphans": 0, "stale": 0, "bytes": 0}
+        self.versioned = get_setting("NAMING") == "versioned"
+        # Sources of the directory being collected
+        self.directory = None
+        self.sources = {}
+        # Index entries of the variant directory being collected, by name
+        self.indexed = {}
+
+    def _get_source(self, directory, name):
+        """
+        Return the [modified time, token, version] of a source, or None if
+        it does not exist. The token and version are filled in by _get_token
+        and _get_version.
+        """
+        if directory != self.directory:
+            self.directory = directory
+            self.sources = {}
+
+        if name not in self.sources:
+            path = _join(directory, name)
+            source = None
+
+            if self.storage.exists(path):
+                try:
+                    modified = self.storage.modified_time(path)
+                except (NotImplementedError, OSError):
+                    modified = None
+
+                source = [modified, None, None]
+
+            self.sources[name] = source
+
+        return self.sources[name]
+
+    def _get_token(self, directory, name):
+        """
+        Return the current token of a source.
+        """
+        source = self._get_source(directory, name)
+
+        if source[1] is None:
+            path = _join(directory, name)
+            image = ImageFile(self.storage.open(path))
+            # Keep the storage name, the token is derived from it
+            image.name = path
+            image.storage = self.storage
+
+            try:
+                source[1] = get_source_token(image)
+            finally:
+                image.close()
+
+        return source[1]
+
+    def _get_version(self, directory, name):
+        """
+        Return the current version marker of a source.
+        """
+        source = self._get_source(directory, name)
+
+        if source[2] is None:
+            image = File(None, _join(directory, name))
+            image.storage = self.storage
+            source[2] = get_source_version(image)
+
+        return source[2]
+
+    def _load_index(self, variants):
+        """
+        Load the index entries of variants.
+        """
+        self.indexed = {}
+
+        if not get_setting("INDEX"):
+            return
+
+        from ...models import ResizedVariant
+
+        storage_key = get_storage_key(self.storage)
+
+        for start in range(0, len(variants), INDEX_CHUNK_SIZE):
+            self.indexed.update(
+                (indexed.name, indexed)
+                for indexed in ResizedVariant.objects.filter(
+                    storage=storage_key,
+                    name__in=variants[start:start + INDEX_CHUNK_SIZE]))
+
+    def classify(self, directory, variant):
+        """
+        Return whether a variant is "kept", an "orphan" or "stale".
+        """
+        indexed = self.indexed.get(variant)
+
+        if indexed is not None:
+            # Knows the source even of names the storage made up
+            directory, _, name = indexed.source_name.rpartition("/")
+
+            if self._get_source(directory, name) is None:
+                return "orphan"
+
+            if indexed.source_version != self._get_version(directory, name):
+                return "stale"
+
+            return "kept"
+
+        filename = os.path.basename(variant)
+
+        for name, token in _get_source_names(filename):
+            source = self._get_source(directory, name)
+
+            if source is None:
+                continue
+
+            if token is not None:
+                # Only current tokens are requested
+                if self.versioned and token == self._get_token(directory,
+                                                               name):
+                    return "kept"
+                return "stale"
+
+            if self.versioned:
+                return "stale"
+
+            try:
+                modified = self.storage.modified_time(variant)
+            except (NotImplementedError, OSError):
+                return "kept"
+
+            if source[0] is not None and modified < source[0]:
+                return "stale"
+
+            return "kept"
+
+        return "orphan"
+
+    def collect(self, directory, variant_directory):
+        """
+        Collect the dead variants of a variant directory.
+        """
+        files = self.storage.listdir(variant_directory)[1]
+        dead = 0
+        self._load_index([_join(variant_directory, filename)
+                          for filename in files])
+
+        for filename in files:
+            variant = _join(variant_directory, filename)
+            status = self.classify(directory, variant)
+            self.counts["variants"] += 1
+
+            if status == "kept":
+                continue
+
+            dead += 1
+            self.counts["orphans" if status == "orphan" else "stale"] += 1
+
+            try:
+                self.counts["bytes"] += self.storage.size(variant)
+            except (NotImplementedError, OSError):
+                pass
+
+            self.batch.append(variant)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+
+        if dead == len(files):
+            self.flush()
+            self._remove_directory(variant_directory)
+
+    def _remove_directory(self, directory):
+        """
+        Remove an empty variant directory from a local storage.
+        """
+        if self.dry_run:
+            return
+
+        try:
+            os.rmdir(self.storage.path(directory))
+        except (NotImplementedError, OSError):
+            pass
+
+    def flush(self):
+        """
+        Delete the collected variants and their index and cache entries.
+        """
+        if not self.batch or self.dry_run:
+            self.batch = []
+            return
+
+        for variant in self.batch:
+            self.storage.delete(variant)
+
+        if get_setting("INDEX"):
+            from ...models import ResizedVariant
+
+            variants = ResizedVariant.objects.filter(
+                storage=get_storage_key(self.storage), name__in=self.batch)
+            # Resolved by the version they were generated from
+            cache.delete_variants([cache.get_indexed_key(variant)
+                                   for variant in variants])
+            variants.delete()
+
+        self.batch = []
+
+
+class Command(BaseCommand):
+    """
+    Delete orphan and stale variants
+    """
+    args = "[directory ...]"
+    help = ("Deletes the variants of which the source was deleted or "
+            "replaced, below the given directories of the storage or all "
+            "of it.")
+    option_list = BaseCommand.option_list + (
+        make_option("--namespace", action="append", dest="namespaces",
+                    default=None,
+                    help="Namespace of the variants, resized if omitted. "
+                         "May be repeated."),
+        make_option("--storage", default=None,
+                    help="Dotted path of the storage class, the default "
+                         "storage if omitted."),
+        make_option("--dry-run", action="store_true", dest="dry_run",
+                    default=False,
+                    help="Report the dead variants without deleting them."),
+        make_option("--batch-size", type="int", dest="batch_size",
+                    default=100,
+                    help="Number of variants deleted at once."),
+    )
+
+    def handle(self, *args, **options):
+        """
+        Collect the dead variants
+        """
+        storage = get_storage_class(options["storage"])()
+        namespaces = set(options["namespaces"] or ["resized"])
+        collector = Collector(storage, options["dry_run"],
+                              options["batch_size"])
+
+        for directory in args or ("",):
+            directory = directory.strip("/")
+
+            try:
+                for source_directory, variant_directory in _walk(
+                        storage, directory, namespaces):
+                    collector.collect(source_directory, variant_directory)
+            except (IOError, OSError) as error:
+                collector.flush()
+                raise CommandError("Walking %r failed: %s" % (directory,
+                                                              error))
+
+        collector.flush()
+
+        if options["verbosity"] > 0:
+            counts = collector.counts
+            self.stdout.write(
+                "%i variants, %i orphans, %i stale, %i bytes %s" % (
+                    counts["variants"], counts["orphans"], counts["stale"],
+                    counts["bytes"],
+                    "reclaimable" if options["dry_run"] else "reclaimed"))
@@ -0,0 +1,353 @@
+"""
+Generate variants before they are requested
+
+    manage.py resizer_warm app_label.Model.field "photos/*.jpg" \\
+        --spec 300x200 --spec 600x600c --workers 4 --rate 20
+
+Sources are the files of an image field, or the files of a storage matching
+a glob, in which * also matches /. Variants that exist are skipped. With
+--state the finished sources are recorded, so an interrupted run resumes
+where it stopped.
+"""
+
+import fnmatch
+import multiprocessing
+import os
+import re
+import time
+
+from optparse import make_option
+
+from django.core.files.images import ImageFile
+from django.core.files.storage import get_storage_class
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.models.fields import FieldDoesNotExist
+
+from ... import _get_resized_name
+from ... import _normalize_params
+from ... import resize_lazy_many
+from ...formats import FORMATS
+from ...formats import get_output_format
+from ...profiles import get_profile
+
+try:
+    from django.apps import apps
+    get_model = apps.get_model  # pylint: disable=C0103
+except ImportError:
+    from django.db.models import get_model  # noqa
+
+
+SPEC_RE = re.compile(r"^(\d*)x(\d*)(c?)$")
+
+_CONFIG = {}
+
+
+def _parse_spec(spec):
+    """
+    Return the (width, height, crop) of a WIDTHxHEIGHT spec, of which either
+    size may be omitted, with a trailing c to crop.
+    """
+    match = SPEC_RE.match(spec)
+
+    if match is None or not (match.group(1) or match.group(2)):
+        raise CommandError("Invalid spec %r, expected WIDTHxHEIGHT." % spec)
+
+    width, height, crop = match.groups()
+    return (int(width) if width else None, int(height) if height else None,
+            bool(crop))
+
+
+def _get_field(field_path):
+    """
+    Return the field of an app_label.Model.field path. Raises LookupError
+    if there is no such model.
+    """
+    app_label, model_name, field_name = field_path.split(".")
+    model = get_model(app_label, model_name)
+
+    if model is None:
+        raise LookupError("No model %s.%s." % (app_label, model_name))
+
+    return model._meta.get_field(field_name)  # pylint: disable=W0212
+
+
+def _get_field_names(field):
+    """
+    Yield the file names stored in a field.
+    """
+    manager = field.model._default_manager  # pylint: disable=W0212
+    names = manager.exclude(**{"%s__isnull" % field.name: True}).exclude(
+        **{field.name: ""}).order_by("pk").values_list(field.name, flat=True)
+
+    for name in names.iterator():
+        yield name
+
+
+def _glob(storage, pattern, namespace):
+    """
+    Yield the names of the files of storage matching pattern, skipping the
+    directories of variants.
+    """
+    # Walk from the deepest directory without wildcards
+    prefix = []
+    for part in pattern.split("/")[:-1]:
+        if set(part) & set("*?["):
+            break
+        prefix.append(part)
+
+    directories = ["/".join(prefix)]
+    while directories:
+        directory = directories.pop()
+        subdirectories, files = storage.listdir(directory)
+
+        for name in sorted(files):
+            name = "%s/%s" % (directory, name) if directory else name
+            if fnmatch.fnmatchcase(name, pattern):
+                yield name
+
+        directories.extend(
+            "%s/%s" % (directory, name) if directory else name
+            for name in sorted(subdirectories, reverse=True)
+            if name != namespace)
+
+
+def _throttle(jobs, rate):
+    """
+    Yield the jobs, at most rate per second.
+    """
+    start = time.time()
+
+    for idx, job in enumerate(jobs):
+        if rate:
+            delay = start + idx / rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        yield job
+
+
+def _init(config):
+    """
+    Set the configuration of the run, in each worker.
+    """
+    _CONFIG.clear()
+    _CONFIG.update(config, storages={})
+
+
+def _get_storage(field_path):
+    """
+    Return the storage of the sources of a field, or of the globbed ones if
+    field_path is None.
+    """
+    storages = _CONFIG["storages"]
+
+    if field_path not in storages:
+        if field_path is None:
+            storages[None] = get_storage_class(_CONFIG["storage"])()
+        else:
+            storages[field_path] = _get_field(field_path).storage
+
+    return storages[field_path]
+
+
+def _warm(job):
+    """
+    Generate the missing variants of a source. Returns a (job, status)
+    tuple, status is "generated", "existing" or the error.
+    """
+    field_path, name = job
+
+    try:
+        storage = _get_storage(field_path)
+        source = ImageFile(storage.open(name))
+    except Exception as error:  # pylint: disable=W0703
+        return job, "%s: %s" % (type(error).__name__, error)
+
+    # Keep the storage name, the variant names are derived from it
+    source.name = name
+    namespace = _CONFIG["namespace"]
+    profile = get_profile(_CONFIG["profile"])
+
+    try:
+        missing = {}
+        for output_format in _CONFIG["formats"]:
+            variant_format = get_output_format(source, output_format)
+
+            for width, height, crop in _CONFIG["specs"]:
+                width, height, crop = _normalize_params(source, width, height,
+                                                        crop)
+                if not storage.exists(_get_resized_name(
+                        source, width, height, crop, namespace,
+                        variant_format, profile)):
+                    missing.setdefault(output_format, []).append(
+                        (source, width, height, crop, namespace))
+
+        for output_format, items in missing.items():
+            resize_lazy_many(items, storage=storage, mode="sync",
+                             output_format=output_format,
+                             profile=_CONFIG["profile"])
+    except Exception as error:  # pylint: disable=W0703
+        return job, "%s: %s" % (type(error).__name__, error)
+    finally:
+        source.close()
+
+    return job, "generated" if missing else "existing"
+
+
+class Command(BaseCommand):
+    """
+    Generate the variants of many sources
+    """
+    args = "<app_label.Model.field or storage glob> ..."
+    help = ("Generates the missing variants of the files of image fields or "
+            "of the files matching storage globs.")
+    option_list = BaseCommand.option_list + (
+        make_option("--spec", action="append", dest="specs", default=None,
+                    help="WIDTHxHEIGHT of a variant, either may be omitted, "
+                         "append c to crop. May be repeated."),
+        make_option("--namespace", default="resized",
+                    help="Namespace of the variants."),
+        make_option("--format", action="append", dest="formats",
+                    default=None,
+                    help="Output format of the variants, the format of the "
+                         "source if omitted. May be repeated."),
+        make_option("--profile", default=None,
+                    help="Encoder profile of the variants."),
+        make_option("--storage", default=None,
+                    help="Dotted path of the storage class of the globbed "
+                         "sources, the default storage if omitted."),
+        make_option("--workers", type="int", default=1,
+                    help="Number of worker processes."),
+        make_option("--rate", type="float", default=None,
+                    help="Most sources to start per second."),
+        make_option("--state", default=None,
+                    help="File recording the finished sources, which are "
+                         "skipped when run again."),
+        make_option("--progress", type="float", default=10,
+                    help="Seconds between progress reports."),
+    )
+
+    def get_jobs(self, sources, config):
+        """
+        Return the (field_path, name) of the sources, without duplicates.
+        """
+        jobs = []
+
+        for source in sources:
+            field_path = None
+            if source.count(".") == 2 and "/" not in source:
+                try:
+                    field = _get_field(source)
+                except LookupError:
+                    # A file name in the root of the storage
+                    pass
+                except FieldDoesNotExist as error:
+                    raise CommandError(str(error))
+                else:
+                    field_path = source
+                    jobs.extend((field_path, name)
+                                for name in _get_field_names(field))
+
+            if field_path is None:
+                jobs.extend((None, name) for name in _glob(
+                    get_storage_class(config["storage"])(), source,
+                    config["namespace"]))
+
+        seen = set()
+        return [job for job in jobs if not (job in seen or seen.add(job))]
+
+    def report(self, counts, total, start):
+        """
+        Write the progress.
+        """
+        done = sum(counts.values())
+        self.stdout.write(
+            "%i/%i sources, %i generated, %i existing, %i failed, "
+            "%.1f sources/s" % (done, total, counts["generated"],
+                                counts["existing"], counts["failed"],
+                                done / max(time.time() - start, 1e-6)))
+
+    def handle(self, *args, **options):
+        """
+        Generate the variants
+        """
+        if not args:
+            raise CommandError("Give at least one source.")
+
+        config = {
+            "specs": [_parse_spec(spec) for spec in options["specs"] or ()],
+            "formats": options["formats"] or [None],
+            "namespace": options["namespace"],
+            "profile": options["profile"],
+            "storage": options["storage"],
+        }
+
+        if not config["specs"]:
+            raise CommandError("Give at least one --spec.")
+
+        for output_format in config["formats"]:
+            if output_format not in FORMATS and output_format is not None:
+                raise CommandError("Unsupported output format %r, auto can "
+                                   "not be warmed." % output_format)
+
+        try:
+            get_profile(config["profile"])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        finished = set()
+        if options["state"] and os.path.exists(options["state"]):
+            with open(options["state"]) as state:
+                finished.update(line.rstrip("\n") for line in state)
+
+        jobs = [job for job in self.get_jobs(args, config)
+                if "%s\t%s" % (job[0] or "", job[1]) not in finished]
+
+        if options["workers"] > 1:
+            # Do not share the connections with the workers
+            for connection in connections.all():
+                connection.close()
+
+            pool = multiprocessing.Pool(options["workers"], _init, (config,))
+            results = pool.imap_unordered(
+                _warm, _throttle(jobs, options["rate"]))
+        else:
+            pool = None
+            _init(config)
+            results = (_warm(job) for job in _throttle(jobs, options["rate"]))
+
+        counts = {"generated": 0, "existing": 0, "failed": 0}
+        state = open(options["state"], "a") if options["state"] else None
+        start = reported = time.time()
+
+        try:
+            for (field_path, name), status in results:
+                if status in counts:
+                    counts[status] += 1
+                    if state is not None:
+                        state.write("%s\t%s\n" % (field_path or "", name))
+                        state.flush()
+                else:
+                    counts["failed"] += 1
+                    self.stderr.write("Failed %s: %s" % (name, status))
+
+                if (options["verbosity"] > 1 or
+                        time.time() - reported > options["progress"]):
+                    self.report(counts, len(jobs), start)
+                    reported = time.time()
+        except KeyboardInterrupt:
+            if pool is not None:
+                pool.terminate()
+            raise
+        else:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        finally:
+            if state is not None:
+                state.close()
+
+        if options["verbosity"] > 0:
+            self.report(counts, len(jobs), start)
@@ -0,0 +1,230 @@
+"""
+Timing and counting the stages of the resize pipeline
+
+Measurements are sent as the signals of simple_resizer.signals and handed to
+the sinks listed in SIMPLE_RESIZER_METRICS_SINKS. Stages are exists, open,
+probe, decode, orient, resize, crop, encode, save and url, counters are
+cache_hit and cache_miss. Nothing is measured without receivers or sinks.
+"""
+
+import logging
+import socket
+import threading
+import time
+
+from contextlib import contextmanager
+
+from .conf import get_setting
+from .signals import counted
+from .signals import stage_timed
+from .utils import import_attribute
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+_SINKS = {}
+
+
+class BaseSink(object):
+    """
+    Receives the measurements.
+    """
+    def timing(self, stage, duration, tags):
+        """
+        Record that a stage took duration seconds.
+        """
+        raise NotImplementedError
+
+    def increment(self, name, value, tags):
+        """
+        Add value to a counter.
+        """
+        raise NotImplementedError
+
+
+class LoggingSink(BaseSink):
+    """
+    Logs the measurements at debug level.
+    """
+    def timing(self, stage, duration, tags):
+        """
+        Log the duration.
+        """
+        logger.debug("%s took %.2fms %r", stage, duration * 1000, tags)
+
+    def increment(self, name, value, tags):
+        """
+        Log the increment.
+        """
+        logger.debug("%s +%i %r", name, value, tags)
+
+
+class StatsdSink(BaseSink):
+    """
+    Sends the measurements to statsd over udp, with the tags in the
+    dogstatsd format. Sending never blocks nor fails a resize.
+    """
+    def __init__(self):
+        self.address = (get_setting("STATSD_HOST"),
+                        get_setting("STATSD_PORT"))
+        self.prefix = get_setting("METRICS_PREFIX")
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+
+    def _send(self, metric):
+        """
+        Send a metric, dropping it on failure.
+        """
+        try:
+            self.socket.sendto(metric.encode("utf-8"), self.address)
+        except (IOError, OSError):
+            pass
+
+    def _format(self, name, value, kind, tags):
+        """
+        Return a metric line.
+        """
+        line = "%s.%s:%s|%s" % (self.prefix, name, value, kind)
+
+        if tags:
+            line += "|#%s" % ",".join("%s:%s" % (key, tags[key])
+                                      for key in sorted(tags))
+
+        return line
+
+    def timing(self, stage, duration, tags):
+        """
+        Send a timer.
+        """
+        self._send(self._format(stage, "%.3f" % (duration * 1000), "ms",
+                                tags))
+
+    def increment(self, name, value, tags):
+        """
+        Send a counter.
+        """
+        self._send(self._format(name, value, "c", tags))
+
+
+class PrometheusSink(BaseSink):
+    """
+    Accumulates the measurements in this process for rendering in the
+    Prometheus text format, served by simple_resizer.views.metrics. Only the
+    stage is used as label, dimensions would make too many series.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        # stage: [count, seconds, bytes]
+        self.stages = {}
+        self.counters = {}
+
+    def timing(self, stage, duration, tags):
+        """
+        Add to the totals of the stage.
+        """
+        with self.lock:
+            totals = self.stages.setdefault(stage, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += tags.get("bytes", 0)
+
+    def increment(self, name, value, tags):
+        """
+        Add to the counter.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text format.
+        """
+        prefix = get_setting("METRICS_PREFIX")
+        lines = [
+            "# TYPE %s_stage_seconds summary" % prefix,
+        ]
+
+        with self.lock:
+            for stage in sorted(self.stages):
+                total, seconds, _ = self.stages[stage]
+                lines.append('%s_stage_seconds_count{stage="%s"} %i' % (
+                    prefix, stage, total))
+                lines.append('%s_stage_seconds_sum{stage="%s"} %f' % (
+                    prefix, stage, seconds))
+
+            lines.append("# TYPE %s_stage_bytes_total counter" % prefix)
+            for stage in sorted(self.stages):
+                lines.append('%s_stage_bytes_total{stage="%s"} %i' % (
+                    prefix, stage, self.stages[stage][2]))
+
+            for name in sorted(self.counters):
+                lines.append("# TYPE %s_%s_total counter" % (prefix, name))
+                lines.append("%s_%s_total %i" % (prefix, name,
+                                                 self.counters[name]))
+
+        return "\n".join(lines) + "\n"
+
+
+def get_sink(path):
+    """
+    Return the sink instance for a dotted class path. Instances are shared.
+    """
+    try:
+        return _SINKS[path]
+    except KeyError:
+        pass
+
+    _SINKS[path] = import_attribute(path)()
+    return _SINKS[path]
+
+
+def _get_sinks():
+    """
+    Return the configured sinks.
+    """
+    return [get_sink(path) for path in get_setting("METRICS_SINKS")]
+
+
+def _is_enabled(signal):
+    """
+    Return whether measurements are received by anyone.
+    """
+    return bool(signal.receivers or get_setting("METRICS_SINKS"))
+
+
+@contextmanager
+def timed(stage, **tags):
+    """
+    Time the stage of the block. Yields the tags, so the block can add the
+    ones only known at its end.
+    """
+    if not _is_enabled(stage_timed):
+        yield tags
+        return
+
+    start = time.time()
+    yield tags
+    duration = time.time() - start
+
+    stage_timed.send(sender=None, stage=stage, duration=duration, tags=tags)
+    for sink in _get_sinks():
+        sink.timing(stage, duration, tags)
+
+
+def count(name, value=1, **tags):
+    """
+    Add value to a counter.
+    """
+    if not _is_enabled(counted):
+        return
+
+    counted.send(sender=None, name=name, value=value, tags=tags)
+    for sink in _get_sinks():
+        sink.increment(name, value, tags)
+
+
+def get_dimensions(size):
+    """
+    Return the tag value of a (width, height) size.
+    """
+    return "%ix%i" % tuple(size)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResizedVariant',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False,
+                                        auto_created=True,
+                                        primary_key=True)),
+                ('storage', models.CharField(max_length=255)),
+                ('source_name', models.CharField(max_length=255)),
+                ('source_version', models.CharField(max_length=64,
+                                                    blank=True)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('crop', models.BooleanField(default=False)),
+                ('namespace', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.PositiveIntegerField(null=True,
+                                                     blank=True)),
+                ('pixel_width', models.PositiveIntegerField(null=True,
+                                                            blank=True)),
+                ('pixel_height', models.PositiveIntegerField(null=True,
+                                                             blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('accessed', models.DateTimeField(
+                    default=django.utils.timezone.now)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+    ]
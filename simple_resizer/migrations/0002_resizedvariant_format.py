@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simple_resizer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resizedvariant',
+            name='format',
+            field=models.CharField(default='', max_length=16, blank=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simple_resizer', '0002_resizedvariant_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resizedvariant',
+            name='profile',
+            field=models.CharField(default='', max_length=64, blank=True),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import models, migrations
+from django.utils.encoding import force_bytes
+from django.utils.encoding import force_text
+
+
+SPEC_FIELDS = ('storage', 'source_name', 'width', 'height', 'crop',
+               'namespace', 'format', 'profile')
+
+
+def set_keys(apps, schema_editor):
+    ResizedVariant = apps.get_model('simple_resizer', 'ResizedVariant')
+
+    for variant in ResizedVariant.objects.all():
+        variant.key = hashlib.sha1(force_bytes('|'.join(
+            force_text(getattr(variant, field))
+            for field in SPEC_FIELDS))).hexdigest()
+        variant.save(update_fields=['key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simple_resizer', '0003_resizedvariant_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resizedvariant',
+            name='key',
+            field=models.CharField(max_length=40, null=True),
+            preserve_default=True,
+        ),
+        migrations.RunPython(set_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='resizedvariant',
+            name='key',
+            field=models.CharField(unique=True, max_length=40),
+            preserve_default=True,
+        ),
+    ]
@@ -1,4 +1,150 @@
 """
-This file must be present for django integration but does not contain any
-models.
+Index of the generated variants
+
+Lets resize_lazy resolve variants with a database query instead of asking
+the storage. Only used when SIMPLE_RESIZER_INDEX is enabled.
 """
+
+import datetime
+import hashlib
+
+from django.db import models
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.encoding import force_text
+from django.utils.encoding import python_2_unicode_compatible
+
+
+# Do not write the access time on every hit
+ACCESS_RESOLUTION = datetime.timedelta(days=1)
+
+# The fields of a spec, in the order they are hashed
+SPEC_FIELDS = ("storage", "source_name", "width", "height", "crop",
+               "namespace", "format", "profile")
+
+
+def get_spec_key(spec):
+    """
+    Return the sha1 hex digest identifying a spec.
+    """
+    return hashlib.sha1(force_bytes("|".join(
+        force_text(spec[field]) for field in SPEC_FIELDS))).hexdigest()
+
+
+class ResizedVariantManager(models.Manager):
+    """
+    Lookup and record variants by their spec.
+
+    A spec holds the storage, source_name, width, height, crop, namespace,
+    format and profile fields, which identify a variant.
+    """
+    def lookup(self, **spec):
+        """
+        Return the variant for a spec, or None if it does not exist.
+        """
+        try:
+            variant = self.get(key=get_spec_key(spec))
+        except self.model.DoesNotExist:
+            return None
+
+        variant.touch()
+        return variant
+
+    def lookup_many(self, specs):
+        """
+        Return the variants for many specs with a single query, None for the
+        ones that do not exist.
+        """
+        if not specs:
+            return []
+
+        keys = [get_spec_key(spec) for spec in specs]
+        variants = dict((variant.key, variant)
+                        for variant in self.filter(key__in=set(keys)))
+
+        found = [variants.get(key) for key in keys]
+
+        now = timezone.now()
+        outdated = [variant.pk for variant in found if variant is not None and
+                    now - variant.accessed >= ACCESS_RESOLUTION]
+
+        if outdated:
+            self.filter(pk__in=outdated).update(accessed=now)
+
+        return found
+
+    def record(self, source_version, name, resized_image=None, **spec):
+        """
+        Create or update the variant for a spec.
+
+        The size and dimensions are taken from resized_image when given.
+        """
+        values = {
+            "source_version": source_version,
+            "name": name,
+            "size": None,
+            "pixel_width": None,
+            "pixel_height": None,
+            "accessed": timezone.now(),
+        }
+
+        if resized_image is not None:
+            values.update(size=resized_image.size,
+                          pixel_width=resized_image.width,
+                          pixel_height=resized_image.height)
+
+        values.update(spec)
+        variant, created = self.get_or_create(defaults=values,
+                                              key=get_spec_key(spec))
+
+        if not created:
+            for field, value in values.items():
+                setattr(variant, field, value)
+
+            variant.save()
+
+        return variant
+
+
+@python_2_unicode_compatible
+class ResizedVariant(models.Model):
+    """
+    A resized version of a source image
+    """
+    # Unique in place of the spec, which is too long for a unique index on
+    # some databases
+    key = models.CharField(max_length=40, unique=True)
+    storage = models.CharField(max_length=255)
+    source_name = models.CharField(max_length=255)
+    source_version = models.CharField(max_length=64, blank=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    crop = models.BooleanField(default=False)
+    namespace = models.CharField(max_length=255)
+    # Empty for the format of the source
+    format = models.CharField(max_length=16, blank=True, default="")
+    # Empty for the default encoder profile
+    profile = models.CharField(max_length=64, blank=True, default="")
+    name = models.CharField(max_length=255)
+    size = models.PositiveIntegerField(null=True, blank=True)
+    pixel_width = models.PositiveIntegerField(null=True, blank=True)
+    pixel_height = models.PositiveIntegerField(null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    accessed = models.DateTimeField(default=timezone.now)
+
+    objects = ResizedVariantManager()
+
+    def __str__(self):
+        return self.name
+
+    def touch(self):
+        """
+        Update the access time if it is outdated.
+        """
+        now = timezone.now()
+
+        if now - self.accessed < ACCESS_RESOLUTION:
+            return
+
+        self.accessed = now
+        type(self).objects.filter(pk=self.pk).update(accessed=now)
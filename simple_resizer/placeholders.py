@@ -0,0 +1,208 @@
+"""
+Tiny placeholders to inline while the image loads
+
+A placeholder is a blurred thumbnail of a few pixels as a data uri, for the
+browser to scale up, or a blurhash string, for a client side decoder. Both
+are made from a tiny resize, which decodes the source at a reduced scale
+where the format allows, and are remembered per source version in the
+process and through the variant cache. Rendering a placeholder again costs
+no storage call.
+"""
+
+import base64
+import math
+
+from PIL import Image
+
+from . import resize
+from .conf import get_setting
+from .formats import FORMATS
+from .formats import get_format
+from .geometry import get_spec_size
+from .probe import get_size
+from .sources import memoize
+
+
+BASE83 = ("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+          "#$%*+,-.:;=?@[]^_{|}~")
+
+# Pixels on the longest side of the image a blurhash is computed from
+BLURHASH_SIZE = 32
+
+
+def _resize_tiny(image, size, output_format, quality=None, blur=None):
+    """
+    Return the image resized to size pixels on its longest side, blurred by
+    a radius of blur pixels.
+    """
+    image_size = get_size(image)
+
+    if image_size[0] >= image_size[1]:
+        width, height = get_spec_size(image_size, size, None)
+    else:
+        width, height = get_spec_size(image_size, None, size)
+
+    profile = {}
+
+    if quality:
+        profile["quality"] = quality
+
+    if blur:
+        profile["blur"] = blur
+
+    return resize(image, max(1, width), max(1, height),
+                  output_format=output_format, profile=profile or None)
+
+
+def _get_data_uri(image, size):
+    """
+    Return a tiny blurred thumbnail of image as a data uri.
+    """
+    # Keep transparency
+    if get_format(image.name or "") in ("png", "gif"):
+        output_format = "png"
+    else:
+        output_format = "jpeg"
+
+    resized_image = _resize_tiny(image, size, output_format,
+                                 get_setting("PLACEHOLDER_QUALITY"),
+                                 get_setting("PLACEHOLDER_BLUR"))
+
+    try:
+        data = resized_image.read()
+    finally:
+        resized_image.close()
+
+    return "data:%s;base64,%s" % (FORMATS[output_format][1],
+                                  base64.b64encode(data).decode("ascii"))
+
+
+def _encode_base83(value, length):
+    """
+    Return value in length base 83 digits.
+    """
+    return "".join(BASE83[value // 83 ** (length - idx - 1) % 83]
+                   for idx in range(length))
+
+
+def _to_linear(value):
+    """
+    Return an sRGB channel value of 0 to 255 in linear light.
+    """
+    value /= 255.0
+
+    if value <= 0.04045:
+        return value / 12.92
+
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    """
+    Return a linear light value as an sRGB channel value of 0 to 255.
+    """
+    value = max(0.0, min(1.0, value))
+
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _quantize(value):
+    """
+    Return an AC component value of -1 to 1 quantized to 0 to 18.
+    """
+    value = math.copysign(abs(value) ** 0.5, value)
+    return int(max(0, min(18, math.floor(value * 9 + 9.5))))
+
+
+def encode_blurhash(pixels, width, height, components=(4, 3)):
+    """
+    Return the blurhash of RGB pixels, given row by row, of an image of
+    width and height, with (x, y) components.
+    """
+    components_x, components_y = components
+    linear = [tuple(_to_linear(channel) for channel in pixel)
+              for pixel in pixels]
+
+    factors = []
+    for component_y in range(components_y):
+        for component_x in range(components_x):
+            normalization = 1.0 if component_x == component_y == 0 else 2.0
+            basis_x = [math.cos(math.pi * component_x * x / width)
+                       for x in range(width)]
+            basis_y = [math.cos(math.pi * component_y * y / height)
+                       for y in range(height)]
+            factor = [0.0, 0.0, 0.0]
+
+            for y in range(height):
+                for x in range(width):
+                    basis = basis_x[x] * basis_y[y]
+                    pixel = linear[y * width + x]
+                    factor[0] += basis * pixel[0]
+                    factor[1] += basis * pixel[1]
+                    factor[2] += basis * pixel[2]
+
+            scale = normalization / (width * height)
+            factors.append([channel * scale for channel in factor])
+
+    dc, ac = factors[0], factors[1:]
+    blurhash = _encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(channel) for factor in ac for channel in factor)
+        quantized_max = int(max(0, min(82, math.floor(actual_max * 166 -
+                                                      0.5))))
+        max_value = (quantized_max + 1) / 166.0
+        blurhash += _encode_base83(quantized_max, 1)
+    else:
+        max_value = 1.0
+        blurhash += _encode_base83(0, 1)
+
+    blurhash += _encode_base83((_to_srgb(dc[0]) << 16) +
+                               (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+
+    for factor in ac:
+        red, green, blue = [_quantize(channel / max_value)
+                            for channel in factor]
+        blurhash += _encode_base83(red * 19 * 19 + green * 19 + blue, 2)
+
+    return blurhash
+
+
+def _get_blurhash(image, components):
+    """
+    Return the blurhash of image.
+    """
+    # Lossless, so the hash only depends on the scaling
+    resized_image = _resize_tiny(image, BLURHASH_SIZE, "png")
+
+    try:
+        pixels = Image.open(resized_image).convert("RGB")
+        return encode_blurhash(list(pixels.getdata()), pixels.size[0],
+                               pixels.size[1], components)
+    finally:
+        resized_image.close()
+
+
+def placeholder(image, kind="data_uri", size=None, components=(4, 3)):
+    """
+    Return the placeholder of image.
+
+    kind is "data_uri" for a thumbnail of size pixels on its longest side,
+    SIMPLE_RESIZER_PLACEHOLDER_SIZE by default, or "blurhash" for a hash
+    with (x, y) components.
+    """
+    if kind == "data_uri":
+        size = size or get_setting("PLACEHOLDER_SIZE")
+        return memoize("placeholder:data_uri:%i" % size, image,
+                       lambda image, version: _get_data_uri(image, size))
+
+    if kind == "blurhash":
+        return memoize("placeholder:blurhash:%ix%i" % tuple(components),
+                       image,
+                       lambda image, version: _get_blurhash(image,
+                                                            components))
+
+    raise ValueError("Unknown placeholder kind %r." % kind)
@@ -0,0 +1,151 @@
+"""
+Header only image metadata
+
+Reads the dimensions, format and exif orientation of a source from the first
+bytes of the file, without decoding any pixels. Results are remembered per
+source version, so a remote source is not downloaded again to learn its
+aspect ratio.
+"""
+
+import threading
+import warnings
+
+from collections import namedtuple
+from io import BytesIO
+
+from .conf import get_setting
+from .sources import memoize
+
+
+# Formats that keep their exif data before the pixels
+ORIENTED_FORMATS = ("JPEG", "MPO", "TIFF", "WEBP")
+
+# Held while the pillow pixel limit is lifted
+_BOMB_LOCK = threading.Lock()
+
+
+class ImageInfo(namedtuple("ImageInfo",
+                           ("width", "height", "format", "orientation"))):
+    """
+    What the header of an image tells about it.
+    """
+    __slots__ = ()
+
+    @property
+    def size(self):
+        """
+        Return the (width, height) of the image once oriented.
+        """
+        if self.orientation > 4:
+            # Rotated by 90 degrees
+            return (self.height, self.width)
+
+        return (self.width, self.height)
+
+
+def _parse(data):
+    """
+    Return the ImageInfo of the header in data, or None if it is incomplete
+    or not an image.
+    """
+    try:
+        from PIL import Image
+        from .engines.pillow_engine import get_orientation
+    except ImportError:
+        return None
+
+    # Pillow < 5 only warns, which may be turned into errors
+    bomb_errors = tuple(
+        getattr(Image, name) for name in ("DecompressionBombError",
+                                          "DecompressionBombWarning")
+        if hasattr(Image, name))
+
+    try:
+        try:
+            b_image = Image.open(BytesIO(data))
+        except bomb_errors:
+            b_image = _open_bomb(data)
+    except (IOError, SyntaxError, ValueError, IndexError, TypeError):
+        return None
+
+    orientation = 1
+    if b_image.format in ORIENTED_FORMATS:
+        orientation = get_orientation(b_image)
+
+    return ImageInfo(b_image.size[0], b_image.size[1], b_image.format,
+                     orientation if orientation in range(1, 9) else 1)
+
+
+def _open_bomb(data):
+    """
+    Open an image that pillow takes for a decompression bomb. Only the
+    header is read, check_size refuses it by the limits of the resizer.
+    """
+    from PIL import Image
+
+    with _BOMB_LOCK, warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+
+        try:
+            return Image.open(BytesIO(data))
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def _probe(image, version):  # pylint: disable=W0613
+    """
+    Read the header of the image, at most SIMPLE_RESIZER_PROBE_BYTES at
+    first and up to SIMPLE_RESIZER_PROBE_MAX_BYTES if the header is larger.
+    """
+    try:
+        is_closed = image.closed
+
+        if is_closed:
+            image.open()
+    except (AttributeError, ValueError, IOError, OSError):
+        return None
+
+    try:
+        position = image.tell()
+        image.seek(0)
+
+        data = b""
+        info = None
+        for limit in (get_setting("PROBE_BYTES"),
+                      get_setting("PROBE_MAX_BYTES")):
+            chunk = image.read(limit - len(data))
+            data += chunk
+            info = _parse(data)
+
+            if info is not None or len(data) < limit:
+                break
+
+        image.seek(position)
+        return info
+    except (AttributeError, ValueError, IOError, OSError):
+        return None
+    finally:
+        if is_closed:
+            image.close()
+
+
+def probe(image):
+    """
+    Return the ImageInfo of a source, or None if its header can not be read.
+    """
+    return memoize("probe", image, _probe)
+
+
+def get_size(image):
+    """
+    Return the (width, height) of a source once oriented. Falls back to the
+    dimensions django reports for it if the header can not be read.
+    """
+    info = probe(image)
+
+    if info is not None:
+        return info.size
+
+    return (image.width, image.height)
@@ -0,0 +1,77 @@
+"""
+Encoder profiles
+
+A profile holds the encoder options per output format. The options are
+merged over SIMPLE_RESIZER_ENCODING, the default profile, and are:
+
+    quality         1-100, for jpeg, webp and avif
+    progressive     progressive jpeg or interlaced png
+    sampling        chroma subsampling of jpeg: "4:2:0", "4:2:2" or "4:4:4"
+    optimize        optimize the jpeg huffman tables or the png encoding
+    compress_level  zlib level of png, 0-9
+    filter          png filter type, 0-5
+    colors          quantize png and gif to a palette of this many colors
+    blur            gaussian blur radius in pixels, applied before encoding
+
+Engines ignore the options they do not support. Variants encoded with an
+other than the default profile get the profile in their name, so variants of
+several profiles coexist.
+"""
+
+import hashlib
+
+from django.utils.encoding import force_bytes
+
+from .conf import get_setting
+
+
+def get_profile(profile=None):
+    """
+    Return the hashable form of a profile passed to the resize functions:
+    None for the default profile, the name of a SIMPLE_RESIZER_PROFILES
+    profile, or a dict of options that apply to every format. Returned forms
+    are returned as is.
+    """
+    if profile is None or profile == "default":
+        return None
+
+    if isinstance(profile, tuple):
+        return profile
+
+    if isinstance(profile, dict):
+        return tuple(sorted(profile.items())) or None
+
+    if profile not in get_setting("PROFILES"):
+        raise ValueError("Unknown encoder profile %r." % profile)
+
+    return profile
+
+
+def get_token(profile):
+    """
+    Return the part of the variant name identifying a profile returned by
+    get_profile, empty for the default profile.
+    """
+    if profile is None:
+        return ""
+
+    if isinstance(profile, tuple):
+        return "o%s" % hashlib.md5(force_bytes(repr(profile))).hexdigest()[:8]
+
+    return profile
+
+
+def get_options(profile, output_format):
+    """
+    Return the encoder options of a profile returned by get_profile for a
+    format of simple_resizer.formats.
+    """
+    options = dict(get_setting("ENCODING").get(output_format, {}))
+
+    if isinstance(profile, tuple):
+        options.update(profile)
+    elif profile is not None:
+        options.update(get_setting("PROFILES")[profile].get(output_format,
+                                                            {}))
+
+    return options
@@ -0,0 +1,15 @@
+"""
+Signals sent while resizing
+
+stage_timed is sent after each stage of the pipeline with its name, the
+duration in seconds and tags such as the source and target dimensions and
+the encoded bytes. counted is sent for counters such as cache hits.
+"""
+
+from django.dispatch import Signal
+
+
+# pylint: disable=C0103
+stage_timed = Signal(providing_args=["stage", "duration", "tags"])
+counted = Signal(providing_args=["name", "value", "tags"])
+# pylint: enable=C0103
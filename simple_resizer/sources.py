@@ -0,0 +1,277 @@
+"""
+Information about source images and the storages they live in
+"""
+
+import os
+import hashlib
+import threading
+import time
+
+from django.utils import six
+from django.utils.encoding import force_bytes
+from django.utils.encoding import force_text
+
+from .conf import get_setting
+from .utils import import_attribute
+
+
+# Values computed in this process, by kind, storage, name and version
+_MEMO = {}
+_MEMO_LOCK = threading.Lock()
+_MEMO_MAX = 10000
+
+# Versions of sources in storages without local paths, by storage and name,
+# with the time they expire
+_REMOTE_VERSIONS = {}
+
+
+def _get_storage(image):
+    """
+    Return the storage of an image, or None if it has none or holds an
+    upload that is not saved to it yet.
+    """
+    if not getattr(image, "_committed", True):
+        # The storage may hold an other file of the same name
+        return None
+
+    return getattr(image, "storage", None)
+
+
+def _get_storage_version(storage, name):
+    """
+    Return the modified time of a file in a storage, or its size if the
+    storage does not tell, or "" if neither is known.
+    """
+    # get_modified_time replaces modified_time as of Django 1.10
+    for method in ("get_modified_time", "modified_time"):
+        try:
+            return getattr(storage, method)(name).isoformat()
+        except (AttributeError, NotImplementedError, OSError, IOError):
+            pass
+
+    try:
+        return "%i" % storage.size(name)
+    except (NotImplementedError, OSError, IOError):
+        return ""
+
+
+def _get_remote_version(storage, name):
+    """
+    Return the version of a source in a storage without local paths,
+    remembered for SIMPLE_RESIZER_REMOTE_VERSION_TIMEOUT seconds.
+    """
+    timeout = get_setting("REMOTE_VERSION_TIMEOUT")
+
+    if not timeout:
+        return _get_storage_version(storage, name)
+
+    key = (get_storage_key(storage), name)
+    now = time.time()
+    entry = _REMOTE_VERSIONS.get(key)
+
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    version = _get_storage_version(storage, name)
+
+    with _MEMO_LOCK:
+        if len(_REMOTE_VERSIONS) >= _MEMO_MAX:
+            _REMOTE_VERSIONS.clear()
+
+        _REMOTE_VERSIONS[key] = (now + timeout, version)
+
+    return version
+
+
+def get_file_version(image):
+    """
+    Return a marker that changes when the source file changes, or "" if it
+    can not be told.
+
+    Local files are versioned by their modified time and size. Sources in a
+    storage without local paths are asked for their modified time, which
+    is remembered for a while, so a replaced source may take up to
+    SIMPLE_RESIZER_REMOTE_VERSION_TIMEOUT seconds to get new variants.
+    """
+    storage = _get_storage(image)
+
+    try:
+        if storage is not None:
+            stat = os.stat(storage.path(image.name))
+        else:
+            stat = os.fstat(image.fileno())
+    except NotImplementedError:
+        return _get_remote_version(storage, image.name)
+    except (AttributeError, ValueError, OSError, IOError):
+        return ""
+
+    return "%i-%i" % (int(stat.st_mtime), stat.st_size)
+
+
+def get_source_path(image):
+    """
+    Return the path of a source on the local filesystem, or None if it does
+    not live there, so decoders can read it without a copy in memory.
+    """
+    if not getattr(image, "_committed", True):
+        # Only named after where it will be saved
+        return None
+
+    storage = getattr(image, "storage", None)
+
+    try:
+        if storage is not None:
+            path = storage.path(image.name)
+        else:
+            path = getattr(getattr(image, "file", image), "name", None)
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+
+    if not isinstance(path, six.string_types) or not os.path.isfile(path):
+        return None
+
+    return os.path.abspath(path)
+
+
+def get_source_version(image):
+    """
+    Return the version marker of a source with the configured callable.
+    """
+    return import_attribute(get_setting("SOURCE_VERSION"))(image)
+
+
+def _get_storage_identity(storage):
+    """
+    Return the settings that tell a storage apart from other instances of
+    its class: its constructor arguments and where it keeps its files.
+    """
+    settings = {}
+
+    deconstruct = getattr(storage, "deconstruct", None)
+    if deconstruct is not None:
+        _, args, kwargs = deconstruct()
+        settings.update(("arg%i" % idx, value)
+                        for idx, value in enumerate(args))
+        settings.update(kwargs)
+
+    for attribute in ("location", "base_url"):
+        value = getattr(storage, attribute, None)
+
+        if value is not None:
+            settings[attribute] = value
+
+    return "|".join("%s=%s" % (key, force_text(value))
+                    for key, value in sorted(settings.items()))
+
+
+def get_storage_key(storage):
+    """
+    Return a string identifying a storage, so instances of a class that keep
+    their files elsewhere do not share cache entries, index rows or locks.
+    """
+    key = "%s.%s" % (storage.__class__.__module__,
+                     storage.__class__.__name__)
+    identity = _get_storage_identity(storage)
+
+    if not identity:
+        return key
+
+    # Bounded, the index stores it in a column of 255 characters
+    return "%s:%s" % (key, hashlib.md5(force_bytes(identity)).hexdigest())
+
+
+def _get_digest(image):
+    """
+    Return the sha1 hex digest of the content of an image, keeping its
+    position.
+    """
+    is_closed = image.closed
+
+    if is_closed:
+        image.open()
+
+    try:
+        position = image.tell()
+        digest = hashlib.sha1()
+
+        for chunk in image.chunks():
+            digest.update(chunk)
+
+        image.seek(position)
+    finally:
+        if is_closed:
+            image.close()
+
+    return digest.hexdigest()
+
+
+def memoize(kind, image, compute):
+    """
+    Return compute(image, version) for a source. The value is computed once
+    per process and source version, and is shared through the variant cache
+    if enabled. None values, and values of sources without a version, are
+    not remembered.
+    """
+    if not getattr(image, "name", None):
+        # Nothing to remember it by
+        return compute(image, "")
+
+    storage = getattr(image, "storage", None)
+    version = get_source_version(image)
+
+    if not version:
+        # A replaced source could not be told apart
+        return compute(image, version)
+
+    key = "|".join((kind, get_storage_key(storage) if storage else "",
+                    image.name, version))
+
+    try:
+        return _MEMO[key]
+    except KeyError:
+        pass
+
+    # Imported here, the cache module imports this module
+    from . import cache
+
+    cache_key = cache.get_source_key(key)
+    value = cache.get_source_value(cache_key)
+
+    if value is None:
+        value = compute(image, version)
+
+        if value is None:
+            return None
+
+        cache.set_source_value(cache_key, value)
+
+    with _MEMO_LOCK:
+        if len(_MEMO) >= _MEMO_MAX:
+            _MEMO.clear()
+
+        _MEMO[key] = value
+
+    return value
+
+
+def _compute_token(image, version):
+    """
+    Compute the token of a source.
+    """
+    if get_setting("NAMING_TOKEN") == "version" and version:
+        token = hashlib.md5(force_bytes(version)).hexdigest()
+    else:
+        token = _get_digest(image)
+
+    return token[:get_setting("NAMING_TOKEN_LENGTH")]
+
+
+def get_source_token(image):
+    """
+    Return a short token that changes when the source changes.
+
+    Depending on SIMPLE_RESIZER_NAMING_TOKEN it is derived from the content
+    ("digest") or from the version marker ("version"), falling back to the
+    content if the source has no version marker.
+    """
+    return memoize("token", image, _compute_token)
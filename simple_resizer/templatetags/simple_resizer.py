@@ -3,37 +3,128 @@ Resizing template tags
 """
 
 from django import template
+from django.utils import six
 
 from .. import resize_lazy
+from .. import resize_lazy_many
+from .. import resize_srcset as get_srcset
+from ..placeholders import placeholder as get_placeholder
+from ..probe import get_size
+from ..views import resize_url as get_resize_url
 
 register = template.Library()  # pylint: disable=C0103
 
 
-@register.simple_tag
-def resize(image, width=None, height=None, crop=False, namespace="resized"):
+def _get_accept(context):
+    """
+    Return the Accept header of the request being rendered, if known.
+    """
+    request = context.get("request")
+
+    if request is None:
+        return None
+
+    return request.META.get("HTTP_ACCEPT")
+
+
+# pylint: disable=R0913
+@register.simple_tag(takes_context=True)
+def resize(context, image, width=None, height=None, crop=False,
+           namespace="resized", mode=None, output_format=None, profile=None):
     """
     Returns the url of the resized image
+
+    With output_format="auto" the format is picked with the Accept header of
+    the request in the context.
     """
     return resize_lazy(image=image, width=width, height=height, crop=crop,
-                       namespace=namespace, as_url=True)
+                       namespace=namespace, as_url=True, mode=mode,
+                       output_format=output_format,
+                       accept=_get_accept(context), profile=profile)
 
 
-# pylint: disable=R0913
 @register.simple_tag
-def conditional_resize(image, ratio, width=None, height=None, upcrop=True,
-                       namespace="resized"):
+def resize_url(image, width=None, height=None, crop=False,
+               namespace="resized", output_format=None, profile=None):
+    """
+    Returns the signed url of the resize view for the image, the variant is
+    generated when that url is requested
+    """
+    return get_resize_url(image, width=width, height=height, crop=crop,
+                          namespace=namespace, output_format=output_format,
+                          profile=profile)
+
+
+@register.simple_tag(takes_context=True)
+def conditional_resize(context, image, ratio, width=None, height=None,
+                       upcrop=True, namespace="resized", mode=None,
+                       output_format=None, profile=None):
     """
     Crop the image based on a ratio
 
     If upcrop is true, crops the images that have a higher ratio than the given
     ratio, if false crops the images that have a lower ratio
     """
-    aspect = float(image.width) / float(image.height)
+    image_width, image_height = get_size(image)
+    aspect = float(image_width) / float(image_height)
     crop = False
 
     if (aspect > ratio and upcrop) or (aspect <= ratio and not upcrop):
         crop = True
 
     return resize_lazy(image=image, width=width, height=height, crop=crop,
-                       namespace=namespace, as_url=True)
+                       namespace=namespace, as_url=True, mode=mode,
+                       output_format=output_format,
+                       accept=_get_accept(context), profile=profile)
+
+
+@register.assignment_tag(takes_context=True)
+def resize_many(context, images, width=None, height=None, crop=False,
+                namespace="resized", mode=None, output_format=None,
+                profile=None):
+    """
+    Resolves the urls of many resized images in one batch
+
+    Returns a list of (image, url) tuples, to be used as:
+
+        {% resize_many images width=300 as thumbnails %}
+        {% for image, url in thumbnails %}...{% endfor %}
+    """
+    images = list(images)
+    urls = resize_lazy_many([(image, width, height, crop, namespace)
+                             for image in images], as_url=True, mode=mode,
+                            output_format=output_format,
+                            accept=_get_accept(context), profile=profile)
+    return list(zip(images, urls))
+
+
+@register.simple_tag(takes_context=True)
+def resize_srcset(context, image, widths, crop=None, namespace="resized",
+                  mode=None, output_format=None, profile=None):
+    """
+    Returns the srcset of the image resized to many widths at once
+
+        <img srcset="{% resize_srcset image widths="320,640,960" %}">
+
+    widths is a comma separated string or a list, crop an aspect ratio such
+    as "16:9" to crop each width to.
+    """
+    if isinstance(widths, six.string_types):
+        widths = [width for width in widths.split(",") if width.strip()]
+
+    return get_srcset(image, widths, crop=crop, namespace=namespace,
+                      mode=mode, output_format=output_format,
+                      accept=_get_accept(context), profile=profile)
 # pylint: enable=R0913
+
+
+@register.simple_tag
+def placeholder(image, kind="data_uri", size=None):
+    """
+    Returns the placeholder of the image, to inline in the page
+
+        <img src="{% placeholder image %}" data-src="{% resize image 300 %}">
+
+    kind is "data_uri" for a tiny thumbnail or "blurhash".
+    """
+    return get_placeholder(image, kind=kind, size=size)
@@ -5,8 +5,11 @@ Test for the gallery.utils.render module
 import os
 import shutil
 
+from io import BytesIO
+
 from django.core.files.images import ImageFile
 from django.core.files.storage import default_storage
+from PIL import Image
 
 from ..utils.test import ResizerTestCase
 import simple_resizer as resize
@@ -89,6 +92,59 @@ class ResizeTest(ResizerTestCase):
             self.assertResizeCrop(image, 300, 300)
             self.assertLessEqual(image.size, self.image_2.size)
 
+    def test_file_resize_many(self):
+        """
+        Test resizing to many sizes at once
+        """
+        specs = [(600, 300), (300, 300, True), (100, None, False)]
+        resized_images = resize.resize_many(self.image_1, specs)
+
+        try:
+            self.assertEqual(sorted(resized_images.keys()), sorted(specs))
+
+            for spec in specs:
+                with resize.resized(self.image_1, *spec) as image:
+                    self.assertEqual(
+                        (resized_images[spec].width,
+                         resized_images[spec].height),
+                        (image.width, image.height))
+        finally:
+            for image in resized_images.values():
+                image.close()
+
+    def test_file_resize_many_crop_and_fit(self):
+        """
+        Variants are not resized from the cropped ones, which lost part of
+        the image
+        """
+        # Red at the top, blue at the bottom, both cropped away by 800x400
+        bands = Image.new("RGB", (1000, 1000), (0, 255, 0))
+        bands.paste((255, 0, 0), (0, 0, 1000, 150))
+        bands.paste((0, 0, 255), (0, 850, 1000, 1000))
+        source = BytesIO()
+        bands.save(source, "png")
+        image = ImageFile(source, name="bands.png")
+
+        specs = [(800, 400, True), (300, 100), (200, 300, True)]
+        resized_images = resize.resize_many(image, specs)
+
+        try:
+            for spec in specs[1:]:
+                pixels = Image.open(resized_images[spec]).convert("RGB")
+                width, height = pixels.size
+
+                self.assertEqual(height, 100 if spec == (300, 100) else 300)
+
+                # Within the tolerance of the resampling filters
+                for position, color in (((width // 2, 2), (255, 0, 0)), (
+                        (width // 2, height - 3), (0, 0, 255))):
+                    self.assertLessEqual(max(
+                        abs(value - expected) for value, expected in zip(
+                            pixels.getpixel(position), color)), 8, spec)
+        finally:
+            for resized_image in resized_images.values():
+                resized_image.close()
+
     def test_file_resize_lazy(self):
         """
         Test a lazy resize for:
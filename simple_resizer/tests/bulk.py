@@ -0,0 +1,132 @@
+"""
+Test resolving many variants at once
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.template import Context
+from django.template import Template
+from django.test.utils import override_settings
+
+from ..utils.test import CountingStorage
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+class ResizeLazyManyTest(ResizerTestCase):
+    """
+    Test resize_lazy_many
+    """
+    def setUp(self):
+        """
+        Open the images
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_files = [
+            open(os.path.join(self.assets_folder, name), "rb")
+            for name in ("image-1.jpg", "image-2.png")]
+        self.images = [ImageFile(image_file)
+                       for image_file in self.image_files]
+        self.storage = CountingStorage(base_url="/media/")
+
+    def tearDown(self):
+        """
+        Close the images and remove the variants
+        """
+        for image_file in self.image_files:
+            image_file.close()
+
+        self.remove_dirs(("resized", "thumbs"))
+
+    def test_same_as_resize_lazy(self):
+        """
+        The names match those of resize_lazy, in input order
+        """
+        items = [(self.images[0], 300, 300), (self.images[1], 200),
+                 (self.images[0], 100, 100, True, "thumbs")]
+        names = resize.resize_lazy_many(items, storage=self.storage)
+
+        self.assertEqual(names, [
+            resize.resize_lazy(*item, storage=self.storage)
+            for item in ((self.images[0], 300, 300), (self.images[1], 200))
+        ] + [resize.resize_lazy(self.images[0], 100, 100, True,
+                                namespace="thumbs", storage=self.storage)])
+
+    def test_existing(self):
+        """
+        Existing variants are found without testing each one
+        """
+        items = [(self.images[0], 300, 300), (self.images[1], 300, 300)]
+        names = resize.resize_lazy_many(items, storage=self.storage)
+        calls = dict(self.storage.calls)
+
+        self.assertEqual(resize.resize_lazy_many(items, storage=self.storage),
+                         names)
+        self.assertEqual(self.storage.calls, calls)
+
+    def test_duplicates(self):
+        """
+        A variant requested twice is generated once
+        """
+        items = [(self.images[0], 300, 300), (self.images[0], 300, 300)]
+        names = resize.resize_lazy_many(items, storage=self.storage)
+
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(self.storage.calls["save"], 1)
+
+    def test_force(self):
+        """
+        Forced variants replace the existing ones
+        """
+        items = [(self.images[0], 300, 300), (self.images[1], 300, 300)]
+        names = resize.resize_lazy_many(items, storage=self.storage)
+
+        self.assertEqual(resize.resize_lazy_many(items, force=True,
+                                                 storage=self.storage),
+                         names)
+        self.assertEqual(self.storage.calls["save"], 4)
+
+    @override_settings(SIMPLE_RESIZER_INDEX=True)
+    def test_index(self):
+        """
+        Indexed variants are resolved without the storage
+        """
+        items = [(self.images[0], 300, 300), (self.images[1], 300, 300)]
+        names = resize.resize_lazy_many(items, storage=self.storage)
+        calls = dict(self.storage.calls)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                resize.resize_lazy_many(items, storage=self.storage), names)
+
+        self.assertEqual(self.storage.calls, calls)
+
+    def test_as_url(self):
+        """
+        Urls are returned in input order
+        """
+        items = [(self.images[0], 300, 300), (self.images[1], 300, 300)]
+        urls = resize.resize_lazy_many(items, storage=self.storage,
+                                       as_url=True)
+
+        self.assertEqual(urls, [
+            self.storage.url(name)
+            for name in resize.resize_lazy_many(items, storage=self.storage)])
+
+    def test_template_tag(self):
+        """
+        The tag pairs every image with its url
+        """
+        template = Template(
+            "{% load resize_many from simple_resizer %}"
+            "{% resize_many images width=300 height=300 as thumbnails %}"
+            "{% for image, url in thumbnails %}{{ url }}|{% endfor %}")
+        rendered = template.render(Context({"images": self.images}))
+
+        self.assertEqual(rendered.split("|")[:-1], [
+            default_storage.url(resize.resize_lazy(image, 300, 300))
+            for image in self.images])
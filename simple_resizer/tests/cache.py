@@ -0,0 +1,102 @@
+"""
+Test the cache of resolved variants
+"""
+
+import os
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..utils.test import CountingStorage
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(SIMPLE_RESIZER_CACHE="default")
+class ResizeLazyCacheTest(ResizerTestCase):
+    """
+    Test resize_lazy with the cache enabled
+    """
+    def setUp(self):
+        """
+        Open the image and clear the cache
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+        self.storage = CountingStorage(base_url="/media/")
+        cache.clear()
+
+    def tearDown(self):
+        """
+        Close the image and remove the variants
+        """
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def test_cache_hit(self):
+        """
+        A cached variant does not touch the storage
+        """
+        url = resize.resize_lazy(self.image, 300, 300, storage=self.storage,
+                                 as_url=True)
+        calls = dict(self.storage.calls)
+
+        self.assertEqual(resize.resize_lazy(self.image, 300, 300,
+                                            storage=self.storage,
+                                            as_url=True), url)
+        self.assertEqual(self.storage.calls, calls)
+
+    def test_cache_name_then_url(self):
+        """
+        A cached name still resolves its url without an exists check
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        exists_calls = self.storage.calls["exists"]
+        url = resize.resize_lazy(self.image, 300, 300, storage=self.storage,
+                                 as_url=True)
+
+        self.assertEqual(url, self.storage.url(name))
+        self.assertEqual(self.storage.calls["exists"], exists_calls)
+
+    def test_force(self):
+        """
+        Forcing regenerates and replaces the cached entry
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        forced_name = resize.resize_lazy(self.image, 300, 300, force=True,
+                                         storage=self.storage)
+
+        self.assertEqual(self.storage.calls["save"], 2)
+        self.assertEqual(forced_name, name)
+        self.assertEqual(resize.resize_lazy(self.image, 300, 300,
+                                            storage=self.storage),
+                         forced_name)
+
+    def test_other_storage(self):
+        """
+        Instances of a storage class configured differently do not share
+        entries
+        """
+        resize.resize_lazy(self.image, 300, 300, storage=self.storage,
+                           as_url=True)
+        storage = CountingStorage(base_url="/other/")
+        resize.resize_lazy(self.image, 300, 300, storage=storage, as_url=True)
+
+        self.assertEqual(storage.calls["exists"], 1)
+        self.assertEqual(storage.calls["url"], 1)
+
+    @override_settings(SIMPLE_RESIZER_CACHE=None)
+    def test_cache_disabled(self):
+        """
+        Without a cache every call checks the storage
+        """
+        resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        exists_calls = self.storage.calls["exists"]
+        resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+
+        self.assertEqual(self.storage.calls["exists"], exists_calls + 1)
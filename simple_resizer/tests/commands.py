@@ -0,0 +1,247 @@
+"""
+Test the management commands
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from ..cache import get_cache_key
+from ..models import ResizedVariant
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+from .models import ResizeTestModel
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine")
+class ResizerWarmTest(ResizerTestCase):
+    """
+    Test the resizer_warm command
+    """
+    def setUp(self):
+        """
+        Locate the assets
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+
+    def tearDown(self):
+        """
+        Remove the variants
+        """
+        self.remove_dirs(("resized",))
+
+    def warm(self, *args, **options):
+        """
+        Run the command, returns its last report
+        """
+        output = StringIO()
+        call_command("resizer_warm", *args, stdout=output, **options)
+        return output.getvalue().strip().splitlines()[-1]
+
+    def test_field(self):
+        """
+        The variants of the files of a field are generated once
+        """
+        ResizeTestModel.objects.create(image="image-1.jpg")
+        ResizeTestModel.objects.create(image="")
+
+        report = self.warm("tests.ResizeTestModel.image",
+                           specs=["300x300", "200x200c", "x100"])
+
+        self.assertTrue(report.startswith("1/1 sources, 1 generated"))
+        for name in ("300x300", "200x200_cropped", "80x100"):
+            self.assertTrue(os.path.exists(os.path.join(
+                self.assets_folder, "resized", name, "image-1.jpg")))
+
+        report = self.warm("tests.ResizeTestModel.image", specs=["300x300"])
+
+        self.assertTrue(report.startswith("1/1 sources, 0 generated, "
+                                          "1 existing"))
+
+    def test_glob(self):
+        """
+        Globbed sources are generated by the workers and resumed from the
+        state
+        """
+        state = tempfile.NamedTemporaryFile(suffix=".state", delete=False)
+        state.close()
+        options = {
+            "specs": ["300x300"], "workers": 2, "state": state.name,
+            "storage": "django.core.files.storage.FileSystemStorage"}
+
+        try:
+            with override_settings(MEDIA_ROOT=self.assets_folder):
+                report = self.warm("*.png", **options)
+                resumed = self.warm("*", **options)
+
+            with open(state.name) as state_file:
+                self.assertEqual(state_file.read(),
+                                 "\timage-2.png\n\timage-1.jpg\n")
+        finally:
+            os.remove(state.name)
+
+        self.assertTrue(report.startswith("1/1 sources, 1 generated"))
+        self.assertTrue(os.path.exists(os.path.join(
+            self.assets_folder, "resized", "300x300", "image-2.png")))
+        # Neither the finished source nor the variants are globbed again
+        self.assertTrue(resumed.startswith("1/1 sources, 1 generated"))
+
+    def test_invalid(self):
+        """
+        Invalid arguments are refused
+        """
+        self.assertRaises(CommandError, self.warm, "*.jpg", specs=["300"])
+        self.assertRaises(CommandError, self.warm, "*.jpg", specs=["x"])
+        self.assertRaises(CommandError, self.warm, "*.jpg")
+        self.assertRaises(CommandError, self.warm, "*.jpg",
+                          specs=["300x300"], formats=["auto"])
+        self.assertRaises(CommandError, self.warm,
+                          "tests.ResizeTestModel.missing", specs=["300x300"])
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine")
+class ResizerGcTest(ResizerTestCase):
+    """
+    Test the resizer_gc command
+    """
+    def setUp(self):
+        """
+        Copy the assets to a storage and generate variants of them
+        """
+        self.media_root = tempfile.mkdtemp()
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        shutil.copytree(self.assets_folder,
+                        os.path.join(self.media_root, "photos"))
+        self.storage = FileSystemStorage(location=self.media_root)
+
+        for name in ("photos/image-1.jpg", "photos/image-2.png"):
+            source = ImageFile(self.storage.open(name))
+            source.name = name
+            resize.resize_lazy(source, 300, 300, storage=self.storage)
+            resize.resize_lazy(source, 200, 200, crop=True,
+                               storage=self.storage, output_format="webp")
+            source.close()
+
+    def tearDown(self):
+        """
+        Remove the storage
+        """
+        shutil.rmtree(self.media_root)
+
+    def collect(self, *args, **options):
+        """
+        Run the command, returns its report
+        """
+        output = StringIO()
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            call_command(
+                "resizer_gc", *args, stdout=output,
+                storage="django.core.files.storage.FileSystemStorage",
+                **options)
+
+        return output.getvalue().strip()
+
+    def test_collect(self):
+        """
+        Variants of deleted and replaced sources are deleted
+        """
+        self.storage.delete("photos/image-1.jpg")
+        # Replace the other source
+        path = self.storage.path("photos/image-2.png")
+        os.utime(path, (time.time() + 60, time.time() + 60))
+        size = sum(self.storage.size(name) for name in (
+            "photos/resized/300x300/image-1.jpg",
+            "photos/resized/200x200_cropped/image-1.jpg.webp",
+            "photos/resized/300x300/image-2.png",
+            "photos/resized/200x200_cropped/image-2.png.webp"))
+
+        self.assertEqual(self.collect(dry_run=True),
+                         "4 variants, 2 orphans, 2 stale, %i bytes "
+                         "reclaimable" % size)
+        self.assertTrue(self.storage.exists(
+            "photos/resized/300x300/image-1.jpg"))
+
+        self.assertEqual(self.collect("photos", batch_size=1),
+                         "4 variants, 2 orphans, 2 stale, %i bytes "
+                         "reclaimed" % size)
+        self.assertEqual(self.storage.listdir("photos/resized"), ([], []))
+
+    def test_keep(self):
+        """
+        Current variants are kept
+        """
+        self.assertEqual(self.collect(),
+                         "4 variants, 0 orphans, 0 stale, 0 bytes reclaimed")
+        self.assertEqual(self.collect("photos", namespaces=["other"]),
+                         "0 variants, 0 orphans, 0 stale, 0 bytes reclaimed")
+        self.assertRaises(CommandError, self.collect, "elsewhere")
+
+    @override_settings(SIMPLE_RESIZER_NAMING="versioned")
+    def test_versioned(self):
+        """
+        Variants of an other token than the current one are stale
+        """
+        source = ImageFile(self.storage.open("photos/image-1.jpg"))
+        source.name = "photos/image-1.jpg"
+        name = resize.resize_lazy(source, 300, 300, storage=self.storage)
+        source.close()
+        outdated = name.replace(os.path.basename(name), "image-1.0123abcd.jpg")
+        self.storage.save(outdated, self.storage.open(name))
+
+        # The plain variants are not requested with versioned names
+        self.assertTrue(self.collect().startswith(
+            "6 variants, 0 orphans, 5 stale"))
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(self.storage.exists(outdated))
+
+    @override_settings(SIMPLE_RESIZER_INDEX=True,
+                       SIMPLE_RESIZER_CACHE="default")
+    def test_indexed(self):
+        """
+        Indexed variants are matched back through the index, and leave the
+        cache when deleted
+        """
+        cache.clear()
+        source = ImageFile(self.storage.open("photos/image-1.jpg"))
+        source.name = "photos/image-1.jpg"
+        name = resize.resize_lazy(source, 300, 300, storage=self.storage)
+
+        # Saved aside under a name the storage made up
+        with self.storage.open(name) as variant_file:
+            moved = self.storage.save(name, variant_file)
+        self.storage.delete(name)
+        ResizedVariant.objects.filter(name=name).update(name=moved)
+        cache.clear()
+        self.assertEqual(resize.resize_lazy(source, 300, 300,
+                                            storage=self.storage), moved)
+        cache_key = get_cache_key(source, 300, 300, False, "resized",
+                                  self.storage)
+        source.close()
+
+        self.assertEqual(self.collect(),
+                         "4 variants, 0 orphans, 0 stale, 0 bytes reclaimed")
+        self.assertTrue(self.storage.exists(moved))
+        self.assertIsNotNone(cache.get(cache_key))
+
+        path = self.storage.path("photos/image-1.jpg")
+        os.utime(path, (time.time() + 60, time.time() + 60))
+
+        self.assertTrue(self.collect().startswith(
+            "4 variants, 0 orphans, 2 stale"))
+        self.assertFalse(self.storage.exists(moved))
+        self.assertFalse(ResizedVariant.objects.filter(name=moved).exists())
+        self.assertIsNone(cache.get(cache_key))
@@ -0,0 +1,98 @@
+"""
+Run the resize tests against every shipped engine
+
+The wand engine is the default and is covered by the main resize tests.
+"""
+
+import io
+import os
+import tempfile
+
+from PIL import Image
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+import simple_resizer.tests as resize_tests
+
+from ..engines import load_engine
+from ..engines.pillow_engine import PillowEngine
+
+
+PILLOW_ENGINE = "simple_resizer.engines.pillow_engine.PillowEngine"
+
+
+@override_settings(SIMPLE_RESIZER_ENGINE=PILLOW_ENGINE)
+class PillowEngineResizeTest(resize_tests.ResizeTest):
+    """
+    Repeat the resize tests with the pillow engine
+    """
+    pass
+
+
+class LoadEngineTest(SimpleTestCase):
+    """
+    Test the engine loading
+    """
+    def test_load_engine(self):
+        """
+        Engines are loaded by path and shared
+        """
+        engine = load_engine(PILLOW_ENGINE)
+        self.assertIs(engine, load_engine(PILLOW_ENGINE))
+
+    def test_load_invalid_engine(self):
+        """
+        An invalid path is a configuration error
+        """
+        with self.assertRaises(ImproperlyConfigured):
+            load_engine("simple_resizer.engines.DoesNotExist")
+
+
+class PillowEngineDecodeTest(SimpleTestCase):
+    """
+    Test the shrink on load decoding
+    """
+    def setUp(self):
+        """
+        Create a large jpeg
+        """
+        self.source = io.BytesIO()
+        Image.new("RGB", (3200, 2400)).save(self.source, format="JPEG")
+        self.source.seek(0)
+
+    def test_decode_draft(self):
+        """
+        The jpeg is decoded at a scale that still covers the hint
+        """
+        b_image = PillowEngine().decode(self.source, "jpg", size=(300, 300))
+        self.assertLess(b_image.size[0], 3200)
+        self.assertGreaterEqual(b_image.size[0], 300)
+        self.assertGreaterEqual(b_image.size[1], 300)
+
+    def test_decode_without_hint(self):
+        """
+        Without a hint the full image is decoded
+        """
+        b_image = PillowEngine().decode(self.source, "jpg")
+        self.assertEqual(b_image.size, (3200, 2400))
+
+    def test_close(self):
+        """
+        Closing an image decoded from a path closes its file
+        """
+        handle, path = tempfile.mkstemp(suffix=".jpg")
+
+        try:
+            with os.fdopen(handle, "wb") as source_file:
+                source_file.write(self.source.getvalue())
+
+            engine = PillowEngine()
+            b_image = engine.decode(path, "jpg")
+            source_file = b_image.fp
+            engine.close(b_image)
+
+            self.assertTrue(source_file.closed)
+        finally:
+            os.remove(path)
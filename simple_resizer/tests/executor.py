@@ -0,0 +1,84 @@
+"""
+Run the resize tests in the process pool
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from .. import executor
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+import simple_resizer.tests as resize_tests
+
+from . import get_test_directory
+
+
+def _die(*args):  # pylint: disable=W0613
+    """
+    Take the worker down like a crash would
+    """
+    os._exit(1)  # pylint: disable=W0212
+
+
+@override_settings(SIMPLE_RESIZER_EXECUTOR="process")
+class ProcessPoolResizeTest(resize_tests.ResizeTest):
+    """
+    Repeat the resize tests with the process pool
+    """
+    pass
+
+
+@override_settings(SIMPLE_RESIZER_EXECUTOR="process",
+                   SIMPLE_RESIZER_POOL_TIMEOUT=1)
+class ProcessPoolTimeoutTest(ResizerTestCase):
+    """
+    Test waiting for the process pool
+    """
+    def setUp(self):
+        """
+        Open the test image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+
+    def tearDown(self):
+        """
+        Close the test image
+        """
+        self.image_file.close()
+
+    # pylint: disable=W0212
+    def test_dead_worker(self):
+        """
+        A pool of which a worker died is restarted
+        """
+        # A pool of its own, the workers of which die
+        pool = executor._get_pool()[0]
+        executor._restart_pool(pool)
+        work = executor._work
+        executor._work = _die
+
+        try:
+            dead_pool = executor._get_pool()[0]
+            self.assertRaises(resize.ResizeTimeout, resize.resize,
+                              self.image, 100, 100)
+        finally:
+            executor._work = work
+
+        self.assertIsNot(executor._get_pool()[0], dead_pool)
+
+        with resize.resized(self.image, 100, 100) as resized_image:
+            self.assertResize(resized_image, 100, 100)
+    # pylint: enable=W0212
+
+    def test_time_limit(self):
+        """
+        Callers wait no longer than the time limit
+        """
+        with resize.limited(time=0):
+            self.assertRaises(resize.ResizeTimeout, resize.resize,
+                              self.image, 100, 100)
@@ -0,0 +1,96 @@
+"""
+Test the model fields with declared variants
+"""
+
+import os
+
+from django.core.files import File
+from django.test.utils import override_settings
+
+from ..models import ResizedVariant
+from ..signals import stage_timed
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+from .models import ResizeVariantsTestModel
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine",
+    SIMPLE_RESIZER_INDEX=True, SIMPLE_RESIZER_AUTO_FORMATS=("webp",))
+class ResizedImageFieldTest(ResizerTestCase):
+    """
+    Test generating the declared variants on upload
+    """
+    def setUp(self):
+        """
+        Upload an image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        # pylint: disable=W0212
+        self.field = ResizeVariantsTestModel._meta.get_field("image")
+        self.storage = self.field.storage
+        self.storage.calls = dict.fromkeys(self.storage.calls, 0)
+        self.stages = []
+        stage_timed.connect(self.on_stage_timed)
+
+        with open(os.path.join(self.assets_folder, "image-1.jpg"),
+                  "rb") as image_file:
+            self.instance = ResizeVariantsTestModel.objects.create(
+                image=File(image_file, name="image-1.jpg"))
+
+        stage_timed.disconnect(self.on_stage_timed)
+
+    def tearDown(self):
+        """
+        Remove the uploads and the variants
+        """
+        self.remove_dirs(("resize_variants_test_model",))
+
+    def on_stage_timed(self, stage, **kwargs):
+        """
+        Record a stage
+        """
+        self.stages.append(stage)
+
+    def test_generated(self):
+        """
+        The variants are generated and indexed on upload
+        """
+        # The upload, the 300x300 and the cropped variants in two formats
+        self.assertEqual(self.storage.calls["save"], 4)
+        self.assertEqual(ResizedVariant.objects.count(), 3)
+        self.assertEqual(self.stages.count("decode"), 1)
+        self.assertEqual(self.stages.count("encode"), 3)
+
+        names = self.field.generate(self.instance.image)
+
+        self.assertEqual(len(names), 3)
+        self.assertTrue(names[2].endswith(
+            "/resized/200x200_cropped/image-1.jpg.webp"))
+        self.assertEqual(self.storage.calls["save"], 4)
+
+    def test_lookup(self):
+        """
+        Rendering the variants does not probe the storage
+        """
+        self.storage.calls = dict.fromkeys(self.storage.calls, 0)
+        image = ResizeVariantsTestModel.objects.get(pk=self.instance.pk).image
+
+        resize.resize_lazy(image, 300, 300)
+        resize.resize_lazy(image, 200, 200, True, output_format="auto",
+                           accept="image/webp")
+        resize.resize_lazy(image, 200, 200, True, output_format="auto")
+
+        self.assertEqual(self.storage.calls["exists"], 0)
+        self.assertEqual(self.storage.calls["save"], 0)
+
+    def test_existing(self):
+        """
+        Assigning a stored file does not generate variants
+        """
+        self.storage.calls = dict.fromkeys(self.storage.calls, 0)
+        ResizeVariantsTestModel.objects.create(image=self.instance.image.name)
+
+        self.assertEqual(self.storage.calls["save"], 0)
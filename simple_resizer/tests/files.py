@@ -0,0 +1,62 @@
+"""
+Test the files holding resized images
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+class ResizedImageFileTest(ResizerTestCase):
+    """
+    Test the files returned by resize
+    """
+    def setUp(self):
+        """
+        Open the test image
+        """
+        image_path = os.path.join(get_test_directory(), "assets",
+                                  "image-1.jpg")
+        self.image_file = open(image_path, "rb")
+        self.image = ImageFile(self.image_file)
+
+    def tearDown(self):
+        """
+        Close the test image
+        """
+        self.image_file.close()
+
+    def test_known_dimensions(self):
+        """
+        The dimensions and the size match the encoded image
+        """
+        with resize.resized(self.image, 300, 200, True) as resized_image:
+            self.assertEqual((resized_image.width, resized_image.height),
+                             (300, 200))
+            self.assertEqual(resized_image.size,
+                             len(resized_image.read()))
+
+            parsed = ImageFile(resized_image.file)
+            self.assertEqual((parsed.width, parsed.height), (300, 200))
+
+    def test_in_memory(self):
+        """
+        Small images are not written to disk
+        """
+        with resize.resized(self.image, 100, 100) as resized_image:
+            self.assertFalse(resized_image.file._rolled)
+
+    @override_settings(SIMPLE_RESIZER_OUTPUT_SPOOL_SIZE=1024)
+    def test_spilled(self):
+        """
+        Large images spill to disk and stay readable
+        """
+        with resize.resized(self.image, 300, 300) as resized_image:
+            self.assertTrue(resized_image.file._rolled)
+            self.assertResize(resized_image, 300, 300)
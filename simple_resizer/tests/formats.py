@@ -0,0 +1,113 @@
+"""
+Test the output formats
+"""
+
+import os
+
+from django.core.files import File
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.test.utils import override_settings
+from PIL import Image
+
+from ..formats import get_output_format
+from ..formats import negotiate
+from ..formats import parse_accept
+from ..utils.test import ResizerTestCase
+from ..views import resize_url
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+CHROME_ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine",
+    SIMPLE_RESIZER_AUTO_FORMATS=("webp",),
+    SIMPLE_RESIZER_VIEW_STORAGE="simple_resizer.tests.views.AssetStorage")
+class OutputFormatTest(ResizerTestCase):
+    """
+    Test resizing to an other format
+    """
+    def setUp(self):
+        """
+        Open the test image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-2.png"), "rb")
+        self.image = ImageFile(self.image_file)
+
+    def tearDown(self):
+        """
+        Close the test image and remove the variants
+        """
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def test_negotiate(self):
+        """
+        Only explicitly accepted formats are picked
+        """
+        self.assertEqual(parse_accept("image/webp;q=0.5, */*"),
+                         {"image/webp": 0.5, "*/*": 1.0})
+        self.assertEqual(negotiate(CHROME_ACCEPT), "webp")
+        self.assertIsNone(negotiate("image/webp;q=0, */*"))
+        self.assertIsNone(negotiate("*/*"))
+        self.assertIsNone(get_output_format(self.image, "png"))
+        self.assertRaises(ValueError, get_output_format, self.image, "bmp")
+
+    @override_settings(SIMPLE_RESIZER_AUTO_FORMATS={
+        "png": ("webp",), "gif": (), "default": ("jpeg",)})
+    def test_source_format(self):
+        """
+        The automatic formats depend on the format of the source
+        """
+        self.assertEqual(negotiate(CHROME_ACCEPT, source_format="png"),
+                         "webp")
+        self.assertIsNone(negotiate(CHROME_ACCEPT, source_format="gif"))
+        self.assertIsNone(negotiate(CHROME_ACCEPT, source_format="jpeg"))
+        self.assertEqual(negotiate("image/jpeg", source_format="webp"),
+                         "jpeg")
+        self.assertEqual(get_output_format(self.image, "auto",
+                                           CHROME_ACCEPT), "webp")
+
+    def test_resize(self):
+        """
+        The resized file is encoded in the requested format
+        """
+        with resize.resized(self.image, 300, 300,
+                            output_format="jpeg") as resized_image:
+            self.assertEqual(Image.open(resized_image).format, "JPEG")
+
+    def test_resize_lazy(self):
+        """
+        Variants in other formats get their own name
+        """
+        name = resize.resize_lazy(self.image, 300, 300, output_format="auto",
+                                  accept=CHROME_ACCEPT)
+
+        self.assertTrue(name.endswith("/300x300/image-2.png.webp"))
+        self.assertEqual(Image.open(default_storage.open(name)).format,
+                         "WEBP")
+        self.assertTrue(resize.resize_lazy(
+            self.image, 300, 300, output_format="auto",
+            accept="*/*").endswith("/300x300/image-2.png"))
+
+    def test_view(self):
+        """
+        The view negotiates the format on every request
+        """
+        url = resize_url(File(None, name="image-1.jpg"), 300, 300,
+                         output_format="auto")
+
+        response = self.client.get(url, HTTP_ACCEPT=CHROME_ACCEPT)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertEqual(response["Vary"], "Accept")
+
+        response = self.client.get(url, HTTP_ACCEPT="*/*")
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertEqual(
+            self.client.get(url.replace("f=auto", "f=png")).status_code, 404)
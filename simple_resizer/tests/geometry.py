@@ -0,0 +1,104 @@
+"""
+Test the geometry planner
+"""
+
+import random
+
+from unittest import skipIf
+
+from .. import geometry
+from ..geometry import get_spec_size
+from ..geometry import get_target_geometry
+from ..geometry import plan
+from ..utils.test import ResizerTestCase
+
+
+SPECS = (
+    (300, 300, False),
+    (300, 300, True),
+    (301, 199, False),
+    (301, 199, True),
+    (1, 1, True),
+    (17, 1000, True),
+    (640, None, False),
+    (None, 333, False),
+)
+
+
+def get_sizes():
+    """
+    Return small sizes in every combination and random large ones
+    """
+    generator = random.Random(42)
+    sizes = [(width, height) for width in range(1, 41)
+             for height in range(1, 41)]
+    sizes.extend((generator.randint(1, 20000), generator.randint(1, 20000))
+                 for _ in range(5000))
+    # Leave out the ones that are too narrow for the specs
+    return [size for size in sizes if 0.01 < float(size[0]) / size[1] < 100]
+
+
+class GeometryTest(ResizerTestCase):
+    """
+    Test planning many sources against the geometry of a single one
+    """
+    def assertPlanned(self, sizes, planned, spec):
+        """
+        Passes if the plan equals the geometry of each size
+        """
+        target_widths, target_heights, crop_boxes = planned
+
+        for idx, size in enumerate(sizes):
+            width, height = get_spec_size(size, *spec[:2])
+            expected = get_target_geometry(size, width, height, spec[2])
+            crop_box = (tuple(int(value) for value in crop_boxes[idx])
+                        if crop_boxes is not None else None)
+
+            self.assertEqual(
+                (int(target_widths[idx]), int(target_heights[idx]),
+                 crop_box), expected,
+                "%ix%i to %r" % (size + (spec,)))
+
+    @skipIf(geometry.numpy is None, "NumPy is not installed")
+    def test_vectorized(self):
+        """
+        The vectorized plan is identical to the geometry of each source
+        """
+        sizes = get_sizes()
+
+        for spec in SPECS:
+            self.assertPlanned(sizes, plan(sizes, *spec), spec)
+
+    def test_scalar(self):
+        """
+        Without NumPy the plan is made source by source
+        """
+        sizes = get_sizes()[:2000]
+        numpy = geometry.numpy
+        geometry.numpy = None
+
+        try:
+            for spec in SPECS:
+                self.assertPlanned(sizes, plan(sizes, *spec), spec)
+        finally:
+            geometry.numpy = numpy
+
+    def test_orientations(self):
+        """
+        Sizes of transposed sources are rotated
+        """
+        target_widths, target_heights, _ = plan(
+            [(400, 200), (400, 200), (400, 200)], 100, 100,
+            orientations=[1, 6, None])
+
+        self.assertEqual(list(target_widths), [100, 50, 100])
+        self.assertEqual(list(target_heights), [50, 100, 50])
+
+    def test_invalid(self):
+        """
+        Specs and sizes that can not be resized are refused
+        """
+        self.assertRaises(ValueError, plan, [(10, 10)])
+        self.assertRaises(ValueError, plan, [(10, 10)], 10, crop=True)
+        self.assertRaises(ValueError, plan, [(10, 0)], 10, 10)
+        self.assertRaises(ValueError, plan, [(1000, 1)], 10)
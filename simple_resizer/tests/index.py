@@ -0,0 +1,119 @@
+"""
+Test the variant index
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..models import SPEC_FIELDS
+from ..models import ResizedVariant
+from ..models import get_spec_key
+from ..utils.test import CountingStorage
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+SOURCE_VERSION = {"version": "1"}
+
+
+def get_test_version(image):  # pylint: disable=W0613
+    """
+    A source version that can be changed by the tests
+    """
+    return SOURCE_VERSION["version"]
+
+
+@override_settings(SIMPLE_RESIZER_INDEX=True,
+                   SIMPLE_RESIZER_SOURCE_VERSION=(
+                       "simple_resizer.tests.index.get_test_version"))
+class ResizeLazyIndexTest(ResizerTestCase):
+    """
+    Test resize_lazy with the index enabled
+    """
+    def setUp(self):
+        """
+        Open the image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+        self.storage = CountingStorage(base_url="/media/")
+        SOURCE_VERSION["version"] = "1"
+
+    def tearDown(self):
+        """
+        Close the image and remove the variants
+        """
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def test_record(self):
+        """
+        A generated variant is recorded with its output properties
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        variant = ResizedVariant.objects.get(name=name)
+
+        self.assertEqual(variant.source_name, self.image.name)
+        self.assertEqual((variant.width, variant.height), (300, 300))
+        self.assertEqual(variant.size, self.storage.size(name))
+        self.assertEqual(variant.pixel_height, 300)
+
+    def test_spec_key(self):
+        """
+        Variants are unique by the short hash of their spec
+        """
+        resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        resize.resize_lazy(self.image, 300, 300, storage=self.storage,
+                           output_format="png")
+        variants = ResizedVariant.objects.order_by("format")
+
+        self.assertEqual(len(variants), 2)
+
+        for variant in variants:
+            self.assertEqual(variant.key, get_spec_key(dict(
+                (field, getattr(variant, field)) for field in SPEC_FIELDS)))
+
+    def test_lookup(self):
+        """
+        An indexed variant does not touch the storage
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        calls = dict(self.storage.calls)
+
+        self.assertEqual(resize.resize_lazy(self.image, 300, 300,
+                                            storage=self.storage), name)
+        self.assertEqual(self.storage.calls, calls)
+
+    def test_stale(self):
+        """
+        A variant of an other source version is regenerated
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        SOURCE_VERSION["version"] = "2"
+
+        # Replaced, not saved next to the old one
+        self.assertEqual(resize.resize_lazy(self.image, 300, 300,
+                                            storage=self.storage), name)
+        self.assertEqual(self.storage.calls["save"], 2)
+        self.assertEqual(ResizedVariant.objects.get().source_version, "2")
+        self.assertEqual(self.storage.listdir(os.path.dirname(name))[1],
+                         [os.path.basename(name)])
+
+    def test_stale_many(self):
+        """
+        Stale variants resolved in bulk are replaced as well
+        """
+        name = resize.resize_lazy(self.image, 300, 300, storage=self.storage)
+        SOURCE_VERSION["version"] = "2"
+
+        self.assertEqual(resize.resize_lazy_many([(self.image, 300, 300)],
+                                                 storage=self.storage),
+                         [name])
+        self.assertEqual(self.storage.listdir(os.path.dirname(name))[1],
+                         [os.path.basename(name)])
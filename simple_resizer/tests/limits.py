@@ -0,0 +1,77 @@
+"""
+Test the resize limits
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..conf import DEFAULTS
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(SIMPLE_RESIZER_LIMITS=dict(DEFAULTS["LIMITS"],
+                                              pixels=100 * 100))
+class LimitsTest(ResizerTestCase):
+    """
+    Test refusing sources that exceed the limits
+    """
+    def setUp(self):
+        """
+        Open the test image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+
+    def tearDown(self):
+        """
+        Close the test image and remove the variants
+        """
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def test_pixels(self):
+        """
+        Sources with too many pixels are refused
+        """
+        self.assertRaises(resize.ImageTooLarge, resize.resize, self.image,
+                          100, 100)
+        self.assertRaises(resize.LimitExceeded, resize.resize_lazy,
+                          self.image, 100, 100)
+
+    def test_limited(self):
+        """
+        Limits are lifted and tightened per thread
+        """
+        with resize.limited(pixels=None):
+            with resize.resized(self.image, 100, 100) as resized_image:
+                self.assertResize(resized_image, 100, 100)
+
+            with resize.limited(width=self.image.width - 1):
+                self.assertRaises(resize.ImageTooLarge, resize.resize,
+                                  self.image, 100, 100)
+
+            with resize.limited(time=0):
+                self.assertRaises(resize.ResizeTimeout, resize.resize,
+                                  self.image, 100, 100)
+
+    def test_resources(self):
+        """
+        Resource limits that can not be applied per resize are refused
+        """
+        with resize.limited(pixels=None):
+            with resize.limited(memory=1024 * 1024):
+                self.assertRaises(ValueError, resize.resize, self.image,
+                                  100, 100)
+
+            with override_settings(SIMPLE_RESIZER_LIMITS=dict(
+                    DEFAULTS["LIMITS"], memory=1024 * 1024)):
+                # Those of the settings are applied once
+                with resize.resized(self.image, 100, 100) as resized_image:
+                    self.assertResize(resized_image, 100, 100)
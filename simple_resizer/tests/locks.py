@@ -0,0 +1,165 @@
+"""
+Test the single flight generation
+"""
+
+import os
+import threading
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from ..utils.test import CountingStorage
+from ..utils.test import ResizerTestCase
+from .. import locks
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+# pylint: disable=W0212
+class LockTest(SimpleTestCase):
+    """
+    Test acquiring and releasing locks
+    """
+    def assertExclusive(self):
+        """
+        Passes if a held lock can not be acquired by an other thread
+        """
+        self.assertTrue(locks.acquire("key", timeout=0))
+
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(locks.acquire("key", timeout=0)))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [False])
+
+        locks.release("key")
+        self.assertTrue(locks.acquire("key", timeout=0))
+        locks.release("key")
+
+    def test_thread_lock(self):
+        """
+        Test the lock within a process
+        """
+        self.assertExclusive()
+
+    @override_settings(SIMPLE_RESIZER_LOCK="cache")
+    def test_cache_lock(self):
+        """
+        Test the lock shared through the cache
+        """
+        cache.clear()
+        self.assertExclusive()
+
+        with locks.locked("key") as acquired:
+            self.assertTrue(acquired)
+            self.assertFalse(locks._acquire_shared("key"))
+
+    @override_settings(SIMPLE_RESIZER_LOCK="file")
+    def test_file_lock(self):
+        """
+        Test the lock shared through lock files
+        """
+        self.assertExclusive()
+
+        with locks.locked("key"):
+            self.assertFalse(locks._acquire_shared("key"))
+
+    @override_settings(SIMPLE_RESIZER_LOCK="file",
+                       SIMPLE_RESIZER_LOCK_EXPIRE=0)
+    def test_expired_file_lock(self):
+        """
+        A lock file left behind expires
+        """
+        self.assertTrue(locks._acquire_shared("key"))
+        os.utime(locks._get_lock_path("key"), (0, 0))
+
+        self.assertTrue(locks.acquire("key", timeout=1))
+        locks.release("key")
+
+    def test_failed_release(self):
+        """
+        The thread lock is released even if the shared one fails to
+        """
+        def fail(key):
+            """
+            A shared lock that can not be reached
+            """
+            raise IOError("Can not release %s." % key)
+
+        release_shared = locks._release_shared
+        locks._release_shared = fail
+
+        try:
+            self.assertTrue(locks.acquire("key", timeout=0))
+            self.assertRaises(IOError, locks.release, "key")
+        finally:
+            locks._release_shared = release_shared
+
+        self.assertTrue(locks.acquire("key", timeout=0))
+        locks.release("key")
+# pylint: enable=W0212
+
+
+class SingleFlightTest(ResizerTestCase):
+    """
+    Test concurrent resize_lazy calls
+    """
+    def setUp(self):
+        """
+        Open the image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.storage = CountingStorage(base_url="/media/")
+
+    def tearDown(self):
+        """
+        Close the image and remove the variants
+        """
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def test_single_flight(self):
+        """
+        A variant requested by many threads at once is generated once
+        """
+        names = []
+
+        def _resize():
+            """
+            Resize from an own file object
+            """
+            with open(self.image_file.name, "rb") as image_file:
+                names.append(resize.resize_lazy(ImageFile(image_file), 300,
+                                                300, storage=self.storage))
+
+        threads = [threading.Thread(target=_resize) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.storage.calls["save"], 1)
+        self.assertEqual(len(set(names)), 1)
+
+    @override_settings(SIMPLE_RESIZER_LOCK_TIMEOUT=0)
+    def test_timeout(self):
+        """
+        The source is served when the lock is not acquired in time
+        """
+        image = ImageFile(self.image_file)
+        name = resize.resize_lazy(image, 300, 300, storage=self.storage)
+        self.storage.delete(name)
+
+        with locks.locked(locks.get_key(self.storage, name)):
+            self.assertEqual(resize.resize_lazy(image, 300, 300,
+                                                storage=self.storage),
+                             image.name)
+            self.assertEqual(resize.resize_lazy_many([(image, 300, 300)],
+                                                     storage=self.storage),
+                             [image.name])
@@ -0,0 +1,134 @@
+"""
+Test the stage timings and the metrics sinks
+"""
+
+import os
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..metrics import PrometheusSink
+from ..metrics import StatsdSink
+from ..signals import counted
+from ..signals import stage_timed
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine",
+    SIMPLE_RESIZER_CACHE="default")
+class MetricsTest(ResizerTestCase):
+    """
+    Test the signals sent while resizing
+    """
+    def setUp(self):
+        """
+        Open the image and receive the signals
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+        self.stages = []
+        self.counters = []
+        stage_timed.connect(self.on_stage_timed)
+        counted.connect(self.on_counted)
+        cache.clear()
+
+    def tearDown(self):
+        """
+        Close the image, disconnect and remove the variants
+        """
+        stage_timed.disconnect(self.on_stage_timed)
+        counted.disconnect(self.on_counted)
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def on_stage_timed(self, stage, duration, tags, **kwargs):
+        """
+        Record a stage
+        """
+        self.stages.append((stage, duration, tags))
+
+    def on_counted(self, name, value, tags, **kwargs):
+        """
+        Record a counter
+        """
+        self.counters.append(name)
+
+    def get_tags(self, stage):
+        """
+        Return the tags of the first recording of a stage
+        """
+        for name, duration, tags in self.stages:
+            if name == stage:
+                self.assertGreaterEqual(duration, 0)
+                return tags
+
+        self.fail("Stage %s was not timed." % stage)
+
+    def test_stages(self):
+        """
+        The stages are timed with their dimensions and bytes
+        """
+        resize.resize_lazy(self.image, 300, 200, crop=True)
+
+        self.assertEqual(self.get_tags("decode")["source"], "400x500")
+        self.assertEqual(self.get_tags("resize")["target"], "300x375")
+        self.assertEqual(self.get_tags("crop")["target"], "300x200")
+        self.assertEqual(self.get_tags("encode")["format"], "jpeg")
+        self.assertGreater(self.get_tags("encode")["bytes"], 0)
+        self.assertEqual(self.get_tags("save")["bytes"],
+                         self.get_tags("encode")["bytes"])
+        self.get_tags("probe")
+        self.get_tags("exists")
+
+    def test_cache(self):
+        """
+        Resolving counts the cache hits and misses
+        """
+        resize.resize_lazy(self.image, 300, 300)
+        resize.resize_lazy(self.image, 300, 300)
+
+        self.assertEqual(self.counters, ["cache_miss", "cache_hit"])
+
+
+@override_settings(SIMPLE_RESIZER_METRICS_PREFIX="resizer")
+class SinkTest(ResizerTestCase):
+    """
+    Test the sinks
+    """
+    def test_prometheus(self):
+        """
+        The totals are rendered in the text format
+        """
+        sink = PrometheusSink()
+        sink.timing("encode", 0.5, {"bytes": 100})
+        sink.timing("encode", 0.25, {"bytes": 50})
+        sink.increment("cache_hit", 1, {})
+
+        lines = sink.render().splitlines()
+
+        self.assertIn('resizer_stage_seconds_count{stage="encode"} 2', lines)
+        self.assertIn('resizer_stage_seconds_sum{stage="encode"} 0.750000',
+                      lines)
+        self.assertIn('resizer_stage_bytes_total{stage="encode"} 150', lines)
+        self.assertIn("resizer_cache_hit_total 1", lines)
+
+    def test_statsd(self):
+        """
+        Metrics are formatted with dogstatsd tags
+        """
+        sink = StatsdSink()
+        sink.socket.close()
+
+        self.assertEqual(
+            sink._format("encode", "1.500", "ms",  # pylint: disable=W0212
+                         {"format": "jpeg", "bytes": 10}),
+            "resizer.encode:1.500|ms|#bytes:10,format:jpeg")
+        # Failing to send is not an error
+        sink.timing("encode", 0.1, {})
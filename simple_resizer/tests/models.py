@@ -5,6 +5,9 @@ Some models purely for testing
 from django.db import models
 from django.core.files.storage import FileSystemStorage
 
+from ..fields import ResizedImageField
+from ..utils.test import CountingStorage
+
 
 def _get_storage():
     """
@@ -22,3 +25,29 @@ class ResizeTestModel(models.Model):
     """
     image = models.ImageField(upload_to="resize_test_model/images/",
                               storage=_get_storage())
+
+    class Meta(object):
+        """
+        Imported while the app registry is populated, so the app label can
+        not be derived
+        """
+        app_label = "tests"
+
+
+class ResizeVariantsTestModel(models.Model):
+    """
+    A model with declared variants
+    """
+    image = ResizedImageField(
+        upload_to="resize_variants_test_model/images/",
+        storage=CountingStorage(location="simple_resizer/tests/assets/",
+                                base_url="/media/"),
+        variants=((300, 300), {"width": 200, "height": 200, "crop": True,
+                               "output_format": "auto"}))
+
+    class Meta(object):
+        """
+        Imported while the app registry is populated, so the app label can
+        not be derived
+        """
+        app_label = "tests"
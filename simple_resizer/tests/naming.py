@@ -0,0 +1,80 @@
+"""
+Test the versioned variant names
+"""
+
+import os
+import shutil
+
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.test.utils import override_settings
+
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(SIMPLE_RESIZER_NAMING="versioned")
+class VersionedNamingTest(ResizerTestCase):
+    """
+    Test resize_lazy with versioned naming
+    """
+    def setUp(self):
+        """
+        Copy an image that can be replaced
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_path = os.path.join(self.assets_folder, "versioned.jpg")
+        shutil.copy(os.path.join(self.assets_folder, "image-1.jpg"),
+                    self.image_path)
+
+    def tearDown(self):
+        """
+        Remove the copy and the variants
+        """
+        os.remove(self.image_path)
+        self.remove_dirs(("resized",))
+
+    def resize_lazy(self):
+        """
+        Return the name of a variant of the copy
+        """
+        with open(self.image_path, "rb") as image_file:
+            return resize.resize_lazy(ImageFile(image_file), 300, 300)
+
+    def test_versioned_name(self):
+        """
+        The name holds a token and the variant is readable
+        """
+        name = self.resize_lazy()
+        root = os.path.splitext(os.path.basename(name))[0]
+
+        self.assertRegexpMatches(root, r"^versioned\.[0-9a-f]{8}$")
+        self.assertEqual(self.resize_lazy(), name)
+
+        image = ImageFile(default_storage.open(name))
+        self.assertResize(image, 300, 300)
+        image.close()
+
+    def test_replaced_source(self):
+        """
+        A replaced source gets a new variant
+        """
+        name = self.resize_lazy()
+
+        with open(self.image_path, "ab") as image_file:
+            # Trailing data is ignored by decoders
+            image_file.write(b"\0" * 16)
+
+        self.assertNotEqual(self.resize_lazy(), name)
+
+    @override_settings(SIMPLE_RESIZER_NAMING_TOKEN="version")
+    def test_version_token(self):
+        """
+        The token can be derived from the version marker
+        """
+        name = self.resize_lazy()
+        os.utime(self.image_path, (0, 0))
+
+        self.assertNotEqual(self.resize_lazy(), name)
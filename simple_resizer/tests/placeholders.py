@@ -0,0 +1,138 @@
+"""
+Test the placeholders
+"""
+
+import base64
+import io
+import os
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.template import Context
+from django.template import Template
+from django.test.utils import override_settings
+from PIL import Image
+
+from .. import sources
+from ..placeholders import placeholder
+from ..signals import stage_timed
+from ..utils.test import ResizerTestCase
+
+from . import get_test_directory
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine",
+    SIMPLE_RESIZER_CACHE="default")
+class PlaceholderTest(ResizerTestCase):
+    """
+    Test the data uri and blurhash placeholders
+    """
+    def setUp(self):
+        """
+        Open the test images
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_files = [
+            open(os.path.join(self.assets_folder, name), "rb")
+            for name in ("image-1.jpg", "image-2.png")]
+        self.image_1, self.image_2 = [ImageFile(image_file)
+                                      for image_file in self.image_files]
+        self.stages = []
+        stage_timed.connect(self.on_stage_timed)
+        cache.clear()
+
+    def tearDown(self):
+        """
+        Close the test images
+        """
+        stage_timed.disconnect(self.on_stage_timed)
+
+        for image_file in self.image_files:
+            image_file.close()
+
+    def on_stage_timed(self, stage, **kwargs):
+        """
+        Record a stage
+        """
+        self.stages.append(stage)
+
+    def decode(self, data_uri, mime_type):
+        """
+        Return the image of a data uri
+        """
+        prefix = "data:%s;base64," % mime_type
+        self.assertTrue(data_uri.startswith(prefix))
+        return Image.open(io.BytesIO(base64.b64decode(
+            data_uri[len(prefix):])))
+
+    def get_contrast(self, image):
+        """
+        Return the sum of the differences between neighbouring pixels
+        """
+        image = image.convert("L")
+        width, height = image.size
+        pixels = image.load()
+
+        return sum(abs(pixels[x, y] - pixels[x + 1, y])
+                   for x in range(width - 1) for y in range(height))
+
+    def test_data_uri(self):
+        """
+        A tiny thumbnail is inlined, keeping the transparency of png
+        """
+        self.assertEqual(
+            self.decode(placeholder(self.image_1), "image/jpeg").size,
+            (13, 16))
+        self.assertEqual(
+            max(self.decode(placeholder(self.image_2, size=8),
+                            "image/png").size), 8)
+
+    def test_blur(self):
+        """
+        The thumbnail is blurred before it is encoded
+        """
+        blurred = self.decode(placeholder(self.image_2), "image/png")
+        self.assertIn("blur", self.stages)
+
+        with override_settings(SIMPLE_RESIZER_PLACEHOLDER_BLUR=0):
+            cache.clear()
+            sources._MEMO.clear()  # pylint: disable=W0212
+            sharp = self.decode(placeholder(self.image_2), "image/png")
+
+        self.assertEqual(blurred.size, sharp.size)
+        self.assertLess(self.get_contrast(blurred),
+                        self.get_contrast(sharp))
+
+    def test_blurhash(self):
+        """
+        A blurhash has a size flag and two digits per component
+        """
+        blurhash = placeholder(self.image_1, "blurhash")
+
+        self.assertEqual(len(blurhash), 4 + 2 + 2 * 11)
+        self.assertEqual(blurhash[0], "L")
+        self.assertEqual(placeholder(self.image_1, "blurhash",
+                                     components=(1, 1)), "00" + blurhash[2:6])
+        self.assertRaises(ValueError, placeholder, self.image_1, "lqip")
+
+    def test_cached(self):
+        """
+        A placeholder is computed once per source version
+        """
+        data_uri = placeholder(self.image_1)
+        # Another process only finds it in the cache
+        sources._MEMO.clear()  # pylint: disable=W0212
+
+        self.assertEqual(placeholder(self.image_1), data_uri)
+        self.assertEqual(self.stages.count("decode"), 1)
+
+    def test_tag(self):
+        """
+        The tag renders the placeholder
+        """
+        template = Template("{% load placeholder from simple_resizer %}"
+                            "{% placeholder image 'blurhash' %}")
+
+        self.assertEqual(template.render(Context({"image": self.image_1})),
+                         placeholder(self.image_1, "blurhash"))
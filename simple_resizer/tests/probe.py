@@ -0,0 +1,120 @@
+"""
+Test the header probe
+"""
+
+import os
+import struct
+import zlib
+
+from io import BytesIO
+
+from django.core.files import File
+from django.core.files.images import ImageFile
+from django.test.utils import override_settings
+
+from ..probe import ImageInfo
+from ..probe import get_size
+from ..probe import probe
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+def _get_chunk(chunk_type, data):
+    """
+    Return a png chunk
+    """
+    return (struct.pack(">I", len(data)) + chunk_type + data +
+            struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff))
+
+
+class ReadCountingFile(BytesIO):
+    """
+    Counts the bytes read from it
+    """
+    bytes_read = 0
+
+    def read(self, *args):
+        data = BytesIO.read(self, *args)
+        self.bytes_read += len(data)
+        return data
+
+
+class ProbeTest(ResizerTestCase):
+    """
+    Test probe and get_size
+    """
+    def setUp(self):
+        """
+        Set assets folder
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+
+    def open_asset(self, name):
+        """
+        Return the contents of an asset in a counting file
+        """
+        with open(os.path.join(self.assets_folder, name), "rb") as asset:
+            return File(ReadCountingFile(asset.read()), name=name)
+
+    def test_dimensions(self):
+        """
+        The header holds the same dimensions django reports
+        """
+        for name in ("image-1.jpg", "image-2.png"):
+            with open(os.path.join(self.assets_folder, name), "rb") as asset:
+                image = ImageFile(asset)
+                info = probe(image)
+
+                self.assertEqual((info.width, info.height),
+                                 (image.width, image.height))
+                self.assertEqual(info.orientation, 1)
+
+        self.assertEqual(info.format, "PNG")
+
+    @override_settings(SIMPLE_RESIZER_PROBE_BYTES=1024,
+                       SIMPLE_RESIZER_PROBE_MAX_BYTES=4096)
+    def test_bounded_read(self):
+        """
+        Only the header is read, and the position is restored
+        """
+        image = self.open_asset("image-2.png")
+        image.seek(10)
+
+        self.assertIsNotNone(probe(image))
+        self.assertLessEqual(image.file.bytes_read, 1024)
+        self.assertEqual(image.tell(), 10)
+
+    def test_unreadable(self):
+        """
+        A source that is not an image falls back to its django dimensions
+        """
+        image = File(BytesIO(b"not an image"), name="broken.jpg")
+        image.width, image.height = 40, 30
+
+        self.assertIsNone(probe(image))
+        self.assertEqual(get_size(image), (40, 30))
+
+    def test_bomb(self):
+        """
+        The header of a source pillow takes for a decompression bomb is read,
+        so the limits refuse it
+        """
+        image = File(BytesIO(
+            b"\x89PNG\r\n\x1a\n" +
+            _get_chunk(b"IHDR", struct.pack(">IIBBBBB", 30000, 30000, 8, 2,
+                                            0, 0, 0)) +
+            _get_chunk(b"IDAT", zlib.compress(b"\0" * 16)) +
+            _get_chunk(b"IEND", b"")), name="bomb.png")
+
+        self.assertEqual(probe(image), ImageInfo(30000, 30000, "PNG", 1))
+        self.assertRaises(resize.ImageTooLarge, resize.resize, image, 100,
+                          100)
+
+    def test_oriented_size(self):
+        """
+        Orientations rotated by 90 degrees swap the dimensions
+        """
+        self.assertEqual(ImageInfo(40, 30, "JPEG", 3).size, (40, 30))
+        self.assertEqual(ImageInfo(40, 30, "JPEG", 6).size, (30, 40))
@@ -0,0 +1,99 @@
+"""
+Test the encoder profiles
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.test.utils import override_settings
+from PIL import Image
+
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine",
+    SIMPLE_RESIZER_PROFILES={"hq": {"jpeg": {"quality": 95,
+                                             "sampling": "4:4:4"}}})
+class EncoderProfileTest(ResizerTestCase):
+    """
+    Test encoding with profiles
+    """
+    def setUp(self):
+        """
+        Open the test images
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_files = [
+            open(os.path.join(self.assets_folder, name), "rb")
+            for name in ("image-1.jpg", "image-2.png")]
+        self.image_1, self.image_2 = [ImageFile(image_file)
+                                      for image_file in self.image_files]
+
+    def tearDown(self):
+        """
+        Close the test images and remove the variants
+        """
+        for image_file in self.image_files:
+            image_file.close()
+
+        self.remove_dirs(("resized",))
+
+    def test_default(self):
+        """
+        The default profile applies without changing the name
+        """
+        name = resize.resize_lazy(self.image_1, 300, 300)
+
+        self.assertTrue(name.endswith("/resized/300x300/image-1.jpg"))
+        self.assertTrue(Image.open(default_storage.open(name)).info.get(
+            "progressive"))
+
+    def test_named(self):
+        """
+        Variants of named profiles coexist with the default ones
+        """
+        default_name = resize.resize_lazy(self.image_1, 300, 300)
+        name = resize.resize_lazy(self.image_1, 300, 300, profile="hq")
+
+        self.assertTrue(name.endswith("/resized/300x300_hq/image-1.jpg"))
+        self.assertGreater(default_storage.size(name),
+                           default_storage.size(default_name))
+        self.assertRaises(ValueError, resize.resize_lazy, self.image_1, 300,
+                          300, profile="missing")
+
+    def test_options(self):
+        """
+        Options given per call get their own name
+        """
+        name = resize.resize_lazy(self.image_2, 300, 300,
+                                  profile={"colors": 16})
+
+        self.assertRegexpMatches(name, r"/resized/300x300_o[0-9a-f]{8}/")
+        self.assertEqual(Image.open(default_storage.open(name)).mode, "P")
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.wand_engine.WandEngine")
+class WandEncoderProfileTest(ResizerTestCase):
+    """
+    Test encoding with profiles through ImageMagick
+    """
+    def test_png(self):
+        """
+        The png options of the default profile and of a call are set on the
+        encoder
+        """
+        path = os.path.join(get_test_directory(), "assets", "image-2.png")
+
+        with open(path, "rb") as image_file:
+            with resize.resized(ImageFile(image_file), 300, 300,
+                                profile={"filter": 5}) as image:
+                encoded = Image.open(image)
+
+                self.assertEqual(encoded.format, "PNG")
+                self.assertEqual(encoded.size, (image.width, image.height))
@@ -0,0 +1,167 @@
+"""
+Test the source helpers
+"""
+
+import os
+import shutil
+from io import BytesIO
+
+from django.core.files import File
+from django.core.files.images import ImageFile
+from django.core.files.storage import FileSystemStorage
+from django.test.utils import override_settings
+
+from .. import sources
+from ..cache import get_cache_key
+
+from ..sources import get_file_version
+from ..sources import get_source_path
+from ..sources import get_source_token
+from ..sources import get_storage_key
+from ..utils.test import RemoteStorage
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+from .models import ResizeTestModel
+
+
+class SourcePathTest(ResizerTestCase):
+    """
+    Test get_source_path
+    """
+    def setUp(self):
+        """
+        Set assets folder
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+
+    def test_storage(self):
+        """
+        Sources on the filesystem storage are read from their path
+        """
+        image = File(None, name="image-1.jpg")
+        image.storage = FileSystemStorage(location=self.assets_folder)
+
+        self.assertEqual(get_source_path(image),
+                         os.path.join(self.assets_folder, "image-1.jpg"))
+
+    def test_opened_file(self):
+        """
+        Opened local files are read from their path
+        """
+        path = os.path.join(self.assets_folder, "image-2.png")
+
+        with open(path, "rb") as image_file:
+            self.assertEqual(get_source_path(File(image_file)),
+                             os.path.abspath(path))
+
+    def test_uncommitted(self):
+        """
+        Uploads that are not saved yet are not read from the storage, which
+        may hold an other file of the same name
+        """
+        with open(os.path.join(self.assets_folder, "image-2.png"),
+                  "rb") as image_file:
+            instance = ResizeTestModel(image=File(image_file,
+                                                  name="image-1.jpg"))
+
+            self.assertIsNone(get_source_path(instance.image))
+
+            with resize.resized(instance.image, 100, 100,
+                                output_format="png") as resized_image:
+                self.assertAspectRatio(resized_image, ImageFile(image_file),
+                                       decimal_tolerance=1)
+
+    def test_stream(self):
+        """
+        Streams and missing files have no path
+        """
+        self.assertIsNone(get_source_path(File(BytesIO(b""), name="a.jpg")))
+
+        image = File(None, name="missing.jpg")
+        image.storage = FileSystemStorage(location=self.assets_folder)
+        self.assertIsNone(get_source_path(image))
+
+
+class StorageKeyTest(ResizerTestCase):
+    """
+    Test get_storage_key
+    """
+    def test_location(self):
+        """
+        Instances of a storage class are told apart by their location
+        """
+        self.assertEqual(get_storage_key(FileSystemStorage(location="/a")),
+                         get_storage_key(FileSystemStorage(location="/a")))
+        self.assertNotEqual(
+            get_storage_key(FileSystemStorage(location="/a")),
+            get_storage_key(FileSystemStorage(location="/b")))
+        self.assertNotEqual(
+            get_storage_key(FileSystemStorage(location="/a",
+                                              base_url="/a/")),
+            get_storage_key(FileSystemStorage(location="/a",
+                                              base_url="/b/")))
+
+    def test_class(self):
+        """
+        The class of the storage is kept readable in the key
+        """
+        self.assertTrue(get_storage_key(FileSystemStorage()).startswith(
+            "django.core.files.storage.FileSystemStorage:"))
+
+
+class FileVersionTest(ResizerTestCase):
+    """
+    Test get_file_version
+    """
+    def setUp(self):
+        """
+        Copy an image that can be replaced
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        shutil.copy(os.path.join(self.assets_folder, "image-1.jpg"),
+                    os.path.join(self.assets_folder, "remote.jpg"))
+
+    def tearDown(self):
+        """
+        Remove the copy
+        """
+        os.remove(os.path.join(self.assets_folder, "remote.jpg"))
+        sources._REMOTE_VERSIONS.clear()  # pylint: disable=W0212
+
+    @override_settings(SIMPLE_RESIZER_REMOTE_VERSION_TIMEOUT=0)
+    def test_remote(self):
+        """
+        Sources without a local path are versioned by their modified time
+        """
+        image = File(None, name="remote.jpg")
+        image.storage = RemoteStorage(location=self.assets_folder)
+        version = get_file_version(image)
+
+        self.assertTrue(version)
+
+        os.utime(os.path.join(self.assets_folder, "remote.jpg"), (0, 0))
+        self.assertNotEqual(get_file_version(image), version)
+
+    @override_settings(SIMPLE_RESIZER_CACHE="default")
+    def test_remote_remembered(self):
+        """
+        The storage is asked for the version of a remote source once
+        """
+        image = File(None, name="remote.jpg")
+        image.storage = RemoteStorage(location=self.assets_folder)
+        keys = [get_cache_key(image, 300, 300, False, "resized",
+                              image.storage) for _ in range(3)]
+
+        self.assertEqual(len(set(keys)), 1)
+        self.assertEqual(image.storage.calls["modified_time"], 1)
+
+    def test_unversioned(self):
+        """
+        The tokens of sources without a version are not remembered
+        """
+        token = get_source_token(File(BytesIO(b"a"), name="stream.jpg"))
+
+        self.assertNotEqual(
+            get_source_token(File(BytesIO(b"b"), name="stream.jpg")), token)
@@ -0,0 +1,111 @@
+"""
+Test the srcset of many widths
+"""
+
+import os
+
+from django.core.files.images import ImageFile
+from django.template import Context
+from django.template import Template
+from django.test.utils import override_settings
+
+from ..signals import stage_timed
+from ..utils.test import CountingStorage
+from ..utils.test import ResizerTestCase
+import simple_resizer as resize
+
+from . import get_test_directory
+
+
+@override_settings(
+    SIMPLE_RESIZER_ENGINE="simple_resizer.engines.pillow_engine.PillowEngine")
+class ResizeSrcsetTest(ResizerTestCase):
+    """
+    Test resize_srcset and its template tag
+    """
+    def setUp(self):
+        """
+        Open the image, of 400x500
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.image_file = open(os.path.join(self.assets_folder,
+                                            "image-1.jpg"), "rb")
+        self.image = ImageFile(self.image_file)
+        self.storage = CountingStorage(base_url="/media/")
+        self.stages = []
+        stage_timed.connect(self.on_stage_timed)
+
+    def tearDown(self):
+        """
+        Close the image and remove the variants
+        """
+        stage_timed.disconnect(self.on_stage_timed)
+        self.image_file.close()
+        self.remove_dirs(("resized",))
+
+    def on_stage_timed(self, stage, **kwargs):
+        """
+        Record a stage
+        """
+        self.stages.append(stage)
+
+    def get_url(self, name):
+        """
+        Return the url of a variant of the image
+        """
+        return self.storage.url(os.path.join(self.assets_folder, "resized",
+                                             name, "image-1.jpg"))
+
+    def test_srcset(self):
+        """
+        The widths are generated with a single decode, larger ones are left
+        out
+        """
+        srcset = resize.resize_srcset(self.image, [320, 200, 640],
+                                      storage=self.storage)
+
+        self.assertEqual(srcset, "%s 200w, %s 320w" % (
+            self.get_url("200x250"), self.get_url("320x400")))
+        self.assertEqual(self.stages.count("decode"), 1)
+        self.assertEqual(self.storage.calls["save"], 2)
+
+        resize.resize_srcset(self.image, [320, 200, 640],
+                             storage=self.storage)
+
+        self.assertEqual(self.storage.calls["save"], 2)
+
+    def test_crop(self):
+        """
+        Widths are cropped to the ratio
+        """
+        srcset = resize.resize_srcset(self.image, [100, 400], crop="2:1",
+                                      storage=self.storage)
+
+        self.assertEqual(srcset, "%s 100w, %s 400w" % (
+            self.get_url("100x50_cropped"), self.get_url("400x200_cropped")))
+        self.assertEqual(
+            resize.resize_srcset(self.image, [800], crop=0.5,
+                                 storage=self.storage),
+            "%s 250w" % self.get_url("250x500_cropped"))
+
+    def test_small(self):
+        """
+        An image smaller than every width is offered at its own size
+        """
+        self.assertEqual(
+            resize.resize_srcset(self.image, [1000, 2000],
+                                 storage=self.storage),
+            "%s 400w" % self.get_url("400x500"))
+
+    def test_tag(self):
+        """
+        The tag takes the widths as a string
+        """
+        template = Template(
+            "{% load resize_srcset from simple_resizer %}"
+            "{% resize_srcset image widths='320, 200' crop='1:1' %}")
+
+        self.assertEqual(
+            template.render(Context({"image": self.image})),
+            resize.resize_srcset(self.image, [200, 320], crop="1:1"))
+        self.assertEqual(self.stages.count("decode"), 1)
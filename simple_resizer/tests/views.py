@@ -0,0 +1,142 @@
+"""
+Test the resize view
+"""
+
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.urlresolvers import reverse
+from django.template import Context
+from django.template import Template
+from django.test.utils import override_settings
+
+from ..utils.test import ResizerTestCase
+from ..views import get_signature
+from ..views import resize_url
+
+from . import get_test_directory
+
+
+class AssetStorage(FileSystemStorage):
+    """
+    A storage for the test assets
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs["location"] = os.path.join(get_test_directory(), "assets")
+        super(AssetStorage, self).__init__(*args, **kwargs)
+
+
+@override_settings(
+    SIMPLE_RESIZER_VIEW_STORAGE="simple_resizer.tests.views.AssetStorage")
+class ResizeViewTest(ResizerTestCase):
+    """
+    Test serving variants
+    """
+    def setUp(self):
+        """
+        Point to an asset
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+        self.storage = AssetStorage()
+        self.image = File(None, name="image-1.jpg")
+
+    def tearDown(self):
+        """
+        Remove the variants
+        """
+        self.remove_dirs(("resized",))
+
+    def test_resize(self):
+        """
+        The variant is generated and served
+        """
+        response = self.client.get(resize_url(self.image, 300, 300, True))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", response["Cache-Control"])
+        variant_name = "resized/300x300_cropped/image-1.jpg"
+        self.assertTrue(self.storage.exists(variant_name))
+
+        with self.storage.open(variant_name) as variant:
+            self.assertEqual(b"".join(response.streaming_content),
+                             variant.read())
+
+    def test_not_modified(self):
+        """
+        A revalidation is answered without generating
+        """
+        url = resize_url(self.image, 300, 300)
+        etag = self.client.get(url)["ETag"]
+        self.remove_dirs(("resized",))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(self.storage.exists("resized/300x300/image-1.jpg"))
+
+    @override_settings(SIMPLE_RESIZER_NAMING="versioned")
+    def test_versioned(self):
+        """
+        The url holds the token of the source
+        """
+        with self.storage.open("image-1.jpg") as image_file:
+            url = resize_url(File(image_file, name="image-1.jpg"), 300, 300)
+
+        self.assertIn("?v=", url)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url.replace("?v=", "?v=0")
+                                         ).status_code, 404)
+
+    @override_settings(SIMPLE_RESIZER_NAMING="versioned")
+    def test_replaced_source(self):
+        """
+        Urls signed for an other version of the source are redirected
+        """
+        url = reverse("simple_resizer_resize", kwargs={
+            "signature": get_signature("image-1.jpg", 300, 300, False,
+                                       "resized", "0123abcd"),
+            "namespace": "resized",
+            "size": "300x300",
+            "name": "image-1.jpg",
+        }) + "?v=0123abcd"
+
+        with self.storage.open("image-1.jpg") as image_file:
+            current_url = resize_url(File(image_file, name="image-1.jpg"),
+                                     300, 300)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].endswith(current_url))
+        self.assertFalse(os.path.exists(os.path.join(self.assets_folder,
+                                                     "resized")))
+
+    def test_invalid_signature(self):
+        """
+        Sizes that were not signed are refused
+        """
+        url = resize_url(self.image, 300, 300).replace("300x300", "301x300")
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_missing_source(self):
+        """
+        A missing source is not found
+        """
+        self.image.name = "missing.jpg"
+
+        self.assertEqual(
+            self.client.get(resize_url(self.image, 300, 300)).status_code,
+            404)
+
+    def test_template_tag(self):
+        """
+        The tag renders the signed url
+        """
+        template = Template("{% load resize_url from simple_resizer %}"
+                            "{% resize_url image 300 300 %}")
+
+        self.assertEqual(template.render(Context({"image": self.image})),
+                         resize_url(self.image, 300, 300))
@@ -0,0 +1,165 @@
+"""
+Test generating variants in the background
+"""
+
+import os
+import shutil
+import tempfile
+
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.core.files.storage import FileSystemStorage
+from django.template import Context
+from django.template import Template
+from django.test.utils import override_settings
+
+from ..cache import get_cache_key
+from ..utils.test import RemoteStorage
+from ..utils.test import ResizerTestCase
+from .. import workers
+import simple_resizer as resize
+
+from .models import ResizeTestModel
+
+from . import get_test_directory
+
+
+class AsyncResizeTest(ResizerTestCase):
+    """
+    Test the async mode
+    """
+    def setUp(self):
+        """
+        Save a model with an image
+        """
+        self.assets_folder = os.path.join(get_test_directory(), "assets")
+
+        with open(os.path.join(self.assets_folder, "image-1.jpg"),
+                  "rb") as image_file:
+            self.model = ResizeTestModel(image=ImageFile(image_file))
+            self.model.save()
+
+        self.storage = self.model.image.storage
+
+    def tearDown(self):
+        """
+        Remove the images
+        """
+        workers.wait()
+        self.remove_dirs(("resized", "resize_test_model"))
+
+    def test_async(self):
+        """
+        The source is served until the variant is generated
+        """
+        url = resize.resize_lazy(self.model.image, 300, 300, as_url=True,
+                                 mode="async")
+        self.assertEqual(url, self.model.image.url)
+
+        workers.wait()
+
+        name = resize.resize_lazy(self.model.image, 300, 300, mode="async")
+        self.assertNotEqual(name, self.model.image.name)
+        self.assertTrue(self.storage.exists(name))
+
+        image = ImageFile(self.storage.open(name))
+        self.assertResize(image, 300, 300)
+        image.close()
+
+    @override_settings(SIMPLE_RESIZER_MODE="async",
+                       SIMPLE_RESIZER_ASYNC_PLACEHOLDER="/placeholder.png")
+    def test_placeholder(self):
+        """
+        The placeholder is served until the variant is generated
+        """
+        template = Template("{% load resize from simple_resizer %}"
+                            "{% resize image=image width=300 height=300 %}")
+        rendered = template.render(Context({"image": self.model.image}))
+        self.assertEqual(rendered, "/placeholder.png")
+
+        workers.wait()
+
+        rendered = template.render(Context({"image": self.model.image}))
+        self.assertIn("300x300", rendered)
+
+    def test_async_many(self):
+        """
+        Missing variants of a batch are generated in the background
+        """
+        items = [(self.model.image, 300, 300), (self.model.image, 200, 200)]
+        names = resize.resize_lazy_many(items, mode="async")
+        self.assertEqual(names, [self.model.image.name] * 2)
+
+        workers.wait()
+
+        self.assertEqual(resize.resize_lazy_many(items, mode="async"),
+                         resize.resize_lazy_many(items))
+
+    def test_local_file(self):
+        """
+        Sources outside of a storage are read from their path
+        """
+        location = tempfile.mkdtemp()
+        storage = FileSystemStorage(location=location)
+        # Relative, so the variant is saved below the location
+        path = os.path.relpath(os.path.join(self.assets_folder,
+                                            "image-1.jpg"))
+
+        try:
+            with open(path, "rb") as image_file:
+                image = ImageFile(image_file)
+                self.assertEqual(resize.resize_lazy(image, 300, 300,
+                                                    storage=storage,
+                                                    mode="async"), path)
+
+            workers.wait()
+
+            name = resize.resize_lazy(image, 300, 300, storage=storage,
+                                      mode="async")
+            self.assertNotEqual(name, path)
+            self.assertTrue(storage.exists(name))
+        finally:
+            shutil.rmtree(location)
+
+    @override_settings(SIMPLE_RESIZER_CACHE="default")
+    def test_remote(self):
+        """
+        Sources in a storage without local paths are resolved by the same
+        cache key in the worker as by the caller
+        """
+        cache.clear()
+        location = tempfile.mkdtemp()
+        storage = RemoteStorage(location=location)
+        shutil.copy(os.path.join(self.assets_folder, "image-1.jpg"),
+                    location)
+        image = ImageFile(storage.open("image-1.jpg"))
+        image.name = "image-1.jpg"
+        image.storage = storage
+
+        try:
+            self.assertEqual(resize.resize_lazy(image, 300, 300,
+                                                mode="async"), image.name)
+            workers.wait()
+
+            self.assertIsNotNone(cache.get(get_cache_key(
+                image, 300, 300, False, "resized", storage)))
+        finally:
+            image.close()
+            shutil.rmtree(location)
+
+    def test_stream(self):
+        """
+        Sources that can not be opened again are resized right away
+        """
+        with open(os.path.join(self.assets_folder, "image-1.jpg"),
+                  "rb") as image_file:
+            image = ImageFile(BytesIO(image_file.read()),
+                              name="resize_test_model/stream.jpg")
+
+        name = resize.resize_lazy(image, 300, 300, storage=self.storage,
+                                  mode="async")
+
+        self.assertNotEqual(name, image.name)
+        self.assertTrue(self.storage.exists(name))
@@ -3,7 +3,13 @@ A url scheme
 """
 
 from django.conf.urls import patterns
+from django.conf.urls import url
+
+from .views import resize
 
 urlpatterns = patterns(  # pylint: disable=C0103
     "",
+    url(r"^(?P<signature>[0-9a-f]+)/(?P<namespace>[\w-]+)/"
+        r"(?P<size>\d+x\d+(_cropped)?)/(?P<name>.+)$", resize,
+        name="simple_resizer_resize"),
 )
@@ -1,3 +1,19 @@
 """
 Some general purpose utilities
 """
+
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def import_attribute(path):
+    """
+    Import a class or function by its dotted path.
+    """
+    module_path, _, name = path.rpartition(".")
+
+    try:
+        return getattr(import_module(module_path), name)
+    except (ImportError, AttributeError, ValueError) as error:
+        raise ImproperlyConfigured("Could not import %r: %s" % (path, error))
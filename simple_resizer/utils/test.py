@@ -1,13 +1,88 @@
 """
-A helper test case class specific for resizing image
+Test helpers specific for resizing images
 """
 
 import os
 import shutil
 
+from django.core.files.storage import FileSystemStorage
+from django.core.files.storage import Storage
 from django.test import TestCase
 
 
+class CountingStorage(FileSystemStorage):
+    """
+    A storage that counts the calls that lookups should save
+    """
+    def __init__(self, *args, **kwargs):
+        super(CountingStorage, self).__init__(*args, **kwargs)
+        self.calls = {"exists": 0, "url": 0, "save": 0,
+                      "modified_time": 0}
+
+    def exists(self, name):
+        self.calls["exists"] += 1
+        return super(CountingStorage, self).exists(name)
+
+    def url(self, name):
+        self.calls["url"] += 1
+        return super(CountingStorage, self).url(name)
+
+    def modified_time(self, name):
+        self.calls["modified_time"] += 1
+        return super(CountingStorage, self).modified_time(name)
+
+    def get_modified_time(self, name):
+        # Django < 1.10 only has modified_time
+        method = super(CountingStorage, self).get_modified_time
+        self.calls["modified_time"] += 1
+        return method(name)
+
+    def save(self, name, content, *args, **kwargs):
+        self.calls["save"] += 1
+        return super(CountingStorage, self).save(name, content, *args,
+                                                 **kwargs)
+
+
+class RemoteStorage(Storage):
+    """
+    A storage without local paths, keeping its files on the filesystem and
+    counting the calls that lookups should save
+    """
+    def __init__(self, location=None, base_url=None):
+        self.local = FileSystemStorage(location=location, base_url=base_url)
+        self.location = self.local.location
+        self.base_url = self.local.base_url
+        self.calls = {"modified_time": 0}
+
+    def _open(self, name, mode="rb"):
+        return self.local.open(name, mode)
+
+    def _save(self, name, content):
+        return self.local.save(name, content)
+
+    def delete(self, name):
+        self.local.delete(name)
+
+    def exists(self, name):
+        return self.local.exists(name)
+
+    def listdir(self, path):
+        return self.local.listdir(path)
+
+    def size(self, name):
+        return self.local.size(name)
+
+    def url(self, name):
+        return self.local.url(name)
+
+    def modified_time(self, name):
+        self.calls["modified_time"] += 1
+        return self.local.modified_time(name)
+
+    def get_modified_time(self, name):
+        return self.modified_time(name)
+
+
 # pylint: disable=C0103
 class ResizerTestCase(TestCase):
     """
@@ -0,0 +1,226 @@
+"""
+Resize on request
+
+Serves variants from urls of the form
+
+    /<signature>/<namespace>/<width>x<height>[_cropped]/<source name>
+
+and generates them on first request. The signature keeps clients from
+requesting arbitrary sizes. With versioned naming the token of the source is
+added as the v parameter, so the url changes with the source, and urls of an
+other token are redirected to the current one. An output
+format is added as the f parameter, "auto" is negotiated on every request
+with the Accept header, and a named encoder profile as the p parameter.
+Since a url always maps to the same variant, it is
+served as immutable and revalidations are answered without generating or
+reading anything.
+"""
+
+import mimetypes
+import time
+
+from django.core.files.images import ImageFile
+from django.core.files.storage import get_storage_class
+from django.core.urlresolvers import reverse
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseRedirect
+from django.http import HttpResponseNotModified
+from django.http import StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.crypto import salted_hmac
+from django.utils.http import http_date
+from django.utils.http import parse_etags
+from django.utils.http import parse_http_date_safe
+from django.utils.http import urlencode
+
+from . import _normalize_params
+from . import resize_lazy
+from .conf import get_setting
+from .exceptions import LimitExceeded
+from .formats import get_format
+from .formats import get_mime_type
+from .formats import get_output_format
+from .formats import negotiate
+from .metrics import get_sink
+from .profiles import get_profile
+from .sources import get_source_token
+
+
+def _get_variant_path(name, width, height, crop, namespace):
+    """
+    Return the signed part of the url.
+    """
+    return "%s/%ix%i%s/%s" % (namespace, width, height,
+                              "_cropped" if crop else "", name)
+
+
+# pylint: disable=R0913
+def get_signature(name, width, height, crop, namespace, token="",
+                  output_format="", profile=""):
+    """
+    Return the signature of a variant.
+    """
+    value = "%s?%s" % (_get_variant_path(name, width, height, crop,
+                                         namespace), token)
+
+    if output_format:
+        value += "&%s" % output_format
+
+    if profile:
+        value += "&p=%s" % profile
+
+    return salted_hmac("simple_resizer.views", value).hexdigest()[:20]
+# pylint: enable=R0913
+
+
+def resize_url(image, width=None, height=None, crop=False,
+               namespace="resized", output_format=None, profile=None):
+    """
+    Return the url of the view serving a variant, without any storage access.
+    Only named encoder profiles can be used.
+    """
+    width, height, crop = _normalize_params(image, width, height, crop)
+    token = ""
+
+    if get_setting("NAMING") == "versioned":
+        token = get_source_token(image)
+
+    if output_format != "auto":
+        output_format = get_output_format(image, output_format)
+
+    profile = get_profile(profile)
+
+    if isinstance(profile, tuple):
+        raise ValueError("Only named encoder profiles can be served.")
+
+    url = reverse("simple_resizer_resize", kwargs={
+        "signature": get_signature(image.name, width, height, crop,
+                                   namespace, token, output_format or "",
+                                   profile or ""),
+        "namespace": namespace,
+        "size": "%ix%i%s" % (width, height, "_cropped" if crop else ""),
+        "name": image.name,
+    })
+
+    params = [(key, value) for key, value in (("v", token),
+                                              ("f", output_format),
+                                              ("p", profile))
+              if value]
+
+    if params:
+        url += "?%s" % urlencode(params)
+
+    return url
+
+
+def _stream(variant):
+    """
+    Stream a file and close it.
+    """
+    try:
+        for chunk in variant.chunks():
+            yield chunk
+    finally:
+        variant.close()
+
+
+# pylint: disable=R0913
+def resize(request, signature, namespace, size, name):
+    """
+    Serve a variant, generate it if it does not exist.
+    """
+    width, _, height = size.replace("_cropped", "").partition("x")
+    width, height = int(width), int(height)
+    crop = size.endswith("_cropped")
+
+    output_format = request.GET.get("f", "")
+    profile = request.GET.get("p", "")
+
+    if not constant_time_compare(signature, get_signature(
+            name, width, height, crop, namespace, request.GET.get("v", ""),
+            output_format, profile)):
+        raise Http404("Invalid signature.")
+
+    negotiated = output_format == "auto"
+
+    if negotiated:
+        output_format = negotiate(request.META.get("HTTP_ACCEPT"),
+                                  source_format=get_format(name)) or ""
+
+    tag = "%s-%s" % (signature, output_format) if output_format else signature
+    etag = '"%s"' % tag
+
+    if tag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+
+        if negotiated:
+            response["Vary"] = "Accept"
+
+        return response
+
+    storage = get_storage_class(get_setting("VIEW_STORAGE"))()
+
+    try:
+        source = ImageFile(storage.open(name))
+    except (IOError, OSError):
+        raise Http404("Source image not found.")
+
+    # Keep the storage name, the variant name is derived from it
+    source.name = name
+    source.storage = storage
+
+    try:
+        token = request.GET.get("v", "")
+
+        if token and token != get_source_token(source):
+            # Signed for an other version of the source
+            return HttpResponseRedirect(resize_url(
+                source, width, height, crop, namespace,
+                request.GET.get("f") or None, profile or None))
+
+        variant_name = resize_lazy(source, width, height, crop,
+                                   namespace=namespace, storage=storage,
+                                   mode="sync",
+                                   output_format=output_format or None,
+                                   profile=profile or None)
+    except LimitExceeded:
+        raise Http404("Source image exceeds the resize limits.")
+    finally:
+        source.close()
+
+    modified = int(time.mktime(
+        storage.modified_time(variant_name).timetuple()))
+    since = parse_http_date_safe(
+        request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+
+    if since is not None and since >= modified:
+        response = HttpResponseNotModified()
+    else:
+        response = StreamingHttpResponse(
+            _stream(storage.open(variant_name)),
+            content_type=(get_mime_type(variant_name) or
+                          mimetypes.guess_type(variant_name)[0] or
+                          "application/octet-stream"))
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified)
+    response["Cache-Control"] = "public, max-age=%i, immutable" % (
+        get_setting("VIEW_MAX_AGE"))
+
+    if negotiated:
+        response["Vary"] = "Accept"
+
+    return response
+# pylint: enable=R0913
+
+
+def metrics(request):  # pylint: disable=W0613
+    """
+    Serve the measurements of the Prometheus sink of this process. Not routed
+    by the app urls, since they should not be public.
+    """
+    return HttpResponse(
+        get_sink("simple_resizer.metrics.PrometheusSink").render(),
+        content_type="text/plain; version=0.0.4")
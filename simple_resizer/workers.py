@@ -0,0 +1,142 @@
+"""
+Background generation of variants
+
+A pool of daemon threads in the current process generates the variants that
+resize_lazy was asked for in async mode, so the caller does not wait for the
+resize.
+"""
+
+import logging
+import threading
+
+from django.core.files.images import ImageFile
+from django.db import close_old_connections
+from django.utils.six.moves import queue
+
+from .conf import get_setting
+from .sources import get_source_path
+
+
+logger = logging.getLogger(__name__)  # pylint: disable=C0103
+
+_QUEUE = []
+_LOCK = threading.Lock()
+_PENDING = set()
+
+
+def _get_queue():
+    """
+    Return the job queue, starting the workers on first use.
+    """
+    with _LOCK:
+        if not _QUEUE:
+            _QUEUE.append(queue.Queue(get_setting("ASYNC_QUEUE_SIZE")))
+
+            for idx in range(get_setting("ASYNC_WORKERS")):
+                thread = threading.Thread(
+                    target=_work, name="simple-resizer-worker-%i" % idx)
+                thread.daemon = True
+                thread.start()
+
+    return _QUEUE[0]
+
+
+def _run(job):
+    """
+    Generate a variant.
+    """
+    # Imported here, the package imports this module
+    from . import resize_lazy
+
+    (storage, name, path, width, height, crop, namespace, force,
+     output_format, profile) = job
+
+    if path is None:
+        source = ImageFile(storage.open(name))
+        # Versioned through the storage, like the caller did
+        source.storage = storage
+    else:
+        # Not in a storage, read from where the caller found it
+        source = ImageFile(open(path, "rb"))
+
+    # Keep the original name, the variant name is derived from it
+    source.name = name
+
+    try:
+        resize_lazy(source, width, height, crop, force=force,
+                    namespace=namespace, storage=storage, mode="sync",
+                    output_format=output_format, profile=profile)
+    finally:
+        source.close()
+
+
+def _work():
+    """
+    Run jobs forever.
+    """
+    jobs = _get_queue()
+
+    while True:
+        job = jobs.get()
+        try:
+            close_old_connections()
+            _run(job)
+        except Exception:  # pylint: disable=W0703
+            logger.exception("Generating variant of %s failed.", job[1])
+        finally:
+            with _LOCK:
+                _PENDING.discard(job)
+
+            jobs.task_done()
+
+
+def can_reopen(image):
+    """
+    Return whether a worker can open the source of image again, through its
+    storage or from its path. Streams have to be resized right away.
+    """
+    return (getattr(image, "storage", None) is not None or
+            get_source_path(image) is not None)
+
+
+# pylint: disable=R0913
+def enqueue(image, width, height, crop, namespace, storage, force=False,
+            output_format=None, profile=None):
+    """
+    Queue the generation of a variant, of which the source is read from its
+    storage, or from its path if it has none. Returns False if it was
+    already queued or the queue is full.
+    """
+    path = None
+    if getattr(image, "storage", None) is None:
+        path = get_source_path(image)
+
+    job = (storage, image.name, path, width, height, crop, namespace, force,
+           output_format, profile)
+
+    with _LOCK:
+        if job in _PENDING:
+            return False
+
+        _PENDING.add(job)
+
+    try:
+        _get_queue().put_nowait(job)
+    except queue.Full:
+        with _LOCK:
+            _PENDING.discard(job)
+
+        logger.warning("Resize queue is full, dropped variant of %s.",
+                       image.name)
+        return False
+
+    return True
+# pylint: enable=R0913
+
+
+def wait():
+    """
+    Block until every queued variant is generated.
+    """
+    if _QUEUE:
+        _QUEUE[0].join()